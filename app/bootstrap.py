@@ -1,17 +1,30 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from jwt import PyJWKClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlmodel import SQLModel
 
+from app.core.admission import TimedQueuePool
+from app.core.deadlines import connection_settings, translate_db_error
+from app.core.health import HealthMonitor
+from app.core.idempotency import build_idempotency_store
+from app.core.instrumentation import MeteredPyJWKClient, instrument_engine
+from app.core.profiling import AllocationTracker, SamplingProfiler
+from app.core.rate_limit import build_rate_limiter
+from app.core.resilience import build_outbound_policies
+from app.core.slow_queries import SlowQueryLog
+from app.core.unit_of_work import UnitOfWorkSession
+from app.services.signature_reconciler import SignatureReconciler
+from app.services.signature_webhook_service import SignatureEventQueue
+
 
 @asynccontextmanager
 async def app_lifespan(app: FastAPI):
     """Inicializa recursos compartidos por la app, como el motor de base de datos y el JWKS client.
     Estos recursos se almacenan en `app.state` para que estén disponibles en los endpoints y dependencias.
     """
-    app.state.jwks_client = PyJWKClient(
+    app.state.jwks_client = MeteredPyJWKClient(
         f"{app.state.settings.project_url}/auth/v1/.well-known/jwks.json",
         cache_keys=True,
         max_cached_keys=2,
@@ -27,25 +40,88 @@ async def app_lifespan(app: FastAPI):
         f"postgresql+asyncpg://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
     )
 
+    settings = app.state.settings
     engine = create_async_engine(
         database_url,
+        # Mide la espera por conexión para el control de admisión
+        poolclass=TimedQueuePool,
         pool_size=10,
         pool_pre_ping=True,
         pool_recycle=1800,
+        pool_timeout=settings.db_pool_timeout,
+        connect_args={
+            "server_settings": connection_settings(
+                statement_timeout=settings.db_statement_timeout,
+                lock_timeout=settings.db_lock_timeout,
+            )
+        },
         echo=False,
     )
+    # Cancelaciones por timeout de Postgres -> errores de dominio (503/504)
+    event.listen(engine.sync_engine, "handle_error", translate_db_error)
+    threshold_ms = app.state.settings.slow_query_threshold_ms
+    app.state.slow_query_log = (
+        SlowQueryLog(
+            threshold_ms=threshold_ms,
+            explain_sample_rate=app.state.settings.slow_query_explain_sample_rate,
+            capacity=app.state.settings.slow_query_log_size,
+        )
+        if threshold_ms > 0
+        else None
+    )
+    instrument_engine(engine, app.state.slow_query_log)
     app.state.async_session = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
+        engine,
+        class_=AsyncSession,
+        sync_session_class=UnitOfWorkSession,
+        expire_on_commit=False,
     )
 
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
+    if settings.profiling_enabled:
+        app.state.profiler = SamplingProfiler(
+            interval=settings.profiling_interval_ms / 1000,
+            max_seconds=settings.profiling_max_seconds,
+        )
+        app.state.allocation_tracker = AllocationTracker(
+            app.routes, frames=settings.tracemalloc_frames
+        )
+    else:
+        app.state.profiler = None
+        app.state.allocation_tracker = None
+    app.state.outbound_policies = build_outbound_policies(settings)
+    app.state.rate_limiter = build_rate_limiter(settings, engine, app.routes)
+    app.state.idempotency = build_idempotency_store(settings, engine)
+
+    app.state.health_monitor = HealthMonitor(engine, app.state.jwks_client, settings)
+    app.state.health_monitor.start()
+
+    signature_event_queue = SignatureEventQueue(
+        app.state.async_session,
+        batch_size=settings.hellosign_webhook_batch_size,
+        flush_interval=settings.hellosign_webhook_flush_interval,
+        dedup_size=settings.hellosign_webhook_dedup_size,
+    )
+    signature_event_queue.start()
+    app.state.signature_event_queue = signature_event_queue
+
+    signature_reconciler = SignatureReconciler(
+        app.state.async_session, settings, app.state.outbound_policies
+    )
+    if settings.signature_reconcile_enabled and settings.hellosign_api_key:
+        signature_reconciler.start()
+
     try:
         yield
     except Exception as e:
         print(f"Error en lifespan: {e}")
         raise
     finally:
+        # Aplicar los eventos de firma encolados antes de cerrar el engine
+        await app.state.health_monitor.stop()
+        await signature_reconciler.stop()
+        await signature_event_queue.stop()
         if "engine" in locals():
             await engine.dispose()
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -20,6 +22,176 @@ class Settings(BaseSettings):
     # HelloSign (Dropbox Sign) configuration
     hellosign_api_key: str = Field(alias="HELLOSIGN_API_KEY", default="")
     hellosign_client_id: str = Field(alias="HELLOSIGN_CLIENT_ID", default="")
+    # URL base alternativa de la API (p. ej. el doble local de perf/fake_providers)
+    hellosign_api_host: str | None = Field(alias="HELLOSIGN_API_HOST", default=None)
+
+    # HelloSign webhook: los eventos se encolan y se aplican en lotes
+    hellosign_webhook_batch_size: int = Field(
+        alias="HELLOSIGN_WEBHOOK_BATCH_SIZE", default=100
+    )
+    hellosign_webhook_flush_interval: float = Field(
+        alias="HELLOSIGN_WEBHOOK_FLUSH_INTERVAL", default=1.0
+    )
+    hellosign_webhook_dedup_size: int = Field(
+        alias="HELLOSIGN_WEBHOOK_DEDUP_SIZE", default=10000
+    )
+
+    # Reconciliación periódica de firmas pendientes (callbacks perdidos)
+    signature_reconcile_enabled: bool = Field(
+        alias="SIGNATURE_RECONCILE_ENABLED", default=True
+    )
+    signature_reconcile_interval: float = Field(
+        alias="SIGNATURE_RECONCILE_INTERVAL", default=300.0
+    )
+    signature_reconcile_page_size: int = Field(
+        alias="SIGNATURE_RECONCILE_PAGE_SIZE", default=100, ge=1, le=100
+    )
+    signature_reconcile_max_pages: int = Field(
+        alias="SIGNATURE_RECONCILE_MAX_PAGES", default=20
+    )
+    signature_reconcile_batch_limit: int = Field(
+        alias="SIGNATURE_RECONCILE_BATCH_LIMIT", default=1000
+    )
+
+    # Llamadas salientes: timeouts, concurrencia, reintentos y circuit breaker
+    storage_timeout: float = Field(alias="STORAGE_TIMEOUT", default=5.0)
+    storage_max_concurrency: int = Field(alias="STORAGE_MAX_CONCURRENCY", default=20)
+    hellosign_timeout: float = Field(alias="HELLOSIGN_TIMEOUT", default=15.0)
+    hellosign_max_concurrency: int = Field(
+        alias="HELLOSIGN_MAX_CONCURRENCY", default=10
+    )
+    outbound_max_retries: int = Field(alias="OUTBOUND_MAX_RETRIES", default=2)
+    outbound_retry_budget_ratio: float = Field(
+        alias="OUTBOUND_RETRY_BUDGET_RATIO", default=0.1
+    )
+    outbound_breaker_failure_threshold: int = Field(
+        alias="OUTBOUND_BREAKER_FAILURE_THRESHOLD", default=5
+    )
+    outbound_breaker_reset_timeout: float = Field(
+        alias="OUTBOUND_BREAKER_RESET_TIMEOUT", default=30.0
+    )
+
+    # Subida de documentos con URL firmada (los bytes van directo a Storage)
+    document_upload_bucket: str = Field(
+        alias="DOCUMENT_UPLOAD_BUCKET", default="documents"
+    )
+    document_upload_max_bytes: int = Field(
+        alias="DOCUMENT_UPLOAD_MAX_BYTES", default=50 * 1024 * 1024
+    )
+    # A partir de este tamaño se ofrece además una sesión resumable (TUS)
+    document_resumable_threshold_bytes: int = Field(
+        alias="DOCUMENT_RESUMABLE_THRESHOLD_BYTES", default=6 * 1024 * 1024
+    )
+    document_upload_mime_types: list[str] = Field(
+        alias="DOCUMENT_UPLOAD_MIME_TYPES",
+        default=["application/pdf", "image/jpeg", "image/png"],
+    )
+
+    # Consultas SQL por request: presupuesto por defecto (las rutas pueden
+    # declarar el suyo con @query_budget) y repeticiones que se reportan como N+1
+    sql_query_budget: int = Field(alias="SQL_QUERY_BUDGET", default=10)
+    sql_n_plus_one_threshold: int = Field(alias="SQL_N_PLUS_ONE_THRESHOLD", default=3)
+
+    # Consultas lentas: umbral (<= 0 desactiva), fracción a la que se le captura
+    # el plan con EXPLAIN y cantidad de entradas retenidas en memoria
+    slow_query_threshold_ms: float = Field(
+        alias="SLOW_QUERY_THRESHOLD_MS", default=200.0
+    )
+    slow_query_explain_sample_rate: float = Field(
+        alias="SLOW_QUERY_EXPLAIN_SAMPLE_RATE", default=0.1, ge=0.0, le=1.0
+    )
+    slow_query_log_size: int = Field(alias="SLOW_QUERY_LOG_SIZE", default=200, ge=1)
+
+    # Readiness: chequeos en segundo plano cada HEALTH_CHECK_INTERVAL segundos.
+    # Solo los críticos sacan al pod de rotación; Storage se informa pero no es
+    # crítico por defecto (su caída afecta a todos los pods por igual)
+    health_check_interval: float = Field(alias="HEALTH_CHECK_INTERVAL", default=5.0)
+    health_check_timeout: float = Field(alias="HEALTH_CHECK_TIMEOUT", default=2.0)
+    health_pool_saturation_threshold: float = Field(
+        alias="HEALTH_POOL_SATURATION_THRESHOLD", default=0.9, gt=0.0, le=1.0
+    )
+    health_critical_checks: list[str] = Field(
+        alias="HEALTH_CRITICAL_CHECKS", default=["database", "pool", "jwks"]
+    )
+
+    # Perfilado bajo demanda (endpoints /admin/profile y /admin/memory)
+    profiling_enabled: bool = Field(alias="PROFILING_ENABLED", default=False)
+    profiling_max_seconds: float = Field(alias="PROFILING_MAX_SECONDS", default=30.0)
+    profiling_interval_ms: float = Field(
+        alias="PROFILING_INTERVAL_MS", default=5.0, gt=0
+    )
+    tracemalloc_frames: int = Field(alias="TRACEMALLOC_FRAMES", default=25, ge=1)
+
+    # Captura muestreada y anonimizada de requests a JSONL, para reproducirla
+    # con `perf.replay`
+    traffic_capture_enabled: bool = Field(
+        alias="TRAFFIC_CAPTURE_ENABLED", default=False
+    )
+    traffic_capture_file: str = Field(
+        alias="TRAFFIC_CAPTURE_FILE", default="traffic.jsonl"
+    )
+    traffic_capture_sample_ratio: float = Field(
+        alias="TRAFFIC_CAPTURE_SAMPLE_RATIO", default=0.1, ge=0.0, le=1.0
+    )
+    # Sal de los seudónimos HMAC, la misma en todos los workers. Obligatoria
+    # con la captura activa; no debe salir del entorno donde corre la API
+    traffic_capture_salt: str = Field(alias="TRAFFIC_CAPTURE_SALT", default="")
+
+    # Deadline por request (las rutas pueden declarar el suyo con @deadline) y
+    # timeouts de base de cada conexión; el restante del deadline los acota con
+    # SET LOCAL. DB_POOL_TIMEOUT: espera máxima por una conexión libre del pool
+    request_deadline: float = Field(alias="REQUEST_DEADLINE", default=10.0, gt=0)
+    db_statement_timeout: float = Field(
+        alias="DB_STATEMENT_TIMEOUT", default=10.0, gt=0
+    )
+    db_lock_timeout: float = Field(alias="DB_LOCK_TIMEOUT", default=2.0, gt=0)
+    db_pool_timeout: float = Field(alias="DB_POOL_TIMEOUT", default=5.0, gt=0)
+
+    # Lecturas independientes en paralelo: conexiones extra del pool que puede
+    # usar cada request (0 las ejecuta en secuencia en la sesión del request)
+    db_parallel_reads: int = Field(alias="DB_PARALLEL_READS", default=2, ge=0)
+
+    # Control de admisión: requests en curso, cola con prioridad y espera máxima
+    # en ella. Con una espera media por conexión del pool mayor que
+    # ADMISSION_POOL_WAIT_TARGET se admiten tantos requests como conexiones
+    admission_enabled: bool = Field(alias="ADMISSION_ENABLED", default=True)
+    admission_max_in_flight: int = Field(
+        alias="ADMISSION_MAX_IN_FLIGHT", default=32, ge=1
+    )
+    admission_max_queue: int = Field(alias="ADMISSION_MAX_QUEUE", default=64, ge=0)
+    admission_queue_timeout: float = Field(
+        alias="ADMISSION_QUEUE_TIMEOUT", default=2.0, gt=0
+    )
+    admission_pool_wait_target: float = Field(
+        alias="ADMISSION_POOL_WAIT_TARGET", default=0.05, gt=0
+    )
+
+    # Rate limiting por usuario (JWT sub) o IP: token bucket de RATE_LIMIT_BURST
+    # tokens que se recarga a RATE_LIMIT_RATE por segundo; las rutas declaran su
+    # costo con @rate_cost. Backend "memory" (por proceso) o "postgres"
+    # (compartido entre workers, requiere la migración 0003)
+    rate_limit_enabled: bool = Field(alias="RATE_LIMIT_ENABLED", default=True)
+    rate_limit_backend: Literal["memory", "postgres"] = Field(
+        alias="RATE_LIMIT_BACKEND", default="memory"
+    )
+    rate_limit_rate: float = Field(alias="RATE_LIMIT_RATE", default=5.0, gt=0)
+    rate_limit_burst: float = Field(alias="RATE_LIMIT_BURST", default=60.0, gt=0)
+
+    # Idempotency-Key en los POST que crean recursos (requiere la migración
+    # 0004): las respuestas se conservan IDEMPOTENCY_TTL segundos; una reserva
+    # abandonada se libera a los IDEMPOTENCY_LEASE segundos (más que el mayor
+    # deadline de las rutas)
+    idempotency_enabled: bool = Field(alias="IDEMPOTENCY_ENABLED", default=True)
+    idempotency_ttl: float = Field(alias="IDEMPOTENCY_TTL", default=86400.0, gt=0)
+    idempotency_lease: float = Field(alias="IDEMPOTENCY_LEASE", default=60.0, gt=0)
+
+    # Tracing (spans compatibles con OpenTelemetry, exportados localmente)
+    tracing_enabled: bool = Field(alias="TRACING_ENABLED", default=False)
+    tracing_exporter: str = Field(alias="TRACING_EXPORTER", default="console")
+    tracing_sample_ratio: float = Field(
+        alias="TRACING_SAMPLE_RATIO", default=1.0, ge=0.0, le=1.0
+    )
+    tracing_file: str = Field(alias="TRACING_FILE", default="traces.jsonl")
 
     # CORS configuration
     prod_domain: str | None = Field(alias="PROD_DOMAIN", default=None)
@@ -0,0 +1,289 @@
+"""Control de admisión: requests en curso acotados, cola con prioridad y rechazo
+temprano cuando el pool de conexiones está saturado.
+
+Sin esto, en un pico los requests esperan en silencio una de las conexiones del
+pool hasta que el cliente corta, y la latencia de todos se dispara.
+`AdmissionMiddleware` admite hasta `ADMISSION_MAX_IN_FLIGHT` requests a la vez;
+los siguientes esperan en una cola acotada (`ADMISSION_MAX_QUEUE`) ordenada por
+prioridad, como mucho `ADMISSION_QUEUE_TIMEOUT` segundos. Si la cola está llena
+o la espera vence, el request recibe 503 con `Retry-After`.
+
+El pool se mide con `TimedQueuePool`: si la espera media por una conexión supera
+`ADMISSION_POOL_WAIT_TARGET`, la BD es el cuello de botella y se admiten como
+mucho tantos requests como conexiones tiene el pool; los de prioridad baja se
+rechazan de inmediato con 429 en lugar de encolarse.
+
+La prioridad se declara en el endpoint, debajo del decorador de la ruta:
+
+    @router.post("/{document_id}/sign")
+    @priority(Priority.high)
+    async def sign_document(...): ...
+
+Solo se resuelve la ruta cuando hay que encolar: con capacidad libre el request
+pasa sin más costo que un contador.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from collections.abc import Callable, Sequence
+from enum import IntEnum
+from typing import Any, TypeVar
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import REGISTRY
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Atributo con el que `@priority` marca el endpoint
+PRIORITY_ATTR = "__admission_priority__"
+
+_IN_FLIGHT = REGISTRY.gauge("admission_in_flight", "Requests admitidos en curso")
+_QUEUED = REGISTRY.gauge("admission_queued", "Requests esperando admisión")
+_REJECTED = REGISTRY.counter(
+    "admission_rejected",
+    "Requests rechazados por el control de admisión",
+    ["priority", "reason"],
+)
+_QUEUE_WAIT = REGISTRY.histogram(
+    "admission_queue_wait_seconds", "Espera en la cola de admisión", ["priority"]
+)
+_POOL_WAIT = REGISTRY.histogram(
+    "db_pool_wait_seconds", "Espera por una conexión del pool"
+)
+_POOL_WAIT_AVG = REGISTRY.gauge(
+    "db_pool_wait_avg_seconds", "Media móvil de la espera por una conexión del pool"
+)
+
+
+class Priority(IntEnum):
+    """Menor valor, antes sale de la cola."""
+
+    high = 0
+    normal = 1
+    low = 2
+
+
+def priority(level: Priority) -> Callable[[F], F]:
+    """Declara la prioridad de admisión de un endpoint (por defecto `normal`)."""
+
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, PRIORITY_ATTR, level)
+        return endpoint
+
+    return decorator
+
+
+class PoolWait:
+    """Media móvil exponencial de la espera por una conexión del pool."""
+
+    def __init__(self, *, alpha: float = 0.2) -> None:
+        self.alpha = alpha
+        self.average = 0.0
+        # Conexiones que el pool puede entregar a la vez (size + max_overflow)
+        self.capacity: int | None = None
+        _POOL_WAIT_AVG.set_function(lambda: self.average)
+
+    def observe(self, seconds: float) -> None:
+        _POOL_WAIT.observe(seconds)
+        self.average += self.alpha * (seconds - self.average)
+
+
+# Un engine por proceso: la espera se comparte a nivel de módulo, como REGISTRY
+POOL_WAIT = PoolWait()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool asyncio que mide cuánto espera cada checkout (`POOL_WAIT`)."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        POOL_WAIT.capacity = self.size() + max(self._max_overflow, 0)
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+
+class AdmissionRejected(Exception):
+    """El request no entra: se responde `status` con `Retry-After`."""
+
+    def __init__(self, status: int, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Cupos de requests en curso y cola de espera por prioridad."""
+
+    def __init__(
+        self,
+        *,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        pool_wait_target: float,
+        pool_wait: PoolWait = POOL_WAIT,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.pool_wait_target = pool_wait_target
+        self.pool_wait = pool_wait
+        self.in_flight = 0
+        self.queued = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        # Media móvil de la duración de los requests, para estimar Retry-After
+        self._service_time = 0.1
+        _IN_FLIGHT.set_function(lambda: self.in_flight)
+        _QUEUED.set_function(lambda: self.queued)
+
+    def pool_saturated(self) -> bool:
+        return self.pool_wait.average > self.pool_wait_target
+
+    def limit(self) -> int:
+        if self.pool_saturated() and self.pool_wait.capacity:
+            return min(self.max_in_flight, self.pool_wait.capacity)
+        return self.max_in_flight
+
+    def try_admit(self) -> bool:
+        """Camino rápido: hay cupo y nadie esperando antes."""
+        if self.queued == 0 and self.in_flight < self.limit():
+            self.in_flight += 1
+            return True
+        return False
+
+    async def admit(self, level: Priority) -> None:
+        """Espera un cupo en la cola según `level`.
+
+        Raises:
+            AdmissionRejected: Cola llena, espera vencida o prioridad baja con el pool
+                saturado
+        """
+        if level == Priority.low and self.pool_saturated():
+            raise self._rejected(level, 429, "pool_saturated")
+        if self.queued >= self.max_queue:
+            raise self._rejected(level, 503, "queue_full")
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._sequence), waiter))
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except TimeoutError:
+            if waiter.done():
+                # El cupo llegó justo al vencer: se usa
+                return
+            waiter.cancel()
+            raise self._rejected(level, 503, "queue_timeout") from None
+        except asyncio.CancelledError:
+            # El cliente se fue: si ya tenía cupo asignado, se devuelve
+            if waiter.done():
+                self._hand_off()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            self.queued -= 1
+            _QUEUE_WAIT.labels(level.name).observe(time.perf_counter() - started)
+
+    def release(self, elapsed: float) -> None:
+        self._service_time += 0.2 * (elapsed - self._service_time)
+        self._hand_off()
+
+    def _hand_off(self) -> None:
+        self.in_flight -= 1
+        # El cupo pasa directamente al siguiente en la cola
+        while self._waiters and self.in_flight < self.limit():
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            waiter.set_result(None)
+            self.in_flight += 1
+
+    def _rejected(self, level: Priority, status: int, reason: str) -> AdmissionRejected:
+        _REJECTED.labels(level.name, reason).inc()
+        # Tiempo para vaciar la cola actual con los cupos disponibles
+        drain = self._service_time * (self.queued + 1) / max(self.limit(), 1)
+        return AdmissionRejected(status, reason, retry_after=drain)
+
+
+def route_priority(scope: Scope) -> Priority:
+    """Prioridad del endpoint que atenderá el request (el router aún no corrió)."""
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(
+                getattr(route, "endpoint", None), PRIORITY_ATTR, Priority.normal
+            )
+    return Priority.normal
+
+
+_MESSAGES = {
+    "pool_saturated": "Servicio saturado, reintentar más tarde",
+    "queue_full": "Demasiados requests en curso, reintentar más tarde",
+    "queue_timeout": "Demasiados requests en curso, reintentar más tarde",
+}
+
+
+class AdmissionMiddleware:
+    """Aplica `AdmissionController` a cada request HTTP salvo `exempt_paths`."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        controller: AdmissionController,
+        exempt_paths: Sequence[str] = ("/health", "/metrics"),
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        if not controller.try_admit():
+            try:
+                await controller.admit(route_priority(scope))
+            except AdmissionRejected as exc:
+                await _reject(send, exc)
+                return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.perf_counter() - started)
+
+
+async def _reject(send: Send, exc: AdmissionRejected) -> None:
+    body = json.dumps({"detail": _MESSAGES[exc.reason]}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": exc.status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(math.ceil(exc.retry_after), 1)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
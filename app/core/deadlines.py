@@ -0,0 +1,230 @@
+"""Deadline por request, propagado a la BD y a las llamadas salientes.
+
+`DeadlineMiddleware` fija el instante de llegada de cada request; el plazo es el
+de la ruta (`@deadline(segundos)`) o `REQUEST_DEADLINE`. Lo que queda de ese plazo
+acota el trabajo que el request dispara:
+
+- Cada transacción de la sesión del request lo aplica con `SET LOCAL` a
+  `statement_timeout` y `lock_timeout` (ver `apply_to_transaction`). Si el plazo
+  ya venció, no se inicia la transacción.
+- `OutboundPolicy` (app/core/resilience.py) recorta su timeout al restante.
+
+Las conexiones nacen con `statement_timeout`/`lock_timeout` de base
+(`connection_settings`), que también acotan a las tareas en segundo plano. El
+`SET LOCAL` se emite en cada transacción del request, aunque el restante esté
+cerca de la base: el reloj sigue corriendo entre el `BEGIN` y cada sentencia.
+
+Al vencer, Postgres cancela la sentencia y `translate_db_error` la convierte en
+`DeadlineExceededError` (504); un lock que no se obtiene a tiempo es
+`ServiceUnavailableError` (503 con Retry-After), porque reintentar suele funcionar.
+"""
+
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.orm import Session, SessionTransaction
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.errors import DeadlineExceededError, ServiceUnavailableError
+from app.core.metrics import REGISTRY
+from app.core.query_tracking import UNTRACKED
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Atributo con el que `@deadline` marca el endpoint
+DEADLINE_ATTR = "__request_deadline__"
+
+# SQLSTATE de Postgres: sentencia cancelada (statement_timeout) y lock no obtenido
+QUERY_CANCELED = "57014"
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Se repite en cada transacción: no cuenta en el presupuesto de consultas
+_SET_LOCAL = text(
+    "SELECT set_config('statement_timeout', :statement_timeout, true), "
+    "set_config('lock_timeout', :lock_timeout, true)"
+).execution_options(**{UNTRACKED: True})
+
+_EXCEEDED = REGISTRY.counter(
+    "request_deadline_exceeded",
+    "Trabajo cortado por vencer el deadline del request",
+    ["source"],
+)
+
+
+class Deadline:
+    """Plazo del request en curso.
+
+    El vencimiento se resuelve en el primer uso, cuando el router ya dejó la ruta
+    en el scope y se conoce su `@deadline`.
+    """
+
+    __slots__ = (
+        "_expires_at",
+        "default",
+        "lock_timeout",
+        "scope",
+        "started",
+        "statement_timeout",
+    )
+
+    def __init__(
+        self,
+        scope: Scope,
+        *,
+        default: float,
+        statement_timeout: float,
+        lock_timeout: float,
+    ) -> None:
+        self.scope = scope
+        self.started = time.monotonic()
+        self.default = default
+        self.statement_timeout = statement_timeout
+        self.lock_timeout = lock_timeout
+        self._expires_at: float | None = None
+
+    @property
+    def expires_at(self) -> float:
+        if self._expires_at is not None:
+            return self._expires_at
+        route = self.scope.get("route")
+        expires_at = self.started + route_deadline(route, self.default)
+        if route is not None:
+            self._expires_at = expires_at
+        return expires_at
+
+    def remaining(self) -> float:
+        """Segundos que quedan (negativo si ya venció)."""
+        return self.expires_at - time.monotonic()
+
+
+_current: ContextVar[Deadline | None] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Deadline | None:
+    """Deadline del request en curso (None fuera de un request HTTP)."""
+    return _current.get()
+
+
+def remaining() -> float | None:
+    """Segundos que le quedan al request en curso, o None si no hay deadline."""
+    current = _current.get()
+    return None if current is None else current.remaining()
+
+
+def deadline(seconds: float) -> Callable[[F], F]:
+    """Declara el plazo de un endpoint, en lugar de `REQUEST_DEADLINE`.
+
+    Se aplica debajo del decorador de la ruta:
+
+        @router.post("/{document_id}/sign")
+        @deadline(30)
+        async def sign_document(...): ...
+    """
+
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, DEADLINE_ATTR, seconds)
+        return endpoint
+
+    return decorator
+
+
+def route_deadline(route: Any, default: float) -> float:
+    """Plazo declarado por el endpoint de la ruta o el global."""
+    return getattr(getattr(route, "endpoint", None), DEADLINE_ATTR, default)
+
+
+def exceeded(source: str, message: str) -> DeadlineExceededError:
+    """Cuenta el corte en métricas y devuelve el error para lanzarlo."""
+    _EXCEEDED.labels(source).inc()
+    return DeadlineExceededError(message)
+
+
+def connection_settings(
+    *, statement_timeout: float, lock_timeout: float
+) -> dict[str, str]:
+    """`server_settings` de asyncpg con los timeouts de base de cada conexión."""
+    return {
+        "statement_timeout": str(_milliseconds(statement_timeout)),
+        "lock_timeout": str(_milliseconds(lock_timeout)),
+    }
+
+
+def apply_to_transaction(
+    session: Session, transaction: SessionTransaction, connection: Connection
+) -> None:
+    """Listener `after_begin`: acota la transacción al plazo que le queda al request.
+
+    Raises:
+        DeadlineExceededError: El plazo venció antes de empezar la transacción
+    """
+    current = _current.get()
+    if current is None or connection.dialect.name != "postgresql":
+        return
+    left = current.remaining()
+    if left <= 0:
+        raise exceeded("database", "El request agotó su plazo antes de consultar la BD")
+    connection.execute(
+        _SET_LOCAL,
+        {
+            "statement_timeout": str(
+                _milliseconds(min(left, current.statement_timeout))
+            ),
+            "lock_timeout": str(_milliseconds(min(left, current.lock_timeout))),
+        },
+    )
+
+
+def translate_db_error(context: ExceptionContext) -> Exception | None:
+    """Listener `handle_error` del engine: timeouts de Postgres a errores de dominio."""
+    sqlstate = getattr(context.original_exception, "sqlstate", None)
+    if sqlstate == QUERY_CANCELED:
+        return exceeded("database", "La consulta superó el plazo del request")
+    if sqlstate == LOCK_NOT_AVAILABLE:
+        _EXCEEDED.labels("lock").inc()
+        return ServiceUnavailableError(
+            "Recurso bloqueado por otra operación, reintentar", retry_after=1.0
+        )
+    return None
+
+
+def _milliseconds(seconds: float) -> int:
+    # 0 desactiva el timeout en Postgres: el mínimo es 1 ms
+    return max(int(seconds * 1000), 1)
+
+
+class DeadlineMiddleware:
+    """Abre el deadline de cada request HTTP en el contexto actual."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        default: float,
+        statement_timeout: float,
+        lock_timeout: float,
+    ) -> None:
+        self.app = app
+        self.default = default
+        self.statement_timeout = statement_timeout
+        self.lock_timeout = lock_timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current.set(
+            Deadline(
+                scope,
+                default=self.default,
+                statement_timeout=self.statement_timeout,
+                lock_timeout=self.lock_timeout,
+            )
+        )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
@@ -23,6 +23,12 @@ class UnauthorizedError(ServiceError):
     pass
 
 
+class PreconditionFailedError(ServiceError):
+    """Exception raised when an If-Match precondition does not hold."""
+
+    pass
+
+
 class ForbiddenError(ServiceError):
     """Exception raised when the action is forbidden."""
 
@@ -33,3 +39,37 @@ class ValidationDomainError(ServiceError):
     """Exception raised when domain validation fails."""
 
     pass
+
+
+class ServiceUnavailableError(ServiceError):
+    """Exception raised when an external dependency is unavailable or saturated."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpstreamTimeoutError(ServiceError):
+    """Exception raised when an external dependency does not answer in time."""
+
+    pass
+
+
+class DeadlineExceededError(ServiceError):
+    """Exception raised when the request runs out of its deadline."""
+
+    pass
+
+
+class RateLimitedError(ServiceError):
+    """Exception raised when a client exceeds its request rate."""
+
+    def __init__(
+        self,
+        message: str,
+        retry_after: float,
+        headers: dict[str, str] | None = None,
+    ):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.headers = headers or {}
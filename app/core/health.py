@@ -0,0 +1,195 @@
+# app/core/health.py
+"""Chequeos de readiness calculados en segundo plano.
+
+`HealthMonitor` corre cada `interval` segundos los chequeos de base de datos,
+saturación del pool, vigencia del JWKS y alcance de Storage, y guarda el último
+resultado. `GET /health/ready` solo lee ese resultado: los probes frecuentes del
+balanceador no abren conexiones ni hacen llamadas salientes.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+
+import httpx
+from jwt import PyJWKClient, PyJWTError
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+from app.config import Settings
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_CHECK_UP = REGISTRY.gauge(
+    "health_check_up", "Resultado del último chequeo de readiness (1 = ok)", ["check"]
+)
+
+DATABASE = "database"
+POOL = "pool"
+JWKS = "jwks"
+STORAGE = "storage"
+
+# Fallas esperables de los chequeos: BD, red, Storage y descarga del JWKS
+_CHECK_ERRORS = (SQLAlchemyError, OSError, httpx.HTTPError, PyJWTError)
+
+
+class CheckResult:
+    __slots__ = ("detail", "latency_ms", "ok")
+
+    def __init__(self, ok: bool, detail: str, latency_ms: float) -> None:
+        self.ok = ok
+        self.detail = detail
+        self.latency_ms = latency_ms
+
+
+class HealthMonitor:
+    """Chequeos periódicos de dependencias con el último resultado en memoria."""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        jwks_client: PyJWKClient,
+        settings: Settings,
+    ) -> None:
+        self.engine = engine
+        self.jwks_client = jwks_client
+        self.settings = settings
+        self.interval = settings.health_check_interval
+        self.timeout = settings.health_check_timeout
+        self.critical = set(settings.health_critical_checks)
+        self.checks: dict[str, CheckResult] = {}
+        self.checked_at: datetime | None = None
+        self._checked_monotonic: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="health-monitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Error ejecutando los chequeos de readiness")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> dict[str, CheckResult]:
+        names = (DATABASE, POOL, JWKS, STORAGE)
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            self._timed(self._check_database),
+            self._timed(self._check_pool),
+            self._timed(self._check_jwks),
+            self._timed(self._check_storage),
+            return_exceptions=True,
+        )
+        previous = self.checks
+        self.checks = {
+            name: self._unexpected(name, result, started)
+            if isinstance(result, BaseException)
+            else result
+            for name, result in zip(names, results, strict=True)
+        }
+        self.checked_at = datetime.now(UTC)
+        self._checked_monotonic = time.monotonic()
+        for name, result in self.checks.items():
+            _CHECK_UP.labels(name).set(1 if result.ok else 0)
+            # Solo los cambios de estado, no un warning por ciclo
+            before = previous.get(name)
+            if not result.ok and (before is None or before.ok):
+                logger.warning("Chequeo %s falló: %s", name, result.detail)
+            elif result.ok and before is not None and not before.ok:
+                logger.info("Chequeo %s recuperado", name)
+        return self.checks
+
+    def status(self) -> str:
+        """`ready`, `starting` (sin resultados aún), `stale` (el monitor dejó de
+        actualizar) o `not_ready` (falló un chequeo crítico)."""
+        if self._checked_monotonic is None:
+            return "starting"
+        if (
+            time.monotonic() - self._checked_monotonic
+            > 3 * self.interval + self.timeout
+        ):
+            return "stale"
+        if any(
+            not result.ok
+            for name, result in self.checks.items()
+            if name in self.critical
+        ):
+            return "not_ready"
+        return "ready"
+
+    @staticmethod
+    def _unexpected(name: str, exc: BaseException, started: float) -> CheckResult:
+        """Un error no previsto (un bug del chequeo) falla solo ese chequeo; los
+        demás conservan su resultado de este ciclo."""
+        if not isinstance(exc, Exception):
+            raise exc
+        logger.error("Error inesperado en el chequeo %s", name, exc_info=exc)
+        return CheckResult(
+            False,
+            f"{type(exc).__name__}: {exc}"[:200],
+            round((time.perf_counter() - started) * 1000, 1),
+        )
+
+    async def _timed(self, check) -> CheckResult:
+        started = time.perf_counter()
+        try:
+            ok, detail = await asyncio.wait_for(check(), self.timeout)
+        except TimeoutError:
+            ok, detail = False, f"sin respuesta en {self.timeout:g}s"
+        except _CHECK_ERRORS as exc:
+            ok, detail = False, f"{type(exc).__name__}: {exc}"[:200]
+        return CheckResult(ok, detail, round((time.perf_counter() - started) * 1000, 1))
+
+    async def _check_database(self) -> tuple[bool, str]:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return True, "ok"
+
+    async def _check_pool(self) -> tuple[bool, str]:
+        pool = self.engine.sync_engine.pool
+        if not isinstance(pool, QueuePool):
+            return True, f"{type(pool).__name__} sin límite de conexiones"
+        checked_out = pool.checkedout()
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        saturation = checked_out / capacity if capacity else 0.0
+        detail = f"{checked_out}/{capacity} conexiones en uso"
+        return saturation < self.settings.health_pool_saturation_threshold, detail
+
+    async def _check_jwks(self) -> tuple[bool, str]:
+        cache = self.jwks_client.jwk_set_cache
+        cached = cache.jwk_set_with_timestamp if cache is not None else None
+        if cached is not None:
+            remaining = cached.get_timestamp() + cache.lifespan - time.monotonic()
+            # Renovar antes de que venza, para que ningún request pague el fetch
+            if remaining > 2 * self.interval:
+                return True, f"en caché, vence en {remaining:.0f}s"
+        key_set = await asyncio.to_thread(self.jwks_client.get_jwk_set, True)
+        return bool(key_set.keys), f"renovado, {len(key_set.keys)} clave(s)"
+
+    async def _check_storage(self) -> tuple[bool, str]:
+        bucket = self.settings.document_upload_bucket
+        url = f"{self.settings.project_url}/storage/v1/bucket/{bucket}"
+        key = self.settings.supabase_service_key
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(
+                url, headers={"Authorization": f"Bearer {key}", "apikey": key}
+            )
+        # Alcanzable aunque responda 4xx; solo un 5xx indica que Storage falla
+        return response.status_code < 500, f"HTTP {response.status_code}"
@@ -0,0 +1,371 @@
+"""Claves de idempotencia (`Idempotency-Key`) para los POST que crean recursos.
+
+Un cliente móvil que reintenta un POST tras un corte de red no sabe si el primer
+intento llegó; sin clave, el reintento crea otra solicitud o, peor, otra
+Signature Request en HelloSign (lenta y facturable). Con `Idempotency-Key`:
+
+1. `IdempotencyStore.claim` reserva `(usuario, clave)` en `idempotency_keys`
+   con una conexión propia en autocommit, para que un duplicado concurrente la
+   vea de inmediato. La reserva guarda la huella del request (método, ruta y
+   cuerpo) y vence a los `IDEMPOTENCY_LEASE` segundos si el proceso muere.
+2. Si la clave ya tiene respuesta, se devuelve esa misma respuesta
+   (`IdempotentReplay`) sin volver a ejecutar el endpoint. Si está en curso, el
+   duplicado espera a que termine, dentro de su deadline; si no alcanza, 409.
+   La misma clave con otro cuerpo o en otra ruta es un error del cliente (400).
+3. `IdempotencyMiddleware` retiene la respuesta y la guarda en la sesión del
+   request antes de dejarla salir: `UnitOfWorkMiddleware` la confirma en el
+   mismo commit que el trabajo, así que no hay respuesta guardada sin trabajo
+   hecho ni trabajo hecho sin respuesta guardada.
+
+Las respuestas con status >= 400 no se guardan: la reserva se libera y el
+cliente puede reintentar con la misma clave. Las claves se conservan
+`IDEMPOTENCY_TTL` segundos.
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from fastapi import Request, Response
+from sqlalchemy import DateTime, Integer, LargeBinary, String, Uuid, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import Settings
+from app.core.deadlines import remaining
+from app.core.errors import ConflictError, ValidationDomainError
+from app.core.metrics import REGISTRY
+from app.core.query_tracking import UNTRACKED
+from app.core.unit_of_work import is_manual, request_session
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+_CLAIM_KEY = "idempotency_claim"
+
+_OUTCOMES = REGISTRY.counter(
+    "idempotency_requests",
+    "Requests con Idempotency-Key según su resultado",
+    ["outcome"],
+)
+
+_COLUMNS = {
+    "user_id": Uuid,
+    "key": String,
+    "fingerprint": String,
+    "now": DateTime(timezone=True),
+    "locked_until": DateTime(timezone=True),
+    "expires_at": DateTime(timezone=True),
+    "status_code": Integer,
+    "content_type": String,
+    "body": LargeBinary,
+}
+
+
+def _statement(sql: str):
+    # Corren dentro del request (varias al reproducir o esperar a un duplicado)
+    # pero no son trabajo del endpoint: no cuentan en su `@query_budget`
+    return (
+        text(sql)
+        .bindparams(
+            *(
+                bindparam(name, type_=type_)
+                for name, type_ in _COLUMNS.items()
+                if f":{name}" in sql
+            )
+        )
+        .execution_options(**{UNTRACKED: True})
+    )
+
+
+_INSERT = _statement(
+    """
+INSERT INTO public.idempotency_keys (user_id, key, fingerprint, locked_until, expires_at)
+VALUES (:user_id, :key, :fingerprint, :locked_until, :expires_at)
+ON CONFLICT (user_id, key) DO NOTHING
+RETURNING key
+"""
+)
+# Toma una clave vencida o una reserva abandonada (el proceso murió)
+_TAKE_OVER = _statement(
+    """
+UPDATE public.idempotency_keys
+SET fingerprint = :fingerprint, status_code = NULL, content_type = NULL,
+    body = NULL, locked_until = :locked_until, expires_at = :expires_at
+WHERE user_id = :user_id AND key = :key
+  AND (expires_at < :now OR (status_code IS NULL AND locked_until < :now))
+RETURNING key
+"""
+)
+_SELECT = _statement(
+    "SELECT fingerprint, status_code, content_type, body FROM public.idempotency_keys "
+    "WHERE user_id = :user_id AND key = :key"
+)
+_COMPLETE = _statement(
+    """
+UPDATE public.idempotency_keys
+SET status_code = :status_code, content_type = :content_type, body = :body,
+    locked_until = NULL
+WHERE user_id = :user_id AND key = :key AND fingerprint = :fingerprint
+"""
+)
+_RELEASE = _statement(
+    "DELETE FROM public.idempotency_keys "
+    "WHERE user_id = :user_id AND key = :key AND fingerprint = :fingerprint "
+    "AND status_code IS NULL"
+)
+_PURGE = _statement("DELETE FROM public.idempotency_keys WHERE expires_at < :now")
+
+
+@dataclass(frozen=True, slots=True)
+class Claim:
+    """Reserva de una clave para el request en curso."""
+
+    user_id: UUID
+    key: str
+    fingerprint: str
+
+    def params(self) -> dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "key": self.key,
+            "fingerprint": self.fingerprint,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    status_code: int
+    content_type: str | None
+    body: bytes
+
+
+class IdempotentReplay(Exception):
+    """La clave ya tiene respuesta: se devuelve la guardada."""
+
+    def __init__(self, stored: StoredResponse) -> None:
+        super().__init__("idempotent replay")
+        self.stored = stored
+
+    def response(self) -> Response:
+        return Response(
+            content=self.stored.body,
+            status_code=self.stored.status_code,
+            media_type=self.stored.content_type,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+def fingerprint(method: str, path: str, body: bytes) -> str:
+    digest = hashlib.sha256(f"{method} {path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+class IdempotencyStore:
+    """Reservas y respuestas en `idempotency_keys`.
+
+    Reservar y liberar usan su propia conexión en autocommit; la respuesta se
+    guarda en la sesión del request (`complete`) para confirmarse con el trabajo.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        ttl: float,
+        lease: float,
+        poll_interval: float = 0.1,
+        purge_interval: float = 300.0,
+    ) -> None:
+        self.engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+        self.ttl = timedelta(seconds=ttl)
+        self.lease = timedelta(seconds=lease)
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self._purged_at = time.monotonic()
+
+    async def claim(self, user_id: UUID, key: str, request_fingerprint: str) -> Claim:
+        """Reserva `key` para este request, esperando si hay un duplicado en curso.
+
+        Raises:
+            IdempotentReplay: La clave ya tiene respuesta
+            ValidationDomainError: La clave se usó con otro request
+            ConflictError: El duplicado en curso no terminó dentro del deadline
+        """
+        claim = Claim(user_id, key, request_fingerprint)
+        delay = self.poll_interval
+        while True:
+            now = _now()
+            params = {
+                **claim.params(),
+                "now": now,
+                "locked_until": now + self.lease,
+                "expires_at": now + self.ttl,
+            }
+            async with self.engine.connect() as conn:
+                await self._maybe_purge(conn, now)
+                if (await conn.execute(_INSERT, params)).first() is not None:
+                    _OUTCOMES.labels("claimed").inc()
+                    return claim
+                if (await conn.execute(_TAKE_OVER, params)).first() is not None:
+                    _OUTCOMES.labels("taken_over").inc()
+                    return claim
+                row = (await conn.execute(_SELECT, params)).first()
+
+            if row is None:
+                # Se liberó entre el INSERT y el SELECT: reintentar la reserva
+                continue
+            stored_fingerprint, status_code, content_type, body = row
+            if stored_fingerprint != request_fingerprint:
+                _OUTCOMES.labels("mismatch").inc()
+                raise ValidationDomainError(f"La {HEADER} ya se usó con otro request")
+            if status_code is not None:
+                _OUTCOMES.labels("replayed").inc()
+                raise IdempotentReplay(
+                    StoredResponse(status_code, content_type, bytes(body))
+                )
+
+            left = remaining()
+            if left is not None and left <= delay:
+                _OUTCOMES.labels("in_progress").inc()
+                raise ConflictError(f"Hay un request en curso con la misma {HEADER}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    async def complete(
+        self, scope: Scope, claim: Claim, stored: StoredResponse
+    ) -> None:
+        """Guarda la respuesta en la sesión del request, antes de su commit."""
+        params = {
+            **claim.params(),
+            "status_code": stored.status_code,
+            "content_type": stored.content_type,
+            "body": stored.body,
+        }
+        session = request_session(scope)
+        if session is None:
+            async with self.engine.connect() as conn:
+                await conn.execute(_COMPLETE, params)
+            return
+        await session.execute(_COMPLETE, params)
+        if is_manual(session):
+            # El flujo confirma por su cuenta: el commit automático no llega
+            await session.commit()
+
+    async def release(self, claim: Claim) -> None:
+        """Libera la reserva para que el cliente pueda reintentar."""
+        async with self.engine.connect() as conn:
+            await conn.execute(_RELEASE, claim.params())
+
+    async def _maybe_purge(self, conn: Any, now: datetime) -> None:
+        if time.monotonic() - self._purged_at > self.purge_interval:
+            self._purged_at = time.monotonic()
+            await conn.execute(_PURGE, {"now": now})
+
+
+def build_idempotency_store(
+    settings: Settings, engine: AsyncEngine
+) -> IdempotencyStore | None:
+    """Crea el store según IDEMPOTENCY_*; None si está desactivado."""
+    if not settings.idempotency_enabled:
+        return None
+    return IdempotencyStore(
+        engine, ttl=settings.idempotency_ttl, lease=settings.idempotency_lease
+    )
+
+
+async def claim_request(request: Request, user_sub: str, key: str) -> None:
+    """Reserva `key` para el request; el middleware guardará su respuesta."""
+    store: IdempotencyStore | None = request.app.state.idempotency
+    if store is None:
+        return
+    request_fingerprint = fingerprint(
+        request.method, request.url.path, await request.body()
+    )
+    claim = await store.claim(UUID(user_sub), key, request_fingerprint)
+    request.scope.setdefault("state", {})[_CLAIM_KEY] = claim
+
+
+class IdempotencyMiddleware:
+    """Guarda la respuesta de los requests con clave reservada.
+
+    Va dentro de `UnitOfWorkMiddleware`: retiene la respuesta completa, la guarda
+    en la sesión del request y recién entonces la deja pasar al commit.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        chunks: list[bytes] = []
+        finished = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, finished
+            claim: Claim | None = scope.get("state", {}).get(_CLAIM_KEY)
+            if claim is None:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            finished = True
+            await self._finish(scope, send, claim, start, b"".join(chunks))
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            claim = scope.get("state", {}).get(_CLAIM_KEY)
+            if claim is not None and not finished:
+                # Excepción o desconexión antes de responder
+                await _store(scope).release(claim)
+
+    async def _finish(
+        self, scope: Scope, send: Send, claim: Claim, start: Message, body: bytes
+    ) -> None:
+        store = _store(scope)
+        status = start["status"]
+        if status < 400:
+            headers = dict(start.get("headers", []))
+            content_type = headers.get(b"content-type")
+            await store.complete(
+                scope,
+                claim,
+                StoredResponse(
+                    status, content_type.decode() if content_type else None, body
+                ),
+            )
+        else:
+            await store.release(claim)
+        try:
+            await send(start)
+        except Exception:
+            # El commit falló: la respuesta guardada se descartó con él
+            await store.release(claim)
+            raise
+        await send({"type": "http.response.body", "body": body})
+
+
+def _store(scope: Scope) -> IdempotencyStore:
+    # Solo hay reservas si el store existe (ver `claim_request`)
+    return scope["app"].state.idempotency
@@ -0,0 +1,246 @@
+# app/core/instrumentation.py
+"""Instrumentación de requests HTTP, consultas SQL e integraciones salientes.
+
+`MetricsMiddleware` mide cada request por plantilla de ruta (`/documents/{document_id}`,
+no la ruta cruda) y abre un `RequestStats` (ver `app.core.query_tracking`) que los
+eventos del engine (`instrument_engine`) van acumulando: así cada request sabe
+cuántas consultas hizo, cuánto tiempo pasó en la BD y si superó su presupuesto.
+"""
+
+import time
+from typing import Any
+
+from jwt import PyJWKClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REGISTRY
+from app.core.query_tracking import (
+    UNTRACKED,
+    check_request_queries,
+    current_request_stats,
+    route_budget,
+    start_tracking,
+    stop_tracking,
+)
+from app.core.slow_queries import SlowQueryLog
+from app.core.tracing import CLIENT, start_span, tracing_enabled
+
+UNMATCHED_ROUTE = "<unmatched>"
+# Métodos fuera de esta lista se agrupan en "OTHER" para acotar las etiquetas
+KNOWN_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE")
+)
+
+_HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests", "Requests HTTP por ruta y código", ["method", "route", "status"]
+)
+_HTTP_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Latencia de los requests HTTP por ruta",
+    ["method", "route"],
+)
+_HTTP_IN_PROGRESS = REGISTRY.gauge(
+    "http_requests_in_progress", "Requests HTTP en curso"
+)
+_HTTP_DB_QUERIES = REGISTRY.histogram(
+    "http_request_db_queries",
+    "Consultas SQL emitidas por request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 50),
+)
+_HTTP_DB_SECONDS = REGISTRY.histogram(
+    "http_request_db_seconds",
+    "Tiempo en la BD por request",
+    ["method", "route"],
+)
+_DB_QUERIES = REGISTRY.counter(
+    "db_queries", "Consultas SQL ejecutadas", ["operation", "outcome"]
+)
+_DB_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds", "Duración de las consultas SQL", ["operation"]
+)
+_DB_POOL = REGISTRY.gauge(
+    "db_pool_connections", "Conexiones del pool por estado", ["state"]
+)
+_OUTBOUND_CALLS = REGISTRY.counter(
+    "outbound_calls", "Llamadas salientes por dependencia", ["dependency", "outcome"]
+)
+_OUTBOUND_DURATION = REGISTRY.histogram(
+    "outbound_call_duration_seconds",
+    "Duración de cada intento de llamada saliente",
+    ["dependency"],
+)
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+class MetricsMiddleware:
+    """Middleware ASGI con latencia, códigos de estado y consultas SQL por ruta.
+
+    Los hijos de cada métrica se resuelven una vez por (método, ruta) y se
+    guardan en `_children`, de modo que el camino caliente solo hace lookups.
+    """
+
+    def __init__(
+        self, app: ASGIApp, *, query_budget: int = 10, repeat_threshold: int = 3
+    ) -> None:
+        self.app = app
+        self.query_budget = query_budget
+        self.repeat_threshold = repeat_threshold
+        self._children: dict[tuple[str, str], tuple[Any, Any, Any, int]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats, token = start_tracking()
+        _HTTP_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _HTTP_IN_PROGRESS.dec()
+            stop_tracking(stats, token)
+            # FastAPI deja la ruta resuelta en el scope; su `path` es la plantilla
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            if method not in KNOWN_METHODS:
+                method = "OTHER"
+            key = (method, template)
+            children = self._children.get(key)
+            if children is None:
+                children = self._children[key] = (
+                    _HTTP_DURATION.labels(method, template),
+                    _HTTP_DB_QUERIES.labels(method, template),
+                    _HTTP_DB_SECONDS.labels(method, template),
+                    route_budget(route, self.query_budget),
+                )
+            duration, db_queries, db_seconds, budget = children
+            duration.observe(elapsed)
+            db_queries.observe(stats.queries)
+            db_seconds.observe(stats.db_time)
+            _HTTP_REQUESTS.labels(method, template, str(status_code)).inc()
+            check_request_queries(
+                stats,
+                method=method,
+                route=template,
+                budget=budget,
+                repeat_threshold=self.repeat_threshold,
+            )
+
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:6].upper()
+    return head if head in _OPERATIONS else "OTHER"
+
+
+def instrument_engine(
+    engine: AsyncEngine, slow_query_log: SlowQueryLog | None = None
+) -> None:
+    """Registra eventos de SQLAlchemy para contar y medir consultas y expone el
+    estado del pool como gauges. Con `slow_query_log`, las sentencias que superan
+    su umbral quedan registradas (y se les captura el plan por muestreo)."""
+    sync_engine = engine.sync_engine
+    children: dict[str, tuple[Any, Any, Any]] = {}
+
+    def _children_for(operation: str) -> tuple[Any, Any, Any]:
+        found = children.get(operation)
+        if found is None:
+            found = children[operation] = (
+                _DB_QUERIES.labels(operation, "ok"),
+                _DB_QUERIES.labels(operation, "error"),
+                _DB_DURATION.labels(operation),
+            )
+        return found
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._trace_span = None
+        if tracing_enabled():
+            operation = _operation(statement)
+            context._trace_span = start_span(
+                f"db {operation}",
+                kind=CLIENT,
+                attributes={
+                    "db.system": "postgresql",
+                    "db.operation": operation,
+                    "db.statement": statement[:500],
+                },
+                root=False,
+            )
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        ok, _, duration = _children_for(_operation(statement))
+        ok.inc()
+        duration.observe(elapsed)
+        stats = current_request_stats()
+        if stats is not None and not context.execution_options.get(UNTRACKED):
+            stats.record(statement, elapsed)
+        if slow_query_log is not None:
+            slow_query_log.observe(statement, parameters, executemany, elapsed)
+        if context._trace_span is not None:
+            context._trace_span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        statement = exception_context.statement or ""
+        _children_for(_operation(statement))[1].inc()
+        stats = current_request_stats()
+        if stats is not None:
+            stats.record(statement, 0.0)
+        context = exception_context.execution_context
+        trace_span = getattr(context, "_trace_span", None)
+        if trace_span is not None:
+            trace_span.record_exception(exception_context.original_exception)
+            trace_span.end()
+
+    if slow_query_log is not None:
+        slow_query_log.bind(engine)
+
+    pool = sync_engine.pool
+    for state, attr in (
+        ("size", "size"),
+        ("checked_out", "checkedout"),
+        ("checked_in", "checkedin"),
+        ("overflow", "overflow"),
+    ):
+        getter = getattr(pool, attr, None)
+        if callable(getter):
+            _DB_POOL.labels(state).set_function(getter)
+
+
+class MeteredPyJWKClient(PyJWKClient):
+    """`PyJWKClient` que registra las descargas del JWKS como llamada saliente."""
+
+    def fetch_data(self) -> Any:
+        trace_span = start_span("jwks fetch", kind=CLIENT)
+        started = time.perf_counter()
+        try:
+            data = super().fetch_data()
+        except Exception as exc:
+            _OUTBOUND_CALLS.labels("jwks", "failure").inc()
+            if trace_span is not None:
+                trace_span.record_exception(exc)
+            raise
+        finally:
+            _OUTBOUND_DURATION.labels("jwks").observe(time.perf_counter() - started)
+            if trace_span is not None:
+                trace_span.end()
+        _OUTBOUND_CALLS.labels("jwks", "success").inc()
+        return data
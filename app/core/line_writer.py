@@ -0,0 +1,102 @@
+# app/core/line_writer.py
+"""Escritura de archivos JSONL fuera del event loop.
+
+Los exportadores locales (trazas, captura de tráfico) producen una línea por
+evento desde el event loop. Abrir el archivo y escribir ahí bloquea el loop
+mientras dure el I/O, y con un lock de por medio serializa a todos los
+requests detrás del disco. `LineWriter` solo encola: un hilo propio vacía la
+cola en lotes, con un `open` por lote.
+
+La cola es acotada. Si el disco no da abasto se descartan líneas (y se avisa
+en el log) en vez de acumular memoria o frenar los requests.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Aviso en el log cada tantas líneas descartadas
+_DROP_LOG_EVERY = 1000
+
+
+class LineWriter:
+    """Agrega texto al final de `path` desde un hilo en segundo plano."""
+
+    def __init__(
+        self, path: str, *, max_pending: int = 10_000, batch_size: int = 512
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: queue.Queue[str | None] = queue.Queue(max_pending)
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        # El hilo es daemon: sin esto se perdería lo encolado al salir
+        atexit.register(self.close)
+
+    def write(self, payload: str) -> None:
+        """Encola `payload` (una o más líneas terminadas en `\\n`). No bloquea."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % _DROP_LOG_EVERY == 1:
+                logger.warning(
+                    "Cola de escritura de %s llena; %d líneas descartadas",
+                    self.path,
+                    self.dropped,
+                )
+
+    def flush(self) -> None:
+        """Espera a que se escriba todo lo encolado hasta ahora."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Escribe lo pendiente y detiene el hilo. Un `write` posterior lo
+        vuelve a arrancar."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("No se pudo vaciar la cola de escritura de %s", self.path)
+            return
+        thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"line-writer:{self.path}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            payloads = [p for p in batch if p is not None]
+            try:
+                if payloads:
+                    with open(self.path, "a", encoding="utf-8") as fh:
+                        fh.write("".join(payloads))
+            except OSError:
+                logger.warning("No se pudo escribir en %s", self.path, exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(payloads) < len(batch):
+                return
@@ -0,0 +1,135 @@
+"""Lecturas independientes en paralelo, cada una en su propia conexión del pool.
+
+Una `AsyncSession` no admite consultas concurrentes, así que las lecturas que no
+dependen entre sí (rol del usuario, empresa y solicitud; conteo y página de un
+listado) se ejecutan una tras otra y la latencia es la suma. `gather_reads`
+reparte esas lecturas en carriles: el primero usa la sesión del request y cada
+uno de los demás, una sesión de corta vida sobre otra conexión del pool. La
+latencia pasa a ser la del carril más lento.
+
+Cada lectura es una función que recibe la sesión en la que debe consultar:
+
+    role, application = await gather_reads(
+        self.session,
+        lambda s: self.assert_role(user.sub, session=s),
+        lambda s: self._repo(self.app_repo, s).get_application_by_id(app_id),
+    )
+
+Para no amplificar la presión sobre el pool, un request usa como máximo
+`DB_PARALLEL_READS` conexiones extra a la vez y solo las que logra reservar sin
+esperar: las conexiones libres del pool menos las ya reservadas por otros
+requests del proceso. Sin conexiones libres, o si la sesión del request ya
+escribió (las otras sesiones no verían esos cambios), todo corre en secuencia en
+la sesión del request. Fuera de un request (`enable` no se llamó) también.
+
+Los objetos leídos en una sesión extra quedan desacoplados al cerrarla: sirven
+para leer sus atributos, no para modificarlos a través de la sesión del request.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import Pool
+
+from app.core.metrics import REGISTRY
+from app.core.unit_of_work import has_writes
+
+Read = Callable[[AsyncSession], Awaitable[Any]]
+
+_LIMIT = "parallel_reads_limit"
+
+_LANES = REGISTRY.histogram(
+    "db_parallel_read_lanes",
+    "Carriles (conexiones) usados por cada gather_reads",
+    buckets=(1, 2, 3, 4, 6, 8),
+)
+
+
+def enable(session: AsyncSession, max_extra_connections: int) -> None:
+    """Permite a `gather_reads` usar hasta `max_extra_connections` conexiones extra."""
+    session.info[_LIMIT] = max_extra_connections
+
+
+# Conexiones libres prometidas a carriles en curso, por pool. Reservar y liberar
+# no pasa por un `await`, así que dos requests del proceso no pueden contar la
+# misma conexión libre. Mientras un carril la usa cuenta dos veces (reservada y
+# no libre): se pierde paralelismo, nunca se espera al pool
+_reserved: WeakKeyDictionary[Pool, int] = WeakKeyDictionary()
+
+
+def _reserve(pool: Pool, wanted: int) -> int:
+    """Reserva hasta `wanted` conexiones libres sin esperar; devuelve cuántas."""
+    # Solo QueuePool informa cuántas conexiones libres tiene
+    checkedin = getattr(pool, "checkedin", None)
+    if checkedin is None or wanted <= 0:
+        return 0
+    reserved = _reserved.get(pool, 0)
+    taken = max(min(wanted, checkedin() - reserved), 0)
+    if taken:
+        _reserved[pool] = reserved + taken
+    return taken
+
+
+def _release(pool: Pool, taken: int) -> None:
+    left = _reserved.get(pool, 0) - taken
+    if left > 0:
+        _reserved[pool] = left
+    else:
+        _reserved.pop(pool, None)
+
+
+async def _run_lane(session: AsyncSession, reads: list[tuple[int, Read]]) -> list:
+    return [(index, await read(session)) for index, read in reads]
+
+
+async def _run_side_lane(session: AsyncSession, reads: list[tuple[int, Read]]) -> list:
+    async with AsyncSession(
+        session.bind,
+        sync_session_class=type(session.sync_session),
+        expire_on_commit=False,
+    ) as side:
+        return await _run_lane(side, reads)
+
+
+async def gather_reads(session: AsyncSession, *reads: Read) -> list[Any]:
+    """Ejecuta `reads` y devuelve sus resultados en el mismo orden.
+
+    Si alguna lectura falla se esperan los demás carriles (la sesión del request
+    no puede quedar con una consulta en curso) y se relanza el error del primer
+    carril que falló.
+    """
+    pool = session.bind.sync_engine.pool
+    wanted = min(session.info.get(_LIMIT, 0), len(reads) - 1)
+    extra = 0 if has_writes(session) else _reserve(pool, wanted)
+    if extra <= 0:
+        _LANES.observe(1)
+        return [await read(session) for read in reads]
+    try:
+        return await _gather(session, reads, extra)
+    finally:
+        _release(pool, extra)
+
+
+async def _gather(session: AsyncSession, reads: tuple[Read, ...], extra: int) -> list:
+    lanes: list[list[tuple[int, Read]]] = [[] for _ in range(extra + 1)]
+    for index, read in enumerate(reads):
+        lanes[index % len(lanes)].append((index, read))
+    _LANES.observe(len(lanes))
+
+    # Cada carril corre en una tarea con una copia del contexto: hereda el
+    # deadline, la traza y el conteo de consultas del request
+    outcomes = await asyncio.gather(
+        _run_lane(session, lanes[0]),
+        *(_run_side_lane(session, lane) for lane in lanes[1:]),
+        return_exceptions=True,
+    )
+    results: list[Any] = [None] * len(reads)
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+        for index, value in outcome:
+            results[index] = value
+    return results
@@ -0,0 +1,200 @@
+# app/core/profiling.py
+"""Perfilado bajo demanda de un worker en producción.
+
+- `SamplingProfiler`: un hilo toma la pila de todos los hilos del proceso cada
+  `interval` segundos (sin instrumentar el código, costo ~proporcional a la
+  frecuencia) y acumula las pilas en formato *folded*
+  (`hilo;modulo:func;modulo:func N`), que aceptan flamegraph.pl, inferno y
+  speedscope.
+- `AllocationTracker`: snapshots de `tracemalloc` agrupados por la ruta cuyo
+  endpoint aparece en la traza de cada asignación, y diferencias entre snapshots.
+
+tracemalloc agrega costo a cada asignación mientras está activo: se inicia con el
+primer snapshot y se detiene explícitamente con `stop()`.
+"""
+
+import inspect
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterable
+from types import CodeType
+
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute
+
+from app.core.errors import ConflictError
+
+# Hoja de la pila de un hilo bloqueado esperando trabajo o E/S
+_IDLE_LEAVES = frozenset(
+    {
+        "threading:Condition.wait",
+        "threading:Event.wait",
+        "queue:Queue.get",
+        "selectors:EpollSelector.select",
+        "selectors:KqueueSelector.select",
+        "selectors:PollSelector.select",
+        "selectors:SelectSelector.select",
+        "concurrent.futures.thread:_worker",
+    }
+)
+UNATTRIBUTED = "<sin ruta>"
+
+
+class SamplingProfiler:
+    """Muestreo de pilas de todos los hilos; un perfil a la vez por proceso."""
+
+    def __init__(self, *, interval: float = 0.005, max_seconds: float = 30.0):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._labels: dict[CodeType, str] = {}
+
+    def _label(self, code: CodeType, module: str) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{module}:{code.co_qualname}"
+        return label
+
+    def profile(self, seconds: float, *, include_idle: bool = False) -> str:
+        """Muestrea durante `seconds` y devuelve las pilas en formato folded.
+
+        Es bloqueante: llamarlo desde un hilo (`asyncio.to_thread`) para que el
+        event loop siga atendiendo requests mientras se lo observa.
+
+        Raises:
+            ConflictError: Si ya hay un perfil en curso en este proceso
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ConflictError("Ya hay un perfil en curso en este proceso")
+        try:
+            counts = self._sample(min(seconds, self.max_seconds), include_idle)
+        finally:
+            self._lock.release()
+        return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+    def _sample(self, seconds: float, include_idle: bool) -> Counter[str]:
+        own = threading.get_ident()
+        counts: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    module = frame.f_globals.get("__name__", "?")
+                    stack.append(self._label(frame.f_code, module))
+                    frame = frame.f_back
+                if not stack or (not include_idle and stack[0] in _IDLE_LEAVES):
+                    continue
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+        return counts
+
+
+class AllocationTracker:
+    """Snapshots de tracemalloc con las asignaciones atribuidas a rutas."""
+
+    def __init__(self, routes: Iterable[BaseRoute], *, frames: int = 25):
+        self.frames = frames
+        self._routes = routes
+        self._endpoints: dict[str, list[tuple[int, int, str]]] | None = None
+        self._previous: dict[tuple[str, str], int] | None = None
+        self._lock = threading.Lock()
+
+    def _endpoint_ranges(self) -> dict[str, list[tuple[int, int, str]]]:
+        """Archivo -> rangos de líneas de cada endpoint y su ruta."""
+        if self._endpoints is None:
+            endpoints: dict[str, list[tuple[int, int, str]]] = {}
+            for route in self._routes:
+                if not isinstance(route, APIRoute):
+                    continue
+                code = inspect.unwrap(route.endpoint).__code__
+                lines = [line for *_, line in code.co_lines() if line is not None]
+                label = f"{','.join(sorted(route.methods))} {route.path}"
+                endpoints.setdefault(code.co_filename, []).append(
+                    (code.co_firstlineno, max(lines, default=0), label)
+                )
+            self._endpoints = endpoints
+        return self._endpoints
+
+    def _route_for(self, traceback: tracemalloc.Traceback) -> str:
+        endpoints = self._endpoint_ranges()
+        # Del frame más reciente al más antiguo: el endpoint más cercano
+        for frame in reversed(traceback):
+            for first, last, label in endpoints.get(frame.filename, ()):
+                if first <= frame.lineno <= last:
+                    return label
+        return UNATTRIBUTED
+
+    def _aggregate(self) -> dict[tuple[str, str], int]:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+        sizes: dict[tuple[str, str], int] = {}
+        for trace in snapshot.traces:
+            site = trace.traceback[-1]
+            key = (self._route_for(trace.traceback), f"{site.filename}:{site.lineno}")
+            sizes[key] = sizes.get(key, 0) + trace.size
+        return sizes
+
+    def snapshot(self, limit: int = 10) -> dict[str, list[tuple[str, int]]]:
+        """Top `limit` sitios de asignación vivos por ruta (bytes).
+
+        Si tracemalloc no estaba activo lo inicia: el primer snapshot solo ve lo
+        asignado desde ese momento. Bloqueante, igual que `profile`.
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            sizes = self._aggregate()
+            self._previous = sizes
+        return _top_by_route(sizes, limit)
+
+    def diff(self, limit: int = 10) -> dict[str, list[tuple[str, int]]]:
+        """Cambio en bytes por sitio y ruta desde el snapshot anterior (que pasa a
+        ser este).
+
+        Raises:
+            ConflictError: Si no hay un snapshot previo con el cual comparar
+        """
+        with self._lock:
+            if self._previous is None or not tracemalloc.is_tracing():
+                raise ConflictError("No hay un snapshot previo con el cual comparar")
+            sizes = self._aggregate()
+            previous, self._previous = self._previous, sizes
+        delta = {
+            key: sizes.get(key, 0) - previous.get(key, 0)
+            for key in sizes.keys() | previous.keys()
+        }
+        return _top_by_route({k: v for k, v in delta.items() if v}, limit)
+
+    def stop(self) -> None:
+        """Detiene tracemalloc y descarta el snapshot guardado."""
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+
+def _top_by_route(
+    sizes: dict[tuple[str, str], int], limit: int
+) -> dict[str, list[tuple[str, int]]]:
+    by_route: dict[str, list[tuple[str, int]]] = {}
+    for (route, site), size in sizes.items():
+        by_route.setdefault(route, []).append((site, size))
+    return {
+        route: sorted(sites, key=lambda s: abs(s[1]), reverse=True)[:limit]
+        for route, sites in sorted(
+            by_route.items(), key=lambda r: -sum(abs(s) for _, s in r[1])
+        )
+    }
@@ -0,0 +1,213 @@
+# app/core/query_tracking.py
+"""Seguimiento de consultas SQL por request: presupuesto y detector de N+1.
+
+Los eventos del engine (`app.core.instrumentation.instrument_engine`) anotan cada
+sentencia en el `RequestStats` activo. Al terminar el request se compara el total
+con el presupuesto de la ruta (`@query_budget(n)` o `SQL_QUERY_BUDGET`) y se
+buscan sentencias idénticas repetidas, típicas de un N+1.
+
+Para pruebas, `assert_max_queries(n)` falla si el bloque o la función decorada
+emite más de `n` consultas:
+
+    async with assert_max_queries(4):
+        await client.get(f"/api/v1/documents/{document_id}")
+"""
+
+import functools
+import logging
+from collections.abc import Callable
+from contextvars import ContextVar, Token
+from typing import Any, TypeVar
+
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Atributo con el que `@query_budget` marca el endpoint
+BUDGET_ATTR = "__query_budget__"
+# Opción de ejecución para sentencias de infraestructura que no cuentan en el
+# presupuesto ni en el detector de N+1 (p. ej. el SET LOCAL del deadline)
+UNTRACKED = "query_tracking_untracked"
+
+_BUDGET_EXCEEDED = REGISTRY.counter(
+    "sql_budget_exceeded",
+    "Requests que superaron su presupuesto de consultas",
+    ["method", "route"],
+)
+_N_PLUS_ONE = REGISTRY.counter(
+    "sql_n_plus_one_suspected",
+    "Requests con una misma sentencia repetida (posible N+1)",
+    ["method", "route"],
+)
+
+
+class RequestStats:
+    """Acumulador de consultas SQL del request (o bloque) en curso."""
+
+    __slots__ = ("db_time", "queries", "statements")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+        # Texto de la sentencia -> veces ejecutada (los parámetros no cuentan)
+        self.statements: dict[str, int] = {}
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def absorb(self, other: "RequestStats") -> None:
+        self.queries += other.queries
+        self.db_time += other.db_time
+        for statement, count in other.statements.items():
+            self.statements[statement] = self.statements.get(statement, 0) + count
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Sentencias ejecutadas al menos `threshold` veces, más repetidas primero."""
+        found = [(s, n) for s, n in self.statements.items() if n >= threshold]
+        return sorted(found, key=lambda item: item[1], reverse=True)
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def current_request_stats() -> RequestStats | None:
+    """Estadísticas del request en curso (None fuera de un request HTTP)."""
+    return _request_stats.get()
+
+
+def start_tracking() -> tuple[RequestStats, Token]:
+    """Abre un acumulador nuevo para el contexto actual."""
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def stop_tracking(stats: RequestStats, token: Token) -> None:
+    """Cierra el acumulador y suma sus consultas al que lo envolvía, si existe."""
+    _request_stats.reset(token)
+    parent = _request_stats.get()
+    if parent is not None:
+        parent.absorb(stats)
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """Declara el número máximo de consultas SQL esperado para un endpoint.
+
+    Se aplica debajo del decorador de la ruta:
+
+        @router.get("/{document_id}")
+        @query_budget(3)
+        async def get_document(...): ...
+    """
+
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, BUDGET_ATTR, max_queries)
+        return endpoint
+
+    return decorator
+
+
+def route_budget(route: Any, default: int) -> int:
+    """Presupuesto declarado por el endpoint de la ruta o el global."""
+    return getattr(getattr(route, "endpoint", None), BUDGET_ATTR, default)
+
+
+def check_request_queries(
+    stats: RequestStats,
+    *,
+    method: str,
+    route: str,
+    budget: int,
+    repeat_threshold: int,
+) -> None:
+    """Registra en logs y métricas los requests fuera de presupuesto o con N+1."""
+    if stats.queries > budget:
+        _BUDGET_EXCEEDED.labels(method, route).inc()
+        logger.warning(
+            "%s %s emitió %d consultas SQL (presupuesto %d, %.1f ms en BD)",
+            method,
+            route,
+            stats.queries,
+            budget,
+            stats.db_time * 1000,
+        )
+    if repeat_threshold > 0 and stats.queries >= repeat_threshold:
+        repeated = stats.repeated(repeat_threshold)
+        if repeated:
+            _N_PLUS_ONE.labels(method, route).inc()
+            statement, count = repeated[0]
+            logger.warning(
+                "Posible N+1 en %s %s: sentencia repetida %d veces: %s",
+                method,
+                route,
+                count,
+                " ".join(statement.split())[:300],
+            )
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Un bloque vigilado por `assert_max_queries` superó su presupuesto."""
+
+
+class assert_max_queries:  # minúsculas: se usa como función/decorador
+    """Context manager y decorador que falla si se emiten más de `max_queries`.
+
+    Con `allow_repeats=False` también falla si alguna sentencia se repite
+    `repeat_threshold` veces o más (N+1).
+    """
+
+    def __init__(
+        self,
+        max_queries: int,
+        *,
+        allow_repeats: bool = True,
+        repeat_threshold: int = 3,
+    ) -> None:
+        self.max_queries = max_queries
+        self.allow_repeats = allow_repeats
+        self.repeat_threshold = repeat_threshold
+        self.stats: RequestStats | None = None
+        self._token: Token | None = None
+
+    async def __aenter__(self) -> RequestStats:
+        self.stats, self._token = start_tracking()
+        return self.stats
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        assert self.stats is not None and self._token is not None
+        stop_tracking(self.stats, self._token)
+        if exc_type is not None:
+            return
+        if self.stats.queries > self.max_queries:
+            raise QueryBudgetExceeded(
+                f"Se emitieron {self.stats.queries} consultas SQL "
+                f"(máximo {self.max_queries}):\n{self._summary()}"
+            )
+        if not self.allow_repeats and self.stats.repeated(self.repeat_threshold):
+            raise QueryBudgetExceeded(
+                f"Sentencias repetidas (posible N+1):\n{self._summary()}"
+            )
+
+    def _summary(self) -> str:
+        assert self.stats is not None
+        return "\n".join(
+            f"  {count}x {' '.join(statement.split())[:200]}"
+            for statement, count in self.stats.repeated(1)
+        )
+
+    def __call__(self, fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            async with assert_max_queries(
+                self.max_queries,
+                allow_repeats=self.allow_repeats,
+                repeat_threshold=self.repeat_threshold,
+            ):
+                return await fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
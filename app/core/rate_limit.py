@@ -0,0 +1,244 @@
+"""Rate limiting por usuario (JWT `sub`) o por IP con token buckets.
+
+Cada clave tiene un balde de `RATE_LIMIT_BURST` tokens que se recarga a
+`RATE_LIMIT_RATE` tokens por segundo. Cada request consume el costo de su ruta:
+1 por defecto, o el que declare el endpoint debajo del decorador de la ruta:
+
+    @router.get("/")
+    @rate_cost(5)
+    async def list_credit_applications(...): ...
+
+Los requests autenticados se limitan por `sub` en `get_current_user`, con el
+token ya verificado (una clave tomada de un JWT sin verificar permitiría vaciar
+el balde de otro usuario). Las rutas públicas sin JWT (metadata) declaran
+`Depends(limit_by_ip)`. El callback de HelloSign queda exento: llega desde
+pocas IPs del proveedor y se autentica con HMAC (`event_hash`).
+
+Las respuestas llevan `RateLimit-Limit`, `RateLimit-Remaining` y
+`RateLimit-Reset`; al agotar el balde, 429 con `Retry-After`. Ningún costo puede
+superar `RATE_LIMIT_BURST`: esos requests no pasarían nunca, así que la app no
+arranca.
+
+El backend `memory` es por proceso: con varios workers cada uno tiene sus
+baldes. `postgres` los comparte en la tabla `rate_limit_buckets`
+(db/migrations/0003_rate_limit_buckets.sql) con un upsert atómico por request.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, Protocol, TypeVar
+
+from fastapi import Request, Response
+from sqlalchemy import Float, String, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import Settings
+from app.core.errors import RateLimitedError
+from app.core.metrics import REGISTRY
+from app.core.query_tracking import UNTRACKED
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Atributo con el que `@rate_cost` marca el endpoint
+COST_ATTR = "__rate_limit_cost__"
+
+_LIMITED = REGISTRY.counter(
+    "rate_limited", "Requests rechazados por rate limiting", ["scope"]
+)
+
+
+@dataclass(frozen=True, slots=True)
+class BucketState:
+    allowed: bool
+    # Tokens que quedan tras este request (sin descontar si fue rechazado)
+    tokens: float
+
+
+class RateLimitBackend(Protocol):
+    async def consume(
+        self, key: str, cost: float, *, rate: float, burst: float
+    ) -> BucketState: ...
+
+
+class MemoryBackend:
+    """Baldes en memoria del proceso; descarta los menos usados por encima de
+    `max_keys` (un balde olvidado equivale a uno lleno)."""
+
+    def __init__(self, *, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def consume(
+        self, key: str, cost: float, *, rate: float, burst: float
+    ) -> BucketState:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return BucketState(allowed, tokens)
+
+
+# Recarga, consumo y decisión en una sola sentencia atómica por clave. Como el
+# resto de la infraestructura por request, no cuenta en `@query_budget`
+_CONSUME = (
+    text(
+        """
+INSERT INTO public.rate_limit_buckets AS b (key, tokens, allowed, updated_at)
+VALUES (
+  :key,
+  CASE WHEN :burst >= :cost THEN :burst - :cost ELSE :burst END,
+  :burst >= :cost,
+  clock_timestamp()
+)
+ON CONFLICT (key) DO UPDATE SET
+  tokens = CASE
+    WHEN LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= :cost
+    THEN LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) - :cost
+    ELSE LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate)
+  END,
+  allowed = LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= :cost,
+  updated_at = clock_timestamp()
+RETURNING allowed, tokens
+"""
+    )
+    .bindparams(
+        # Tipados para que asyncpg no los infiera como texto
+        bindparam("key", type_=String),
+        bindparam("cost", type_=Float),
+        bindparam("rate", type_=Float),
+        bindparam("burst", type_=Float),
+    )
+    .execution_options(**{UNTRACKED: True})
+)
+_PURGE = (
+    text(
+        "DELETE FROM public.rate_limit_buckets "
+        "WHERE updated_at < clock_timestamp() - make_interval(secs => :idle)"
+    )
+    .bindparams(bindparam("idle", type_=Float))
+    .execution_options(**{UNTRACKED: True})
+)
+
+
+class PostgresBackend:
+    """Baldes compartidos entre workers en una tabla UNLOGGED.
+
+    Usa su propia conexión en autocommit, fuera de la sesión del request. Cada
+    `purge_interval` segundos borra los baldes que ya se habrían llenado solos.
+    """
+
+    def __init__(self, engine: AsyncEngine, *, purge_interval: float = 60.0) -> None:
+        self.engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+        self.purge_interval = purge_interval
+        self._purged_at = time.monotonic()
+
+    async def consume(
+        self, key: str, cost: float, *, rate: float, burst: float
+    ) -> BucketState:
+        params = {"key": key, "cost": cost, "rate": rate, "burst": burst}
+        async with self.engine.connect() as conn:
+            allowed, tokens = (await conn.execute(_CONSUME, params)).one()
+            now = time.monotonic()
+            if now - self._purged_at > self.purge_interval:
+                self._purged_at = now
+                await conn.execute(_PURGE, {"idle": burst / rate})
+        return BucketState(allowed, float(tokens))
+
+
+def rate_cost(cost: float) -> Callable[[F], F]:
+    """Declara cuántos tokens consume un request a este endpoint."""
+
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, COST_ATTR, cost)
+        return endpoint
+
+    return decorator
+
+
+def route_cost(route: Any) -> float:
+    """Costo declarado por el endpoint de la ruta (1 por defecto)."""
+    return getattr(getattr(route, "endpoint", None), COST_ATTR, 1.0)
+
+
+class RateLimiter:
+    """Aplica los baldes de `backend` y escribe los headers de rate limit."""
+
+    def __init__(self, backend: RateLimitBackend, *, rate: float, burst: float):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+
+    async def check(self, request: Request, response: Response, key: str) -> None:
+        """Consume el costo de la ruta del balde de `key`.
+
+        Raises:
+            RateLimitedError: El balde no tiene tokens suficientes
+        """
+        cost = route_cost(request.scope.get("route"))
+        state = await self.backend.consume(key, cost, rate=self.rate, burst=self.burst)
+        headers = {
+            "RateLimit-Limit": str(int(self.burst)),
+            "RateLimit-Remaining": str(int(state.tokens)),
+            # Segundos hasta que el balde vuelva a estar lleno
+            "RateLimit-Reset": str(math.ceil((self.burst - state.tokens) / self.rate)),
+        }
+        if not state.allowed:
+            _LIMITED.labels(key.split(":", 1)[0]).inc()
+            raise RateLimitedError(
+                "Demasiados requests, reintentar más tarde",
+                retry_after=(cost - state.tokens) / self.rate,
+                headers=headers,
+            )
+        response.headers.update(headers)
+
+
+def build_rate_limiter(
+    settings: Settings, engine: AsyncEngine, routes: Iterable[Any] = ()
+) -> RateLimiter | None:
+    """Crea el limitador según RATE_LIMIT_*; None si está desactivado.
+
+    Raises:
+        ValueError: Alguna de `routes` cuesta más que `RATE_LIMIT_BURST`
+    """
+    if not settings.rate_limit_enabled:
+        return None
+    too_costly = sorted(
+        f"{route.path} ({route_cost(route):g})"
+        for route in routes
+        if route_cost(route) > settings.rate_limit_burst
+    )
+    if too_costly:
+        raise ValueError(
+            f"RATE_LIMIT_BURST={settings.rate_limit_burst:g} es menor que el costo "
+            f"de {', '.join(too_costly)}: esos requests recibirían siempre 429"
+        )
+    backend: RateLimitBackend
+    if settings.rate_limit_backend == "postgres":
+        backend = PostgresBackend(engine)
+    else:
+        backend = MemoryBackend()
+    return RateLimiter(
+        backend, rate=settings.rate_limit_rate, burst=settings.rate_limit_burst
+    )
+
+
+async def limit_by_user(request: Request, response: Response, sub: str) -> None:
+    limiter: RateLimiter | None = request.app.state.rate_limiter
+    if limiter is not None:
+        await limiter.check(request, response, f"user:{sub}")
+
+
+async def limit_by_ip(request: Request, response: Response) -> None:
+    """Dependencia para rutas sin JWT: limita por IP del cliente."""
+    limiter: RateLimiter | None = request.app.state.rate_limiter
+    if limiter is not None:
+        client = request.client.host if request.client else "unknown"
+        await limiter.check(request, response, f"ip:{client}")
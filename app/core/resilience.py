@@ -0,0 +1,356 @@
+# app/core/resilience.py
+"""Política para llamadas salientes (Supabase Storage, HelloSign).
+
+Cada dependencia tiene su propia `OutboundPolicy` con timeout, límite de
+concurrencia (bulkhead) y circuit breaker; todas comparten un `RetryBudget`
+global para que los reintentos no multipliquen la carga cuando un proveedor
+está degradado. Dentro de un request, el timeout de cada intento y los
+reintentos se acotan a lo que le queda a su deadline (app/core/deadlines.py).
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from enum import IntEnum
+from typing import TypeVar
+
+import httpx
+
+from app.config import Settings
+from app.core.deadlines import exceeded, remaining
+from app.core.errors import ServiceUnavailableError, UpstreamTimeoutError
+from app.core.metrics import REGISTRY
+from app.core.tracing import CLIENT, start_span, use_span
+
+T = TypeVar("T")
+
+STORAGE = "storage"
+HELLOSIGN = "hellosign"
+
+_CALLS = REGISTRY.counter(
+    "outbound_calls", "Llamadas salientes por dependencia", ["dependency", "outcome"]
+)
+_RETRIES = REGISTRY.counter(
+    "outbound_retries", "Reintentos de llamadas salientes", ["dependency"]
+)
+_DURATION = REGISTRY.histogram(
+    "outbound_call_duration_seconds",
+    "Duración de cada intento de llamada saliente",
+    ["dependency"],
+)
+_CIRCUIT_STATE = REGISTRY.gauge(
+    "outbound_circuit_state",
+    "Estado del circuit breaker (0=closed, 1=half_open, 2=open)",
+    ["dependency"],
+)
+_IN_FLIGHT = REGISTRY.gauge(
+    "outbound_in_flight", "Llamadas salientes en curso", ["dependency"]
+)
+_RETRY_BUDGET = REGISTRY.gauge(
+    "outbound_retry_budget_tokens", "Reintentos disponibles en el presupuesto global"
+)
+
+
+class CircuitState(IntEnum):
+    closed = 0
+    half_open = 1
+    open = 2
+
+
+class CircuitBreaker:
+    """Abre el circuito tras `failure_threshold` fallos consecutivos.
+
+    Pasado `reset_timeout` deja pasar `half_open_max_calls` llamadas de prueba:
+    si tienen éxito se cierra, si fallan vuelve a abrirse. Una prueba que
+    termina sin resultado (cancelada) devuelve su cupo con `release`.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitState.closed
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    def allow(self) -> bool:
+        if self.state == CircuitState.open:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.half_open
+            self._probes = 0
+        if self.state == CircuitState.half_open:
+            if self._probes >= self.half_open_max_calls:
+                return False
+            self._probes += 1
+        return True
+
+    def release(self) -> None:
+        """Devuelve el cupo de una llamada de prueba que no registró resultado."""
+        if self.state == CircuitState.half_open and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self) -> None:
+        self.state = CircuitState.closed
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if (
+            self.state == CircuitState.half_open
+            or self._failures >= self.failure_threshold
+        ):
+            self.state = CircuitState.open
+            self._opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        if self.state != CircuitState.open:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+
+class RetryBudget:
+    """Limita los reintentos a una fracción (`ratio`) de las llamadas.
+
+    Cada llamada deposita `ratio` tokens y cada reintento consume uno; el saldo
+    arranca en `min_tokens` para permitir reintentos con poco tráfico.
+    """
+
+    def __init__(self, *, ratio: float = 0.1, min_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max(min_tokens, 1.0) * 10
+        self.tokens = min_tokens
+        _RETRY_BUDGET.set_function(lambda: self.tokens)
+
+    def deposit(self) -> None:
+        self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Errores que justifican reintentar y cuentan como fallo del proveedor."""
+    if isinstance(exc, (TimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+    else:
+        # dropbox_sign.ApiException expone `status`
+        status = getattr(exc, "status", None)
+    return isinstance(status, int) and (status >= 500 or status == 429)
+
+
+class OutboundPolicy:
+    """Timeout, reintentos con jitter, circuit breaker y bulkhead para una dependencia."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        timeout: float,
+        max_concurrency: int,
+        breaker: CircuitBreaker,
+        budget: RetryBudget,
+        max_retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        acquire_timeout: float = 0.5,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = breaker
+        self.budget = budget
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self._bulkhead = asyncio.Semaphore(max_concurrency)
+        self._success = _CALLS.labels(name, "success")
+        self._failure = _CALLS.labels(name, "failure")
+        self._timeout = _CALLS.labels(name, "timeout")
+        self._rejected = _CALLS.labels(name, "rejected")
+        self._retries = _RETRIES.labels(name)
+        self._duration = _DURATION.labels(name)
+        self._in_flight = _IN_FLIGHT.labels(name)
+        _CIRCUIT_STATE.labels(name).set_function(lambda: self.breaker.state)
+
+    async def call(self, fn: Callable[[], Awaitable[T]], *, retry: bool = True) -> T:
+        """Ejecuta `fn` bajo la política.
+
+        Args:
+            fn: Corrutina sin argumentos que realiza la llamada
+            retry: False para operaciones no idempotentes (p. ej. crear una firma)
+
+        Raises:
+            ServiceUnavailableError: Circuito abierto, bulkhead lleno o fallos
+                transitorios tras agotar los reintentos
+            UpstreamTimeoutError: El último intento superó el timeout
+            DeadlineExceededError: Se agotó el deadline del request en curso
+        """
+        left = remaining()
+        if left is not None and left <= 0:
+            raise exceeded(
+                self.name, f"El request agotó su plazo antes de llamar a {self.name}"
+            )
+        acquire_timeout = (
+            self.acquire_timeout if left is None else min(self.acquire_timeout, left)
+        )
+        try:
+            await asyncio.wait_for(self._bulkhead.acquire(), acquire_timeout)
+        except TimeoutError:
+            self._rejected.inc()
+            raise ServiceUnavailableError(
+                f"Demasiadas llamadas en curso a {self.name}", retry_after=1.0
+            ) from None
+        # El breaker se consulta con el slot ya reservado para no gastar una
+        # llamada de prueba (half-open) que luego el bulkhead rechace
+        if not self.breaker.allow():
+            self._bulkhead.release()
+            self._rejected.inc()
+            raise ServiceUnavailableError(
+                f"{self.name} no disponible temporalmente",
+                retry_after=self.breaker.retry_after(),
+            )
+        # Esta llamada ocupa un cupo de prueba hasta registrar su resultado
+        probe = self.breaker.state == CircuitState.half_open
+        settled = False
+
+        self.budget.deposit()
+        self._in_flight.inc()
+        try:
+            attempt = 0
+            while True:
+                left = remaining()
+                if left is not None and left <= 0:
+                    raise exceeded(
+                        self.name, f"El request agotó su plazo esperando a {self.name}"
+                    )
+                timeout = self.timeout if left is None else min(self.timeout, left)
+                trace_span = start_span(
+                    self.name,
+                    kind=CLIENT,
+                    attributes={"peer.service": self.name, "retry.attempt": attempt},
+                )
+                started = time.perf_counter()
+                try:
+                    # Activo durante la llamada para que `inject` propague este span
+                    with use_span(trace_span):
+                        result = await asyncio.wait_for(fn(), timeout)
+                except Exception as exc:
+                    self._duration.observe(time.perf_counter() - started)
+                    if trace_span is not None:
+                        trace_span.record_exception(exc)
+                        trace_span.end()
+                    if isinstance(exc, TimeoutError) and timeout < self.timeout:
+                        # Lo cortó el deadline del request: no es culpa del
+                        # proveedor ni tiene sentido reintentar. No cuenta como
+                        # éxito ni fallo: si era la prueba, `finally` la libera
+                        self._timeout.inc()
+                        raise exceeded(
+                            self.name,
+                            f"{self.name} no respondió dentro del plazo del request",
+                        ) from exc
+                    if not is_transient_error(exc):
+                        # Errores de cliente (4xx): el proveedor respondió, así
+                        # que cuenta como sano para el circuit breaker
+                        self.breaker.record_success()
+                        settled = True
+                        self._failure.inc()
+                        raise
+                    self.breaker.record_failure()
+                    settled = True
+                    delay = self._backoff(attempt + 1)
+                    left = remaining()
+                    can_retry = (
+                        retry
+                        and attempt < self.max_retries
+                        and self.breaker.state != CircuitState.open
+                        # Sin tiempo para esperar y volver a intentar
+                        and (left is None or delay < left)
+                        and self.budget.withdraw()
+                    )
+                    if not can_retry:
+                        if isinstance(exc, TimeoutError):
+                            self._timeout.inc()
+                            raise UpstreamTimeoutError(
+                                f"{self.name} no respondió en {self.timeout}s"
+                            ) from exc
+                        self._failure.inc()
+                        raise ServiceUnavailableError(
+                            f"{self.name} no disponible: {exc}",
+                            retry_after=self.breaker.retry_after() or None,
+                        ) from exc
+                    attempt += 1
+                    self._retries.inc()
+                    await asyncio.sleep(delay)
+                    continue
+                self._duration.observe(time.perf_counter() - started)
+                if trace_span is not None:
+                    trace_span.end()
+                self.breaker.record_success()
+                settled = True
+                self._success.inc()
+                return result
+        finally:
+            if probe and not settled:
+                # Cancelada (p. ej. el cliente se desconectó): sin liberar el
+                # cupo, el breaker quedaría en half-open rechazando todo
+                self.breaker.release()
+            self._in_flight.dec()
+            self._bulkhead.release()
+
+    async def call_sync(self, fn: Callable[[], T], *, retry: bool = True) -> T:
+        """Como `call`, para clientes bloqueantes (SDK de HelloSign) en un hilo.
+
+        Si se cancela, el hilo termina igual pero la llamada no cuenta para el
+        breaker: el cupo de prueba se libera como en `call`.
+        """
+        return await self.call(lambda: asyncio.to_thread(fn), retry=retry)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniforme entre 0 y el backoff exponencial
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        )
+
+
+def build_outbound_policies(settings: Settings) -> dict[str, OutboundPolicy]:
+    """Crea las políticas por dependencia compartiendo un presupuesto de reintentos."""
+    budget = RetryBudget(ratio=settings.outbound_retry_budget_ratio)
+
+    def breaker() -> CircuitBreaker:
+        return CircuitBreaker(
+            failure_threshold=settings.outbound_breaker_failure_threshold,
+            reset_timeout=settings.outbound_breaker_reset_timeout,
+        )
+
+    return {
+        STORAGE: OutboundPolicy(
+            STORAGE,
+            timeout=settings.storage_timeout,
+            max_concurrency=settings.storage_max_concurrency,
+            max_retries=settings.outbound_max_retries,
+            breaker=breaker(),
+            budget=budget,
+        ),
+        HELLOSIGN: OutboundPolicy(
+            HELLOSIGN,
+            timeout=settings.hellosign_timeout,
+            max_concurrency=settings.hellosign_max_concurrency,
+            max_retries=settings.outbound_max_retries,
+            breaker=breaker(),
+            budget=budget,
+        ),
+    }
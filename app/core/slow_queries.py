@@ -0,0 +1,179 @@
+# app/core/slow_queries.py
+"""Registro de consultas lentas con captura de planes por muestreo.
+
+`instrument_engine` entrega a `SlowQueryLog.observe` cada sentencia que supera el
+umbral. Se guarda la SQL normalizada, la forma de los parámetros (tipos, nunca
+valores), el método del repositorio que la originó y la duración en un buffer
+circular acotado. Para una fracción de ellas se pide en segundo plano
+`EXPLAIN (ANALYZE false, FORMAT JSON)` en otra conexión del pool, de modo que la
+request que disparó la captura no espera al plan.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import sys
+from collections import deque
+from contextvars import Context
+from datetime import UTC, datetime
+from typing import Any
+
+import greenlet
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_SLOW_QUERIES = REGISTRY.counter(
+    "db_slow_queries", "Consultas que superaron el umbral de lentitud", ["caller"]
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+# IN con muchos parámetros (expanding) -> una sola forma por consulta
+_IN_LIST = re.compile(r"\bIN \((?:\$\d+(?:::[\w\[\]]+)?(?:, )?)+\)", re.IGNORECASE)
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL en una línea con literales e IN expandidos reemplazados."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+def parameters_shape(parameters: Any, executemany: bool = False) -> str:
+    """Describe los parámetros por tipo, sin exponer valores."""
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)} x {parameters_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return (
+            "{"
+            + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items())
+            + "}"
+        )
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+def find_caller(prefix: str = "app.repositories.") -> str | None:
+    """Primer método de un módulo de `prefix` en la pila.
+
+    Los eventos del engine corren en el greenlet de SQLAlchemy; la pila del código
+    async que hizo la consulta está en el greenlet padre.
+    """
+    frame = sys._getframe(1)
+    current = greenlet.getcurrent()
+    while frame is not None:
+        if frame.f_globals.get("__name__", "").startswith(prefix):
+            return frame.f_code.co_qualname
+        frame = frame.f_back
+        if frame is None and current.parent is not None:
+            current = current.parent
+            frame = current.gr_frame
+    return None
+
+
+class SlowQuery:
+    __slots__ = (
+        "caller",
+        "duration_ms",
+        "occurred_at",
+        "parameters",
+        "plan",
+        "plan_error",
+        "statement",
+    )
+
+    def __init__(
+        self, statement: str, parameters: str, caller: str | None, duration_ms: float
+    ) -> None:
+        self.statement = statement
+        self.parameters = parameters
+        self.caller = caller
+        self.duration_ms = duration_ms
+        self.occurred_at = datetime.now(UTC)
+        self.plan: Any = None
+        self.plan_error: str | None = None
+
+
+class SlowQueryLog:
+    """Buffer circular de consultas lentas (las más antiguas se descartan)."""
+
+    def __init__(
+        self,
+        *,
+        threshold_ms: float,
+        explain_sample_rate: float = 0.0,
+        capacity: int = 200,
+    ) -> None:
+        self.threshold = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.entries: deque[SlowQuery] = deque(maxlen=capacity)
+        self._engine: AsyncEngine | None = None
+        self._explaining: asyncio.Task | None = None
+
+    def bind(self, engine: AsyncEngine) -> None:
+        """Engine con el que se ejecutan los EXPLAIN (en conexiones propias)."""
+        self._engine = engine
+
+    def observe(
+        self, statement: str, parameters: Any, executemany: bool, elapsed: float
+    ) -> None:
+        if elapsed < self.threshold or statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        caller = find_caller()
+        entry = SlowQuery(
+            normalize_sql(statement),
+            parameters_shape(parameters, executemany),
+            caller,
+            round(elapsed * 1000, 3),
+        )
+        self.entries.append(entry)
+        _SLOW_QUERIES.labels(caller or "unknown").inc()
+        logger.warning(
+            "Consulta lenta (%.1f ms) desde %s: %s",
+            entry.duration_ms,
+            caller or "?",
+            entry.statement[:300],
+        )
+        if (
+            self._engine is not None
+            and not executemany
+            and statement.lstrip()[:6].upper() in _EXPLAINABLE
+            and random.random() < self.explain_sample_rate
+            and (self._explaining is None or self._explaining.done())
+        ):
+            # Un EXPLAIN a la vez: bajo carga no se suman conexiones al pool. En
+            # un contexto vacío, para que no cuente en las consultas, el deadline
+            # ni la traza del request que lo disparó
+            self._explaining = asyncio.get_running_loop().create_task(
+                self._explain(entry, statement, parameters), context=Context()
+            )
+
+    async def _explain(self, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        assert self._engine is not None
+        try:
+            async with self._engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE false, FORMAT JSON) {statement}", parameters
+                )
+                plan = result.scalar()
+                await conn.rollback()
+            entry.plan = plan
+        except (SQLAlchemyError, OSError) as exc:
+            # Pool agotado, sentencia que Postgres no acepta en EXPLAIN o BD caída
+            entry.plan_error = (str(exc) or type(exc).__name__).splitlines()[0][:300]
+
+    def recent(self, limit: int = 50) -> list[SlowQuery]:
+        """Consultas lentas más recientes primero."""
+        return list(reversed(self.entries))[:limit]
+
+    def clear(self) -> None:
+        self.entries.clear()
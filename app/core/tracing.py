@@ -0,0 +1,415 @@
+# app/core/tracing.py
+"""Trazas compatibles con OpenTelemetry, exportadas localmente.
+
+Modelo mínimo de spans con los mismos identificadores y campos que OTel
+(trace id de 128 bits, span id de 64, `kind`, atributos, estado), propagación
+W3C `traceparent` de entrada y salida, muestreo por proporción basado en el
+trace id (los hijos heredan la decisión del padre) y dos exportadores sin red:
+
+- `console`: al terminar cada request escribe en stderr el árbol de spans con
+  su duración, para ver de un vistazo si el tiempo se fue en la BD, Storage o
+  HelloSign.
+- `file`: una línea JSON por span con los nombres de campo de OTLP/JSON
+  (`traceId`, `spanId`, `startTimeUnixNano`...), apta para importarse después.
+  La escritura va en lotes desde un hilo aparte (ver `app/core/line_writer.py`).
+
+Con el tracing desactivado `span()`/`start_span()` devuelven sin asignar nada.
+"""
+
+import functools
+import json
+import logging
+import random
+import re
+import sys
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.line_writer import LineWriter
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+INTERNAL = "internal"
+SERVER = "server"
+CLIENT = "client"
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_ZERO_TRACE = "0" * 32
+
+
+class SpanExporter:
+    """Recibe todos los spans de una traza local cuando termina su raíz."""
+
+    def export(self, spans: Sequence["Span"]) -> None:
+        raise NotImplementedError
+
+
+class _Trace:
+    """Spans terminados de una misma traza dentro de este proceso."""
+
+    __slots__ = ("exporter", "root", "spans")
+
+    def __init__(self, exporter: SpanExporter) -> None:
+        self.root: Span | None = None
+        self.spans: list[Span] = []
+        self.exporter = exporter
+
+    def finish(self, span: "Span") -> None:
+        self.spans.append(span)
+        if span is self.root:
+            try:
+                self.exporter.export(self.spans)
+            except Exception:
+                logger.exception("Error exportando la traza %s", span.trace_id)
+
+
+class Span:
+    __slots__ = (
+        "_trace",
+        "attributes",
+        "end_ns",
+        "kind",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_ns",
+        "status",
+        "status_message",
+        "trace_id",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        trace_id: str,
+        parent_id: str | None,
+        trace: _Trace,
+        attributes: dict[str, Any] | None,
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes if attributes is not None else {}
+        self.status = "UNSET"
+        self.status_message = ""
+        self._trace = trace
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.status_message = str(exc)[:200]
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def end(self) -> None:
+        if self.end_ns:
+            return
+        self.end_ns = time.time_ns()
+        self._trace.finish(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+class _RemoteParent:
+    """Contexto recibido en `traceparent` (o decisión de no muestrear)."""
+
+    __slots__ = ("sampled", "span_id", "trace_id")
+
+    def __init__(self, trace_id: str, span_id: str | None, sampled: bool) -> None:
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+
+class Tracer:
+    def __init__(self, exporter: SpanExporter, sample_ratio: float = 1.0) -> None:
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self._threshold = int(max(min(sample_ratio, 1.0), 0.0) * (1 << 64))
+
+    def should_sample(self, trace_id: str) -> bool:
+        # Decisión determinista por trace id: todos los procesos coinciden
+        return int(trace_id[16:], 16) < self._threshold
+
+
+_tracer: Tracer | None = None
+_current: ContextVar[Span | _RemoteParent | None] = ContextVar(
+    "current_span", default=None
+)
+
+
+def configure_tracing(tracer: Tracer | None) -> None:
+    """Activa (o desactiva con None) el tracing del proceso."""
+    global _tracer
+    _tracer = tracer
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def current_span() -> Span | None:
+    parent = _current.get()
+    return parent if isinstance(parent, Span) else None
+
+
+def start_span(
+    name: str,
+    *,
+    kind: str = INTERNAL,
+    attributes: dict[str, Any] | None = None,
+    root: bool = True,
+) -> Span | None:
+    """Crea un span hijo del actual sin volverlo el span activo.
+
+    Devuelve None si el tracing está desactivado, la traza no se muestrea o no
+    hay span activo y `root=False` (p. ej. SQL fuera de un request). El llamador
+    debe invocar `end()`.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return None
+    parent = _current.get()
+    if isinstance(parent, Span):
+        return Span(
+            name, kind, parent.trace_id, parent.span_id, parent._trace, attributes
+        )
+    if isinstance(parent, _RemoteParent):
+        if not parent.sampled:
+            return None
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    elif not root:
+        return None
+    else:
+        trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+        if not tracer.should_sample(trace_id):
+            return None
+    trace = _Trace(tracer.exporter)
+    span = Span(name, kind, trace_id, parent_id, trace, attributes)
+    trace.root = span
+    return span
+
+
+@contextmanager
+def span(
+    name: str, *, kind: str = INTERNAL, attributes: dict[str, Any] | None = None
+) -> Iterator[Span | None]:
+    """Context manager que abre un span y lo deja activo para sus hijos."""
+    if _tracer is None:
+        yield None
+        return
+    current = start_span(name, kind=kind, attributes=attributes)
+    if current is None:
+        yield None
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.record_exception(exc)
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+@contextmanager
+def use_span(current: Span | None) -> Iterator[None]:
+    """Deja `current` como span activo (sin terminarlo) mientras dura el bloque."""
+    if current is None:
+        yield
+        return
+    token = _current.set(current)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    """Decorador para corrutinas: cada llamada queda dentro de un span."""
+
+    def decorator(fn: F) -> F:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer is None:
+                return await fn(*args, **kwargs)
+            with span(span_name):
+                return await fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def inject(headers: dict[str, str]) -> dict[str, str]:
+    """Agrega `traceparent` a los headers de una llamada saliente."""
+    current = current_span()
+    if current is not None:
+        headers["traceparent"] = current.traceparent
+    return headers
+
+
+def _extract(scope: Scope) -> _RemoteParent | None:
+    for key, value in scope["headers"]:
+        if key == b"traceparent":
+            match = _TRACEPARENT.match(value.decode("latin-1").strip())
+            if match and match.group(1) != _ZERO_TRACE:
+                trace_id, span_id, flags = match.groups()
+                return _RemoteParent(trace_id, span_id, int(flags, 16) & 1 == 1)
+            return None
+    return None
+
+
+class TracingMiddleware:
+    """Abre el span de servidor de cada request HTTP, continuando el
+    `traceparent` entrante, y devuelve el propio en la respuesta."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        remote = _extract(scope)
+        outer = _current.set(remote)
+        server = start_span(
+            f"{scope['method']} {scope['path']}",
+            kind=SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        if server is None:
+            # Traza no muestreada: los hijos heredan la decisión
+            trace_id = remote.trace_id if remote else _ZERO_TRACE
+            _current.set(_RemoteParent(trace_id, None, False))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current.reset(outer)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                server.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    server.status = "ERROR"
+                headers = list(message.get("headers", []))
+                headers.append((b"traceparent", server.traceparent.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        _current.set(server)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            server.record_exception(exc)
+            raise
+        finally:
+            _current.reset(outer)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                server.name = f"{scope['method']} {route}"
+                server.set_attribute("http.route", route)
+            server.end()
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Escribe en stderr el árbol de spans de cada traza con sus duraciones."""
+
+    def export(self, spans: Sequence[Span]) -> None:
+        children: dict[str | None, list[Span]] = {}
+        ids = {s.span_id for s in spans}
+        for s in spans:
+            parent = s.parent_id if s.parent_id in ids else None
+            children.setdefault(parent, []).append(s)
+        lines: list[str] = []
+
+        def walk(parent: str | None, depth: int) -> None:
+            for s in sorted(children.get(parent, []), key=lambda x: x.start_ns):
+                flag = " !" if s.status == "ERROR" else ""
+                lines.append(f"{'  ' * depth}{s.name} {s.duration_ms:.1f} ms{flag}")
+                walk(s.span_id, depth + 1)
+
+        walk(None, 1)
+        print(f"trace {spans[-1].trace_id}\n" + "\n".join(lines), file=sys.stderr)
+
+
+_OTLP_KINDS = {
+    INTERNAL: "SPAN_KIND_INTERNAL",
+    SERVER: "SPAN_KIND_SERVER",
+    CLIENT: "SPAN_KIND_CLIENT",
+}
+_OTLP_STATUS = {"UNSET": 0, "OK": 1, "ERROR": 2}
+
+
+class FileSpanExporter(SpanExporter):
+    """Escribe una línea JSON por span con los nombres de campo de OTLP/JSON."""
+
+    def __init__(self, path: str, service_name: str = "api-creditos-pymes") -> None:
+        self.path = path
+        self.service_name = service_name
+        # El archivo se escribe en lotes desde otro hilo, fuera del event loop
+        self.writer = LineWriter(path)
+
+    def export(self, spans: Sequence[Span]) -> None:
+        self.writer.write("".join(json.dumps(self._to_otlp(s)) + "\n" for s in spans))
+
+    def _to_otlp(self, s: Span) -> dict[str, Any]:
+        return {
+            "resource": {"service.name": self.service_name},
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id or "",
+            "name": s.name,
+            "kind": _OTLP_KINDS.get(s.kind, "SPAN_KIND_INTERNAL"),
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [
+                {"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()
+            ],
+            "status": {"code": _OTLP_STATUS[s.status], "message": s.status_message},
+        }
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def build_tracer(
+    exporter: str, *, sample_ratio: float = 1.0, file_path: str = "traces.jsonl"
+) -> Tracer:
+    """Crea el tracer con el exportador configurado (`console` o `file`)."""
+    if exporter == "file":
+        return Tracer(FileSpanExporter(file_path), sample_ratio)
+    if exporter == "console":
+        return Tracer(ConsoleSpanExporter(), sample_ratio)
+    raise ValueError(f"Exportador de trazas desconocido: {exporter}")
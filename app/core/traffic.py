@@ -0,0 +1,247 @@
+# app/core/traffic.py
+"""Captura muestreada y anonimizada del tráfico real.
+
+`TrafficCaptureMiddleware` escribe una línea JSON por request muestreado de
+`/api/` con método, plantilla de ruta, parámetros, forma del cuerpo, rol del
+principal, código de estado y duración. `perf.replay` reproduce esa secuencia
+contra una instancia local con datos sembrados.
+
+Nada identificable sale del proceso: los UUID, emails y el `sub` del token se
+reemplazan por seudónimos HMAC con la sal de `TRAFFIC_CAPTURE_SALT` (la misma
+en todos los workers, así un usuario tiene un solo seudónimo en la captura y el
+replay repite los mismos accesos), los textos libres por su longitud y los
+números se redondean a dos cifras significativas.
+Solo se conservan los valores de los enums de la API, `asc`/`desc` y los nombres
+de columna (p. ej. `status=approved&sort=created_at`).
+
+Las líneas se escriben en lotes desde un hilo aparte (ver
+`app/core/line_writer.py`), no desde el event loop.
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import re
+import time
+from enum import Enum
+from typing import Any
+from urllib.parse import parse_qsl
+
+import jwt
+from sqlmodel import SQLModel
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import enums
+from app.core.line_writer import LineWriter
+
+API_PREFIX = "/api/"
+# Elementos de una lista que se conservan en la forma del cuerpo
+_MAX_LIST_ITEMS = 20
+# Cadenas numéricas más largas se tratan como identificadores
+_MAX_NUMERIC_DIGITS = 4
+_UUID = re.compile(r"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}")
+_EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}.*)?")
+
+
+def _round_significant(value: float) -> float:
+    rounded = float(f"{value:.2g}")
+    return int(rounded) if isinstance(value, int) else rounded
+
+
+class TrafficRecorder:
+    """Anonimiza los valores de cada request y los agrega a `path` como JSONL."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        salt: str,
+        sample_ratio: float,
+        max_body_bytes: int = 64 * 1024,
+    ) -> None:
+        if not salt:
+            raise ValueError(
+                "TRAFFIC_CAPTURE_SALT debe estar configurado para capturar tráfico"
+            )
+        self.path = path
+        self.sample_ratio = sample_ratio
+        self.max_body_bytes = max_body_bytes
+        # Compartida por los workers que escriben la misma captura; secreta,
+        # o los seudónimos de emails conocidos se podrían recalcular
+        self._salt = salt.encode()
+        self.writer = LineWriter(path)
+        self._labels: frozenset[str] | None = None
+
+    def should_sample(self) -> bool:
+        return self.sample_ratio > 0 and random.random() < self.sample_ratio
+
+    def pseudonym(self, value: str) -> str:
+        return hmac.new(self._salt, value.encode(), hashlib.sha256).hexdigest()[:12]
+
+    @property
+    def labels(self) -> frozenset[str]:
+        """Valores que se conservan tal cual. Se calcula en el primer uso, cuando
+        los modelos ya están registrados en la metadata."""
+        if self._labels is None:
+            labels = {"asc", "desc"}
+            for value in vars(enums).values():
+                if isinstance(value, type) and issubclass(value, Enum):
+                    labels.update(str(member.value) for member in value)
+            for table in SQLModel.metadata.tables.values():
+                labels.update(table.columns.keys())
+            self._labels = frozenset(labels)
+        return self._labels
+
+    def anonymize(self, value: Any) -> Any:
+        if value is None or isinstance(value, bool):
+            return value
+        if isinstance(value, int | float):
+            return _round_significant(value)
+        if isinstance(value, str):
+            return self._anonymize_str(value)
+        if isinstance(value, dict):
+            return {str(k): self.anonymize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.anonymize(v) for v in value[:_MAX_LIST_ITEMS]]
+        return f"<{type(value).__name__}>"
+
+    def _anonymize_str(self, value: str) -> str:
+        if _UUID.fullmatch(value):
+            return f"<uuid:{self.pseudonym(value.lower())}>"
+        if _EMAIL.fullmatch(value):
+            return f"<email:{self.pseudonym(value.lower())}>"
+        if _DATETIME.fullmatch(value):
+            return "<datetime>"
+        if value in self.labels:
+            return value
+        if value.isdigit():
+            # Paginación y similares en la query string; no teléfonos ni RFC
+            if len(value) <= _MAX_NUMERIC_DIGITS:
+                return str(_round_significant(int(value)))
+            return f"<digits:{len(value)}>"
+        return f"<str:{len(value)}>"
+
+    def principal(self, authorization: str | None) -> tuple[str | None, str | None]:
+        """Rol y seudónimo del `sub` del bearer token. El token no se verifica:
+        solo etiqueta la captura, la autenticación ocurre en la ruta."""
+        if not authorization or not authorization.lower().startswith("bearer "):
+            return None, None
+        try:
+            claims = jwt.decode(authorization[7:], options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return None, None
+        sub = claims.get("sub")
+        role = claims.get("user_role") or claims.get("role")
+        return role, self.pseudonym(sub) if sub else None
+
+    def body_shape(self, content_type: str, body: bytes, truncated: bool) -> Any:
+        if truncated or not body or content_type != "application/json":
+            return None
+        try:
+            return self.anonymize(json.loads(body))
+        except ValueError:
+            return None
+
+    def write(self, entry: dict[str, Any]) -> None:
+        self.writer.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+class TrafficCaptureMiddleware:
+    """Middleware ASGI que registra en `recorder` una fracción de los requests
+    de la API. Los no muestreados pasan sin costo adicional."""
+
+    def __init__(self, app: ASGIApp, *, recorder: TrafficRecorder) -> None:
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(API_PREFIX)
+            or not self.recorder.should_sample()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.recorder.max_body_bytes
+        body = bytearray()
+        body_bytes = 0
+        status_code = 500
+
+        async def receive_wrapper() -> Message:
+            nonlocal body_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_bytes += len(chunk)
+                if body_bytes <= limit:
+                    body.extend(chunk)
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", None)
+            # Sin plantilla (404 de enrutamiento) no hay nada que reproducir
+            if route is not None:
+                self._record(
+                    scope,
+                    route,
+                    started_at,
+                    elapsed,
+                    status_code,
+                    bytes(body),
+                    body_bytes,
+                )
+
+    def _record(
+        self,
+        scope: Scope,
+        route: str,
+        started_at: float,
+        elapsed: float,
+        status_code: int,
+        body: bytes,
+        body_bytes: int,
+    ) -> None:
+        recorder = self.recorder
+        headers = {
+            k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]
+        }
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        role, actor = recorder.principal(headers.get("authorization"))
+        query: dict[str, list[Any]] = {}
+        for key, value in parse_qsl(scope["query_string"].decode("latin-1")):
+            query.setdefault(key, []).append(recorder.anonymize(value))
+        recorder.write(
+            {
+                "ts": round(started_at, 3),
+                "method": scope["method"],
+                "route": route,
+                "path_params": {
+                    k: recorder.anonymize(str(v))
+                    for k, v in scope.get("path_params", {}).items()
+                },
+                "query": query,
+                "content_type": content_type or None,
+                "body_bytes": body_bytes,
+                "body": recorder.body_shape(
+                    content_type, body, body_bytes > recorder.max_body_bytes
+                ),
+                "role": role,
+                "actor": actor,
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+            }
+        )
@@ -0,0 +1,127 @@
+"""Unidad de trabajo por request: un único commit al final.
+
+Los repositorios solo hacen flush; la sesión de `get_session` se registra en el
+scope del request y `UnitOfWorkMiddleware` la confirma cuando la respuesta está
+por enviarse (antes del primer byte), si el status es < 400 y hubo escrituras.
+Con un error, la sesión no se confirma y `get_session` hace rollback. Así varias
+escrituras de un mismo request son atómicas y pagan un solo commit.
+
+El commit no puede ir en el cierre de `get_session`: FastAPI ejecuta el cierre de
+las dependencias con `yield` después de enviar la respuesta, y el cliente vería
+un 200 de algo que quizás no se guardó.
+
+Los flujos largos que necesitan confirmar por etapas (p. ej. antes de llamar a un
+proveedor externo) llaman a `manual_commit(session)` y hacen `commit()` ellos
+mismos; lo que quede sin confirmar al terminar el request se descarta.
+"""
+
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql.elements import TextClause
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.deadlines import apply_to_transaction
+from app.core.tracing import start_span
+
+_STATE_KEY = "unit_of_work_session"
+_WRITES = "unit_of_work_writes"
+_MANUAL = "unit_of_work_manual"
+
+
+class UnitOfWorkSession(Session):
+    """Sesión que anota en `info` si la transacción en curso escribió algo, para
+    no pagar un COMMIT en los requests de solo lectura."""
+
+
+@event.listens_for(UnitOfWorkSession, "after_flush")
+def _after_flush(session: Session, flush_context: Any) -> None:
+    session.info[_WRITES] = True
+
+
+@event.listens_for(UnitOfWorkSession, "do_orm_execute")
+def _on_execute(state: ORMExecuteState) -> None:
+    # UPDATE/DELETE masivos y SQL textual no pasan por el flush
+    statement = state.statement
+    if state.is_select or (
+        isinstance(statement, TextClause)
+        and statement.text.lstrip()[:6].upper() == "SELECT"
+    ):
+        return
+    state.session.info[_WRITES] = True
+
+
+@event.listens_for(UnitOfWorkSession, "after_commit")
+@event.listens_for(UnitOfWorkSession, "after_rollback")
+def _reset(session: Session) -> None:
+    session.info.pop(_WRITES, None)
+
+
+# Cada transacción hereda el plazo restante del request (ver app/core/deadlines.py)
+event.listen(UnitOfWorkSession, "after_begin", apply_to_transaction)
+
+
+def register(scope: Scope, session: AsyncSession) -> None:
+    """Asocia la sesión del request para confirmarla al responder."""
+    scope.setdefault("state", {})[_STATE_KEY] = session
+
+
+def request_session(scope: Scope) -> AsyncSession | None:
+    """Sesión del request registrada con `register`, si aún no se confirmó."""
+    return scope.get("state", {}).get(_STATE_KEY)
+
+
+def has_writes(session: AsyncSession) -> bool:
+    """True si la transacción en curso escribió o tiene cambios sin flush."""
+    return bool(
+        session.info.get(_WRITES) or session.new or session.dirty or session.deleted
+    )
+
+
+def manual_commit(session: AsyncSession) -> None:
+    """Excluye la sesión del commit automático: el llamador confirma."""
+    session.info[_MANUAL] = True
+
+
+def is_manual(session: AsyncSession) -> bool:
+    return bool(session.info.get(_MANUAL))
+
+
+async def _complete(scope: Scope, status: int) -> None:
+    session: AsyncSession | None = scope.get("state", {}).pop(_STATE_KEY, None)
+    if (
+        session is None
+        or status >= 400
+        or session.info.get(_MANUAL)
+        or not session.info.get(_WRITES)
+    ):
+        return
+    span = start_span("unit_of_work commit", root=False)
+    try:
+        await session.commit()
+    finally:
+        if span is not None:
+            span.end()
+
+
+class UnitOfWorkMiddleware:
+    """Confirma la sesión del request antes de enviar la respuesta."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Si el commit falla la respuesta no empezó: el error termina
+                # en un 500 y la sesión se descarta en `get_session`
+                await _complete(scope, message["status"])
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,9 +1,11 @@
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, Request, Security
+from fastapi import Depends, HTTPException, Request, Response, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from app.core.rate_limit import limit_by_user
+from app.core.tracing import span
 from app.schemas.auth import Principal
 
 BearerToken = Annotated[HTTPAuthorizationCredentials, Security(HTTPBearer())]
@@ -14,11 +16,12 @@ async def get_jwt_payload(request: Request, creds: BearerToken) -> dict:
     token = creds.credentials
     jwks_client: jwt.PyJWKClient = request.app.state.jwks_client
     try:
-        key = jwks_client.get_signing_key_from_jwt(token).key
-        issuer = f"{request.app.state.settings.project_url}/auth/v1"
-        payload = jwt.decode(
-            token, key, ["ES256"], audience="authenticated", issuer=issuer
-        )
+        with span("get_jwt_payload"):
+            key = jwks_client.get_signing_key_from_jwt(token).key
+            issuer = f"{request.app.state.settings.project_url}/auth/v1"
+            payload = jwt.decode(
+                token, key, ["ES256"], audience="authenticated", issuer=issuer
+            )
         return payload
     except jwt.ExpiredSignatureError as err:
         raise HTTPException(status_code=401, detail="Expired token") from err
@@ -33,12 +36,15 @@ async def get_jwt_payload(request: Request, creds: BearerToken) -> dict:
 JWTPayload = Annotated[dict, Depends(get_jwt_payload)]
 
 
-async def get_current_user(payload: JWTPayload) -> Principal:
-    """Extrae el `Principal` del payload ya validado."""
+async def get_current_user(
+    request: Request, response: Response, payload: JWTPayload
+) -> Principal:
+    """Extrae el `Principal` del payload ya validado y aplica su rate limit."""
     sub = payload.get("sub")
     email = payload.get("email")
     if not sub:
         raise HTTPException(status_code=401, detail="Token no contiene user_id (sub)")
+    await limit_by_user(request, response, sub)
     return Principal(sub=sub, email=email)
 
 
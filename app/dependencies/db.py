@@ -4,13 +4,31 @@ from typing import AsyncGenerator
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import parallel_reads, unit_of_work
+from app.core.tracing import start_span
+
 
 async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
-    """Obtiene una sesión de database desde app.state."""
+    """Obtiene una sesión de database desde app.state.
+
+    Es la unidad de trabajo del request: los repositorios solo hacen flush y
+    `UnitOfWorkMiddleware` confirma una vez antes de responder (ver
+    app/core/unit_of_work.py). Lo que no se confirmó se descarta al cerrar.
+    Las lecturas independientes pueden repartirse en otras conexiones con
+    `gather_reads` (ver app/core/parallel_reads.py).
+    """
     session_maker = request.app.state.async_session
     async with session_maker() as session:
+        unit_of_work.register(request.scope, session)
+        parallel_reads.enable(session, request.app.state.settings.db_parallel_reads)
         try:
             yield session
         finally:
+            # Abrir la sesión no toca la BD (la conexión se toma en la primera
+            # consulta); se traza el cierre: rollback y devolución al pool
+            teardown = start_span("get_session teardown", root=False)
             if session.in_transaction():
                 await session.rollback()
+            await session.close()
+            if teardown is not None:
+                teardown.end()
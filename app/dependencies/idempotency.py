@@ -0,0 +1,30 @@
+from typing import Annotated
+
+from fastapi import Depends, Header, Request
+
+from app.core.idempotency import MAX_KEY_LENGTH, claim_request
+from app.dependencies.auth import CurrentUserDep
+
+
+async def idempotency_key(
+    request: Request,
+    user: CurrentUserDep,
+    key: Annotated[
+        str | None,
+        Header(
+            alias="Idempotency-Key",
+            min_length=1,
+            max_length=MAX_KEY_LENGTH,
+            description="Clave única del cliente: los reintentos con la misma "
+            "clave devuelven la respuesta original sin repetir la operación",
+        ),
+    ] = None,
+) -> None:
+    """Reserva el `Idempotency-Key` del request, si lo trae (ver
+    app/core/idempotency.py)."""
+    if key is not None:
+        await claim_request(request, user.sub, key)
+
+
+# Para `dependencies=[Idempotent]` en los POST que crean recursos
+Idempotent = Depends(idempotency_key)
@@ -0,0 +1,35 @@
+from typing import Annotated
+
+from fastapi import Depends, Header, HTTPException, Response
+
+
+def if_match_version(
+    if_match: Annotated[
+        str | None,
+        Header(
+            alias="If-Match",
+            description="ETag (versión) del recurso leído; si cambió desde "
+            "entonces, la edición responde 412",
+        ),
+    ] = None,
+) -> int | None:
+    """Versión exigida por `If-Match` (`"3"`, `W/"3"` o `3`).
+
+    None si no viene o es `*`.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(
+            status_code=400, detail="If-Match debe ser el ETag (versión) del recurso"
+        )
+    return int(tag)
+
+
+IfMatchDep = Annotated[int | None, Depends(if_match_version)]
+
+
+def set_etag(response: Response, version: int) -> None:
+    """ETag del recurso a partir de su versión, para usar luego en If-Match."""
+    response.headers["ETag"] = f'"{version}"'
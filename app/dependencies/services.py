@@ -1,14 +1,16 @@
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import Settings, get_settings
 from app.dependencies.db import get_session
+from app.services.admin_service import AdminService
 from app.services.company_service import CompanyService
 from app.services.credit_application_service import CreditApplicationService
 from app.services.document_service import DocumentService
 from app.services.profile_service import ProfileService
+from app.services.signature_webhook_service import SignatureEventQueue
 
 
 def get_profile_service(session: AsyncSession = Depends(get_session)) -> ProfileService:
@@ -26,10 +28,28 @@ def get_credit_application_service(
 
 
 def get_document_service(
+    request: Request,
     session: AsyncSession = Depends(get_session),
     settings: Settings = Depends(get_settings),
 ) -> DocumentService:
-    return DocumentService(session, settings)
+    return DocumentService(
+        session, settings, policies=request.app.state.outbound_policies
+    )
+
+
+def get_admin_service(
+    request: Request, session: AsyncSession = Depends(get_session)
+) -> AdminService:
+    return AdminService(
+        session,
+        request.app.state.slow_query_log,
+        profiler=request.app.state.profiler,
+        allocation_tracker=request.app.state.allocation_tracker,
+    )
+
+
+def get_signature_event_queue(request: Request) -> SignatureEventQueue:
+    return request.app.state.signature_event_queue
 
 
 ProfileServiceDep = Annotated[ProfileService, Depends(get_profile_service)]
@@ -38,3 +58,7 @@ CreditApplicationServiceDep = Annotated[
     CreditApplicationService, Depends(get_credit_application_service)
 ]
 DocumentServiceDep = Annotated[DocumentService, Depends(get_document_service)]
+AdminServiceDep = Annotated[AdminService, Depends(get_admin_service)]
+SignatureEventQueueDep = Annotated[
+    SignatureEventQueue, Depends(get_signature_event_queue)
+]
@@ -1,15 +1,25 @@
 # app/errors.py
+import math
+
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.core.errors import (
     ConflictError,
+    DeadlineExceededError,
     ForbiddenError,
     NotFoundError,
+    PreconditionFailedError,
+    RateLimitedError,
     ServiceError,
+    ServiceUnavailableError,
     UnauthorizedError,
+    UpstreamTimeoutError,
     ValidationDomainError,
 )
+from app.core.idempotency import IdempotentReplay
 
 
 def register_exception_handlers(app):
@@ -21,6 +31,18 @@ def register_exception_handlers(app):
     async def _409(_req: Request, exc: ConflictError):
         return JSONResponse(status_code=409, content={"detail": str(exc)})
 
+    @app.exception_handler(PreconditionFailedError)
+    async def _412(_req: Request, exc: PreconditionFailedError):
+        return JSONResponse(status_code=412, content={"detail": str(exc)})
+
+    # Flush del ORM sobre una fila que cambió de versión desde que se leyó
+    @app.exception_handler(StaleDataError)
+    async def _409_stale(_req: Request, exc: StaleDataError):
+        return JSONResponse(
+            status_code=409,
+            content={"detail": "El recurso fue modificado por otra operación"},
+        )
+
     @app.exception_handler(UnauthorizedError)
     async def _401(_req: Request, exc: UnauthorizedError):
         return JSONResponse(status_code=401, content={"detail": str(exc)})
@@ -33,6 +55,47 @@ def register_exception_handlers(app):
     async def _400(_req: Request, exc: ValidationDomainError):
         return JSONResponse(status_code=400, content={"detail": str(exc)})
 
+    @app.exception_handler(RateLimitedError)
+    async def _429(_req: Request, exc: RateLimitedError):
+        headers = {
+            **exc.headers,
+            "Retry-After": str(max(math.ceil(exc.retry_after), 1)),
+        }
+        return JSONResponse(
+            status_code=429, content={"detail": str(exc)}, headers=headers
+        )
+
+    # Reintento con una Idempotency-Key ya respondida: la respuesta original
+    @app.exception_handler(IdempotentReplay)
+    async def _replay(_req: Request, exc: IdempotentReplay):
+        return exc.response()
+
+    @app.exception_handler(ServiceUnavailableError)
+    async def _503(_req: Request, exc: ServiceUnavailableError):
+        headers = None
+        if exc.retry_after is not None:
+            headers = {"Retry-After": str(max(math.ceil(exc.retry_after), 1))}
+        return JSONResponse(
+            status_code=503, content={"detail": str(exc)}, headers=headers
+        )
+
+    @app.exception_handler(UpstreamTimeoutError)
+    async def _504(_req: Request, exc: UpstreamTimeoutError):
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+    @app.exception_handler(DeadlineExceededError)
+    async def _504_deadline(_req: Request, exc: DeadlineExceededError):
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+    # Pool agotado: no hubo conexión libre en DB_POOL_TIMEOUT
+    @app.exception_handler(PoolTimeoutError)
+    async def _503_pool(_req: Request, exc: PoolTimeoutError):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Base de datos saturada, reintentar"},
+            headers={"Retry-After": "1"},
+        )
+
     # catch-all opcional para evitar 500 no controlados
     @app.exception_handler(ServiceError)
     async def _500(_req: Request, exc: ServiceError):
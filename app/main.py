@@ -1,10 +1,27 @@
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.bootstrap import app_lifespan
 from app.config import get_settings
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.core.deadlines import DeadlineMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.instrumentation import MetricsMiddleware
+from app.core.metrics import REGISTRY
+from app.core.tracing import TracingMiddleware, build_tracer, configure_tracing
+from app.core.traffic import TrafficCaptureMiddleware, TrafficRecorder
+from app.core.unit_of_work import UnitOfWorkMiddleware
 from app.exception_handlers import register_exception_handlers
-from app.routers import companies, credit_applications, documents, metadata, profiles
+from app.routers import (
+    admin,
+    companies,
+    credit_applications,
+    documents,
+    metadata,
+    profiles,
+    webhooks,
+)
 
 app = FastAPI(
     title="API Créditos PyMEs",
@@ -23,6 +40,34 @@ if settings.environment == "production":
 else:
     allowed_origins = ["*"]
 
+# La más interna: guarda la respuesta de los requests con Idempotency-Key en la
+# sesión, para que se confirme en el mismo commit que el trabajo
+app.add_middleware(IdempotencyMiddleware)
+
+# Confirma la sesión antes de que las demás vean la respuesta
+app.add_middleware(UnitOfWorkMiddleware)
+
+# Deadline del request, que acota la BD y las llamadas salientes
+app.add_middleware(
+    DeadlineMiddleware,
+    default=settings.request_deadline,
+    statement_timeout=settings.db_statement_timeout,
+    lock_timeout=settings.db_lock_timeout,
+)
+
+# Dentro de CORS, para que el navegador pueda leer el 429/503 y su Retry-After;
+# el deadline empieza a correr una vez admitido el request
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=AdmissionController(
+            max_in_flight=settings.admission_max_in_flight,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout,
+            pool_wait_target=settings.admission_pool_wait_target,
+        ),
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -31,6 +76,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    MetricsMiddleware,
+    query_budget=settings.sql_query_budget,
+    repeat_threshold=settings.sql_n_plus_one_threshold,
+)
+
+if settings.traffic_capture_enabled:
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        recorder=TrafficRecorder(
+            settings.traffic_capture_file,
+            salt=settings.traffic_capture_salt,
+            sample_ratio=settings.traffic_capture_sample_ratio,
+        ),
+    )
+
+if settings.tracing_enabled:
+    configure_tracing(
+        build_tracer(
+            settings.tracing_exporter,
+            sample_ratio=settings.tracing_sample_ratio,
+            file_path=settings.tracing_file,
+        )
+    )
+    app.add_middleware(TracingMiddleware)
+
 register_exception_handlers(app)
 
 
@@ -45,11 +116,46 @@ async def read_root():
 
 
 @app.get("/health", tags=["health"])
+@app.get("/health/live", tags=["health"])
 async def health_check():
-    """Endpoint para verificar la salud de la API."""
+    """Liveness: el proceso responde. No consulta dependencias."""
     return {"status": "healthy"}
 
 
+@app.get("/health/ready", tags=["health"])
+async def readiness_check(request: Request):
+    """Readiness: último resultado de los chequeos en segundo plano (BD, pool,
+    JWKS y Storage). 503 si falló un chequeo crítico o si aún no hay resultados."""
+    monitor = request.app.state.health_monitor
+    status = monitor.status()
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={
+            "status": status,
+            "checked_at": monitor.checked_at.isoformat()
+            if monitor.checked_at
+            else None,
+            "checks": {
+                name: {
+                    "ok": result.ok,
+                    "critical": name in monitor.critical,
+                    "detail": result.detail,
+                    "latency_ms": result.latency_ms,
+                }
+                for name, result in monitor.checks.items()
+            },
+        },
+    )
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics():
+    """Métricas del proceso en formato de exposición de Prometheus."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # API v1
 api_v1_router = APIRouter(prefix="/api/v1")
 api_v1_router.include_router(profiles.router)
@@ -57,4 +163,6 @@ api_v1_router.include_router(companies.router)
 api_v1_router.include_router(credit_applications.router)
 api_v1_router.include_router(documents.router)
 api_v1_router.include_router(metadata.router)
+api_v1_router.include_router(webhooks.router)
+api_v1_router.include_router(admin.router)
 app.include_router(api_v1_router)
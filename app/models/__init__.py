@@ -4,4 +4,4 @@ from app.models.company import Company
 from app.models.credit_application import CreditApplication
 from app.models.profile import Profile
 
-__all__ = ["Company", "CreditApplication", "Profile"]
\ No newline at end of file
+__all__ = ["Company", "CreditApplication", "Profile"]
@@ -2,7 +2,8 @@ from datetime import UTC, datetime
 from typing import Any
 from uuid import UUID, uuid4
 
-from sqlalchemy import TIMESTAMP
+from sqlalchemy import TIMESTAMP, Index
+from sqlalchemy.orm import declared_attr
 from sqlmodel import JSON, Column, Field, ForeignKeyConstraint, SQLModel, func
 
 
@@ -35,6 +36,12 @@ class Company(SQLModel, table=True):
         ),
     )
 
+    # Concurrencia optimista: cada UPDATE la incrementa y exige la versión leída
+    # (ver `compare_and_set` en app/repositories/sql.py)
+    version: int = Field(
+        default=1, nullable=False, sa_column_kwargs={"server_default": "1"}
+    )
+
     __tablename__ = "companies"  # type: ignore[assignment]
     __table_args__ = (
         ForeignKeyConstraint(
@@ -43,4 +50,10 @@ class Company(SQLModel, table=True):
             name="fk_companies_profile",
             ondelete="CASCADE",
         ),
+        # Mismo índice que db/migrations/0001_query_shape_indexes.sql
+        Index("idx_companies_created_at", "created_at"),
     )
+
+    @declared_attr
+    def __mapper_args__(cls) -> dict[str, Any]:
+        return {"version_id_col": cls.__table__.c.version}
@@ -1,8 +1,10 @@
 from datetime import UTC, datetime
 from decimal import Decimal
+from typing import Any
 from uuid import UUID, uuid4
 
-from sqlalchemy import TIMESTAMP
+from sqlalchemy import TIMESTAMP, Index, text
+from sqlalchemy.orm import declared_attr
 from sqlmodel import (
     CheckConstraint,
     Column,
@@ -23,7 +25,7 @@ class CreditApplication(SQLModel, table=True):
         index=True,
         sa_column_kwargs={"server_default": func.gen_random_uuid()},
     )
-    company_id: UUID = Field(nullable=False, index=True)
+    company_id: UUID = Field(nullable=False)
     requested_amount: Decimal = Field(
         max_digits=15,
         decimal_places=2,
@@ -85,6 +87,12 @@ class CreditApplication(SQLModel, table=True):
         ),
     )
 
+    # Concurrencia optimista: cada UPDATE la incrementa y exige la versión leída
+    # (ver `compare_and_set` en app/repositories/sql.py)
+    version: int = Field(
+        default=1, nullable=False, sa_column_kwargs={"server_default": "1"}
+    )
+
     __tablename__ = "credit_applications"  # type: ignore[assignment]
     __table_args__ = (
         CheckConstraint(
@@ -97,4 +105,38 @@ class CreditApplication(SQLModel, table=True):
             name="fk_credit_applications_company",
             ondelete="CASCADE",
         ),
+        # Mismos índices que db/migrations/0001_query_shape_indexes.sql y
+        # 0002_sort_field_indexes.sql
+        Index("idx_credit_applications_company_created", "company_id", "created_at"),
+        Index("idx_credit_applications_status_created", "status", "created_at"),
+        Index(
+            "idx_credit_applications_created_not_draft",
+            "created_at",
+            postgresql_where=text("status <> 'draft'"),
+        ),
+        Index(
+            "idx_credit_applications_company_open",
+            "company_id",
+            postgresql_where=text("status IN ('pending', 'in_review')"),
+        ),
+        # Orden del listado de operadores por cada campo de ALLOWED_SORT_FIELDS
+        *(
+            Index(
+                f"idx_credit_applications_{field}_not_draft",
+                field,
+                postgresql_where=text("status <> 'draft'"),
+            )
+            for field in (
+                "requested_amount",
+                "term_months",
+                "risk_score",
+                "approved_amount",
+                "interest_rate",
+                "updated_at",
+            )
+        ),
     )
+
+    @declared_attr
+    def __mapper_args__(cls) -> dict[str, Any]:
+        return {"version_id_col": cls.__table__.c.version}
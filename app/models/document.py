@@ -2,7 +2,8 @@ from datetime import UTC, datetime
 from typing import Any
 from uuid import UUID, uuid4
 
-from sqlalchemy import TIMESTAMP
+from sqlalchemy import TIMESTAMP, Index, text
+from sqlalchemy.orm import declared_attr
 from sqlmodel import JSON, Column, Enum, Field, ForeignKeyConstraint, SQLModel, func
 
 from app.core.enums import DocumentStatus, DocumentType, SignatureStatus
@@ -14,11 +15,10 @@ class Document(SQLModel, table=True):
     id: UUID = Field(
         default_factory=uuid4,
         primary_key=True,
-        index=True,
         sa_column_kwargs={"server_default": func.gen_random_uuid()},
     )
-    user_id: UUID = Field(nullable=False, index=True)
-    application_id: UUID | None = Field(default=None, index=True)
+    user_id: UUID = Field(nullable=False)
+    application_id: UUID | None = Field(default=None)
 
     # Info desde storage.objects
     # Permitir NULL para permitir registros "request" (placeholders) antes de que el
@@ -99,6 +99,12 @@ class Document(SQLModel, table=True):
         ),
     )
 
+    # Concurrencia optimista: cada UPDATE la incrementa y exige la versión leída
+    # (ver `compare_and_set` en app/repositories/sql.py)
+    version: int = Field(
+        default=1, nullable=False, sa_column_kwargs={"server_default": "1"}
+    )
+
     __tablename__ = "documents"  # type: ignore[assignment]
     __table_args__ = (
         ForeignKeyConstraint(
@@ -113,4 +119,24 @@ class Document(SQLModel, table=True):
             name="fk_documents_application",
             ondelete="CASCADE",
         ),
+        # Mismos índices que db/migrations/0001_query_shape_indexes.sql
+        Index("idx_documents_user_created", "user_id", "created_at"),
+        Index("idx_documents_application_created", "application_id", "created_at"),
+        Index("idx_documents_status", "status"),
+        Index(
+            "idx_documents_signature_request_id",
+            "signature_request_id",
+            postgresql_where=text("signature_request_id IS NOT NULL"),
+        ),
+        Index(
+            "idx_documents_pending_signature",
+            "updated_at",
+            postgresql_where=text(
+                "signature_status = 'pending' AND signature_request_id IS NOT NULL"
+            ),
+        ),
     )
+
+    @declared_attr
+    def __mapper_args__(cls) -> dict[str, Any]:
+        return {"version_id_col": cls.__table__.c.version}
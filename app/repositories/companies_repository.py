@@ -1,10 +1,40 @@
+from functools import lru_cache
 from typing import Sequence, Tuple
 from uuid import UUID
 
+from sqlalchemy import bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import desc, func, select
+from sqlmodel.sql.expression import SelectOfScalar
 
+from app.core.parallel_reads import gather_reads
 from app.models.company import Company
+from app.repositories.sql import (
+    QUERY_CACHE_SIZE,
+    compare_and_set,
+    page_params,
+    paged,
+    scalar_one,
+    scalars_all,
+)
+
+# Sentencias preconstruidas (ver app/repositories/sql.py)
+_BY_ID = select(Company).where(Company.id == bindparam("company_id"))
+_BY_TAX_ID = select(Company).where(Company.tax_id == bindparam("tax_id"))
+_BY_USER_ID = select(Company).where(Company.user_id == bindparam("user_id"))
+_COUNT = select(func.count()).select_from(Company)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _list_query(sort: str | None, order: str) -> SelectOfScalar[Company]:
+    query = select(Company)
+    if sort:
+        col = getattr(Company, sort, None)
+        if col is not None:
+            query = query.order_by(col.asc() if order == "asc" else col.desc())
+    else:
+        query = query.order_by(desc(Company.created_at))
+    return paged(query)
 
 
 class CompanyRepository:
@@ -13,42 +43,31 @@ class CompanyRepository:
 
     async def create(self, company: Company) -> Company:
         self.session.add(company)
-        await self.session.commit()
+        await self.session.flush()
         await self.session.refresh(company)
         return company
 
-    async def update(self, company_id: UUID, update_data: dict) -> Company | None:
-        # Get the table model for updating
-        result = await self.session.execute(
-            select(Company).where(Company.id == company_id)
+    async def update(
+        self, company_id: UUID, update_data: dict, expected_version: int | None
+    ) -> Company | None:
+        """Actualiza la empresa si sigue en `expected_version`; None si no existe
+        o si otra escritura la cambió."""
+        return await compare_and_set(
+            self.session, Company, company_id, update_data, expected_version
         )
-        company = result.scalars().first()
-        if not company:
-            return None
-        for key, value in update_data.items():
-            setattr(company, key, value)
-        await self.session.commit()
-        await self.session.refresh(company)
-        return company
 
     async def get_by_id(self, company_id: UUID) -> Company | None:
-        result = await self.session.execute(
-            select(Company).where(Company.id == company_id)
-        )
+        result = await self.session.execute(_BY_ID, {"company_id": company_id})
         company = result.scalars().first()
         return company
 
     async def get_by_tax_id(self, tax_id: str) -> Company | None:
-        result = await self.session.execute(
-            select(Company).where(Company.tax_id == tax_id)
-        )
+        result = await self.session.execute(_BY_TAX_ID, {"tax_id": tax_id})
         company = result.scalars().first()
         return company
 
     async def get_by_user_id(self, user_id: UUID) -> Company | None:
-        result = await self.session.execute(
-            select(Company).where(Company.user_id == user_id)
-        )
+        result = await self.session.execute(_BY_USER_ID, {"user_id": user_id})
         company = result.scalars().first()
         return company
 
@@ -60,25 +79,11 @@ class CompanyRepository:
         sort: str | None,
         order: str,
     ) -> Tuple[Sequence[Company], int]:
-        offset = (page - 1) * limit
-        query = select(Company)
-
-        if sort:
-            col = getattr(Company, sort, None)
-            if col is not None:
-                query = query.order_by(col.asc() if order == "asc" else col.desc())
-
-        else:
-            query = query.order_by(desc(Company.created_at))
-
-        total = (
-            await self.session.execute(select(func.count()).select_from(Company))
-        ).scalar_one()
-
-        items = (
-            (await self.session.execute(query.offset(offset).limit(limit)))
-            .scalars()
-            .all()
+        total, items = await gather_reads(
+            self.session,
+            lambda s: scalar_one(s, _COUNT),
+            lambda s: scalars_all(
+                s, _list_query(sort, order), page_params(page, limit)
+            ),
         )
-
         return items, total
@@ -1,11 +1,87 @@
-from typing import Sequence, Tuple
+from functools import lru_cache
+from typing import Any, Sequence, Tuple
 from uuid import UUID
 
+from sqlalchemy import bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import col, desc, func, select
+from sqlmodel.sql.expression import SelectOfScalar
 
 from app.core.enums import CreditApplicationStatus
+from app.core.parallel_reads import gather_reads
 from app.models.credit_application import CreditApplication
+from app.repositories.sql import (
+    QUERY_CACHE_SIZE,
+    compare_and_set,
+    inline,
+    page_params,
+    paged,
+    scalar_one,
+    scalars_all,
+)
+
+# Sentencias preconstruidas (ver app/repositories/sql.py)
+_BY_ID = select(CreditApplication).where(
+    CreditApplication.id == bindparam("application_id")
+)
+_OPEN_FOR_COMPANY = (
+    select(CreditApplication)
+    .where(
+        CreditApplication.company_id == bindparam("company_id"),
+        # En línea para usar el índice parcial de solicitudes abiertas
+        col(CreditApplication.status).in_(
+            inline(
+                col(CreditApplication.status),
+                [CreditApplicationStatus.pending, CreditApplicationStatus.in_review],
+            )
+        ),
+    )
+    .limit(1)
+)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _list_queries(
+    by_status: bool,
+    by_company: bool,
+    exclude_status: tuple[CreditApplicationStatus, ...],
+    sort: str | None,
+    order: str,
+) -> tuple[SelectOfScalar[CreditApplication], SelectOfScalar[int]]:
+    """Página y conteo de `list_applications` para una combinación de filtros.
+
+    Los valores de `status` y `company_id` van como parámetros; los estados
+    excluidos, en línea (ver `inline`), son parte de la combinación.
+    """
+    query = select(CreditApplication)
+    # Count total records matching the filters. count(*) y no count(id): el
+    # conteo puede resolverse solo con el índice (index-only scan)
+    count_query = select(func.count()).select_from(CreditApplication)
+    filters = []
+    if by_status:
+        filters.append(CreditApplication.status == bindparam("status"))
+    if by_company:
+        filters.append(CreditApplication.company_id == bindparam("company_id"))
+    if exclude_status:
+        # En línea: `status NOT IN ('draft')` usa el índice parcial sin borradores
+        filters.append(
+            col(CreditApplication.status).not_in(
+                inline(col(CreditApplication.status), exclude_status)
+            )
+        )
+    if filters:
+        query = query.where(*filters)
+        count_query = count_query.where(*filters)
+
+    if sort:
+        sort_column = col(getattr(CreditApplication, sort, None))
+        if sort_column is not None:
+            query = query.order_by(
+                sort_column.asc() if order == "asc" else sort_column.desc()
+            )
+    else:
+        query = query.order_by(desc(CreditApplication.created_at))
+    return paged(query), count_query
 
 
 class CreditApplicationRepository:
@@ -23,45 +99,23 @@ class CreditApplicationRepository:
         order: str = "desc",
         exclude_status: list[CreditApplicationStatus] | None = None,
     ) -> Tuple[Sequence[CreditApplication], int]:
-        offset = (page - 1) * limit
-        query = select(CreditApplication)
-
-        if status:
-            query = query.where(CreditApplication.status == status)
-        if company_id:
-            query = query.where(CreditApplication.company_id == company_id)
-        if exclude_status:
-            query = query.where(col(CreditApplication.status).not_in(exclude_status))
-
-        if sort:
-            sort_column = col(getattr(CreditApplication, sort, None))
-            if sort_column is not None:
-                query = query.order_by(
-                    sort_column.asc() if order == "asc" else sort_column.desc()
-                )
-        else:
-            query = query.order_by(desc(CreditApplication.created_at))
-
-        # Count total records matching the filters
-        count_query = select(func.count(col(CreditApplication.id))).select_from(
-            CreditApplication
+        query, count_query = _list_queries(
+            status is not None,
+            company_id is not None,
+            tuple(exclude_status) if exclude_status else (),
+            sort,
+            order,
         )
-
+        params: dict[str, Any] = {}
         if status:
-            count_query = count_query.where(CreditApplication.status == status)
+            params["status"] = status
         if company_id:
-            count_query = count_query.where(CreditApplication.company_id == company_id)
-        if exclude_status:
-            count_query = count_query.where(
-                col(CreditApplication.status).not_in(exclude_status)
-            )
-
-        total = (await self.session.execute(count_query)).scalar_one()
+            params["company_id"] = company_id
 
-        items = (
-            (await self.session.execute(query.offset(offset).limit(limit)))
-            .scalars()
-            .all()
+        total, items = await gather_reads(
+            self.session,
+            lambda s: scalar_one(s, count_query, params),
+            lambda s: scalars_all(s, query, {**params, **page_params(page, limit)}),
         )
         return items, total
 
@@ -69,57 +123,43 @@ class CreditApplicationRepository:
         self, application: CreditApplication
     ) -> CreditApplication:
         self.session.add(application)
-        await self.session.commit()
+        await self.session.flush()
         await self.session.refresh(application)
         return application
 
     async def get_application_by_id(
         self, application_id: UUID
     ) -> CreditApplication | None:
-        result = await self.session.execute(
-            select(CreditApplication).where(CreditApplication.id == application_id)
-        )
+        result = await self.session.execute(_BY_ID, {"application_id": application_id})
         application = result.scalars().first()
         return application
 
     async def update_application(
-        self, application_id: UUID, update_data: dict
+        self, application_id: UUID, update_data: dict, expected_version: int | None
     ) -> CreditApplication | None:
-        result = await self.session.execute(
-            select(CreditApplication).where(CreditApplication.id == application_id)
+        """Actualiza la solicitud si sigue en `expected_version`; None si no existe
+        o si otra escritura la cambió."""
+        return await compare_and_set(
+            self.session,
+            CreditApplication,
+            application_id,
+            update_data,
+            expected_version,
         )
-        application = result.scalars().first()
-        if not application:
-            return None
-        for key, value in update_data.items():
-            setattr(application, key, value)
-        await self.session.commit()
-        await self.session.refresh(application)
-        return application
 
     async def check_company_has_pending_application(self, company_id: UUID) -> bool:
         """Verifica si una empresa tiene solicitudes pendientes (no cuenta drafts)."""
         result = await self.session.execute(
-            select(CreditApplication).where(
-                CreditApplication.company_id == company_id,
-                col(CreditApplication.status).in_(
-                    [
-                        CreditApplicationStatus.pending,
-                        CreditApplicationStatus.in_review,
-                    ]
-                ),
-            )
+            _OPEN_FOR_COMPANY, {"company_id": company_id}
         )
         return result.scalars().first() is not None
 
     async def delete_application(self, application_id: UUID) -> bool:
         """Elimina una aplicación por su ID. Devuelve True si se eliminó, False si no existe."""
-        result = await self.session.execute(
-            select(CreditApplication).where(CreditApplication.id == application_id)
-        )
+        result = await self.session.execute(_BY_ID, {"application_id": application_id})
         application = result.scalars().first()
         if not application:
             return False
         await self.session.delete(application)
-        await self.session.commit()
+        await self.session.flush()
         return True
@@ -1,12 +1,67 @@
 from datetime import datetime
-from typing import Sequence
+from typing import Any, Sequence
 from uuid import UUID
 
+from sqlalchemy import Integer, bindparam, case, cast, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import desc, func, select
+from sqlmodel import col, desc, func, select
 
 from app.core.enums import DocumentStatus, SignatureStatus
+from app.core.parallel_reads import gather_reads
 from app.models.document import Document
+from app.repositories.sql import (
+    compare_and_set,
+    inline,
+    page_params,
+    paged,
+    scalar_one,
+    scalars_all,
+)
+
+# Sentencias preconstruidas (ver app/repositories/sql.py)
+_BY_ID = select(Document).where(Document.id == bindparam("document_id"))
+_BY_STORAGE_PATH = select(Document).where(
+    Document.storage_path == bindparam("storage_path")
+)
+_BY_SIGNATURE_REQUEST_ID = select(Document).where(
+    Document.signature_request_id == bindparam("signature_request_id")
+)
+_BY_SIGNATURE_REQUEST_IDS = select(Document).where(
+    col(Document.signature_request_id).in_(
+        bindparam("signature_request_ids", expanding=True)
+    )
+)
+_BY_USER = paged(
+    select(Document)
+    .where(Document.user_id == bindparam("user_id"))
+    .order_by(desc(Document.created_at))
+)
+_COUNT_BY_USER = (
+    select(func.count())
+    .select_from(Document)
+    .where(Document.user_id == bindparam("user_id"))
+)
+_BY_APPLICATION = paged(
+    select(Document)
+    .where(Document.application_id == bindparam("application_id"))
+    .order_by(desc(Document.created_at))
+)
+_COUNT_BY_APPLICATION = (
+    select(func.count())
+    .select_from(Document)
+    .where(Document.application_id == bindparam("application_id"))
+)
+_PENDING_SIGNATURES = (
+    select(Document)
+    .where(
+        # En línea para usar el índice parcial de firmas en curso
+        col(Document.signature_status)
+        == inline(col(Document.signature_status), SignatureStatus.pending),
+        col(Document.signature_request_id).is_not(None),
+    )
+    .order_by(col(Document.updated_at))
+    .limit(bindparam("limit", type_=Integer))
+)
 
 
 class DocumentRepository:
@@ -14,14 +69,12 @@ class DocumentRepository:
         self.session = session
 
     async def get_by_id(self, document_id: UUID) -> Document | None:
-        result = await self.session.execute(
-            select(Document).where(Document.id == document_id)
-        )
+        result = await self.session.execute(_BY_ID, {"document_id": document_id})
         return result.scalars().first()
 
     async def get_by_storage_path(self, storage_path: str) -> Document | None:
         result = await self.session.execute(
-            select(Document).where(Document.storage_path == storage_path)
+            _BY_STORAGE_PATH, {"storage_path": storage_path}
         )
         return result.scalars().first()
 
@@ -29,12 +82,22 @@ class DocumentRepository:
         self, signature_request_id: str
     ) -> Document | None:
         result = await self.session.execute(
-            select(Document).where(
-                Document.signature_request_id == signature_request_id
-            )
+            _BY_SIGNATURE_REQUEST_ID, {"signature_request_id": signature_request_id}
         )
         return result.scalars().first()
 
+    async def get_by_signature_request_ids(
+        self, signature_request_ids: Sequence[str]
+    ) -> Sequence[Document]:
+        """Obtiene en una sola consulta los documentos de varias solicitudes de firma."""
+        if not signature_request_ids:
+            return []
+        result = await self.session.execute(
+            _BY_SIGNATURE_REQUEST_IDS,
+            {"signature_request_ids": list(signature_request_ids)},
+        )
+        return result.scalars().all()
+
     async def list_by_user(
         self,
         user_id: UUID,
@@ -42,27 +105,12 @@ class DocumentRepository:
         page: int = 1,
         limit: int = 20,
     ) -> tuple[Sequence[Document], int]:
-        offset = (page - 1) * limit
-        query = (
-            select(Document)
-            .where(Document.user_id == user_id)
-            .order_by(desc(Document.created_at))
-        )
-
-        total = (
-            await self.session.execute(
-                select(func.count())
-                .select_from(Document)
-                .where(Document.user_id == user_id)
-            )
-        ).scalar_one()
-
-        items = (
-            (await self.session.execute(query.offset(offset).limit(limit)))
-            .scalars()
-            .all()
+        params = {"user_id": user_id}
+        total, items = await gather_reads(
+            self.session,
+            lambda s: scalar_one(s, _COUNT_BY_USER, params),
+            lambda s: scalars_all(s, _BY_USER, {**params, **page_params(page, limit)}),
         )
-
         return items, total
 
     async def list_by_application(
@@ -72,27 +120,14 @@ class DocumentRepository:
         page: int = 1,
         limit: int = 20,
     ) -> tuple[Sequence[Document], int]:
-        offset = (page - 1) * limit
-        query = (
-            select(Document)
-            .where(Document.application_id == application_id)
-            .order_by(desc(Document.created_at))
-        )
-
-        total = (
-            await self.session.execute(
-                select(func.count())
-                .select_from(Document)
-                .where(Document.application_id == application_id)
-            )
-        ).scalar_one()
-
-        items = (
-            (await self.session.execute(query.offset(offset).limit(limit)))
-            .scalars()
-            .all()
+        params = {"application_id": application_id}
+        total, items = await gather_reads(
+            self.session,
+            lambda s: scalar_one(s, _COUNT_BY_APPLICATION, params),
+            lambda s: scalars_all(
+                s, _BY_APPLICATION, {**params, **page_params(page, limit)}
+            ),
         )
-
         return items, total
 
     async def update_signature_status(
@@ -102,11 +137,16 @@ class DocumentRepository:
         signature_request_id: str | None = None,
         signed_at: datetime | None = None,
         signed_file_path: str | None = None,
+        *,
+        refresh: bool = True,
     ) -> Document | None:
-        result = await self.session.execute(
-            select(Document).where(Document.id == document_id)
-        )
-        document = result.scalars().first()
+        """Actualiza el estado de firma de un documento.
+
+        Con `refresh=False` no se recarga el documento tras el flush (p. ej. al
+        aplicar un lote de cambios que nadie vuelve a leer).
+        """
+        # session.get reutiliza el identity map si el documento ya fue cargado
+        document = await self.session.get(Document, document_id)
         if not document:
             return None
 
@@ -118,39 +158,112 @@ class DocumentRepository:
         if signed_file_path:
             document.signed_file_path = signed_file_path
 
-        await self.session.commit()
-        await self.session.refresh(document)
+        await self.session.flush()
+        if refresh:
+            await self.session.refresh(document)
         return document
 
+    async def list_pending_signatures(self, *, limit: int = 1000) -> Sequence[Document]:
+        """Documentos con firma en curso (`pending`), los más antiguos primero."""
+        result = await self.session.execute(_PENDING_SIGNATURES, {"limit": limit})
+        return result.scalars().all()
+
+    async def bulk_update_signature_status(self, updates: list[dict[str, Any]]) -> int:
+        """Aplica varios cambios de firma en un único UPDATE.
+
+        Cada elemento de `updates` contiene `id`, `signature_status`, `signed_at` y,
+        opcionalmente, `signed_file_path`. Solo se modifican documentos que siguen en `pending`,
+        de modo que un callback procesado en paralelo no se sobrescribe.
+
+        Returns:
+            Número de documentos actualizados
+        """
+        if not updates:
+            return 0
+        status_type = col(Document.signature_status).type
+        values: dict[str, Any] = {
+            "signature_status": case(
+                {u["id"]: cast(u["signature_status"], status_type) for u in updates},
+                value=col(Document.id),
+                else_=col(Document.signature_status),
+            )
+        }
+        for field in ("signed_at", "signed_file_path"):
+            column = col(getattr(Document, field))
+            whens = {
+                u["id"]: cast(u[field], column.type) for u in updates if u.get(field)
+            }
+            if whens:
+                values[field] = case(whens, value=col(Document.id), else_=column)
+        # Fuera del ORM: la versión se incrementa a mano (ver `compare_and_set`)
+        values["version"] = col(Document.version) + 1
+
+        stmt = (
+            update(Document)
+            .where(
+                col(Document.id).in_([u["id"] for u in updates]),
+                Document.signature_status == SignatureStatus.pending,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
     async def update_status(
         self,
         document_id: UUID,
         status: DocumentStatus,
+        expected_version: int | None = None,
     ) -> Document | None:
         """Actualiza el status de revisión de un documento.
 
         Args:
             document_id: ID del documento
             status: Nuevo estado (pending, approved, rejected)
+            expected_version: Versión leída por el cliente; None para no compararla
 
         Returns:
-            Document actualizado o None si no existe
+            Document actualizado o None si no existe o cambió de versión
         """
-        result = await self.session.execute(
-            select(Document).where(Document.id == document_id)
+        return await compare_and_set(
+            self.session, Document, document_id, {"status": status}, expected_version
         )
-        document = result.scalars().first()
-        if not document:
+
+    async def reserve_upload(
+        self,
+        document_id: UUID,
+        *,
+        storage_path: str,
+        bucket_name: str,
+        file_name: str,
+        mime_type: str,
+        upload: dict[str, Any],
+    ) -> Document | None:
+        """Reserva la ruta de storage de un placeholder antes de la subida.
+
+        El trigger `handle_storage_upload` reconoce el placeholder por esta ruta.
+        `upload` se guarda en `extra_metadata.upload` (tamaño máximo, expiración).
+
+        Returns:
+            Document actualizado o None si no existe o ya no está en `requested`
+        """
+        document = await self.session.get(Document, document_id)
+        if not document or document.status != DocumentStatus.requested:
             return None
 
-        document.status = status
-        await self.session.commit()
+        document.storage_path = storage_path
+        document.bucket_name = bucket_name
+        document.file_name = file_name
+        document.mime_type = mime_type
+        document.extra_metadata = {**(document.extra_metadata or {}), "upload": upload}
+        await self.session.flush()
         await self.session.refresh(document)
         return document
 
     async def create_document(self, document: Document) -> Document:
         """Crea un nuevo registro de documento (placeholder o real)."""
         self.session.add(document)
-        await self.session.commit()
+        await self.session.flush()
         await self.session.refresh(document)
         return document
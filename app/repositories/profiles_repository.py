@@ -1,25 +1,25 @@
 from uuid import UUID
 
+from sqlalchemy import bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from app.core.enums import UserRole
 from app.models.profile import Profile
 
+# Sentencias preconstruidas (ver app/repositories/sql.py)
+_BY_ID = select(Profile).where(Profile.id == bindparam("user_id"))
+
 
 class ProfileRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def read(self, user_id: UUID) -> Profile | None:
-        result = await self.session.execute(
-            select(Profile).where(Profile.id == user_id)
-        )
+        result = await self.session.execute(_BY_ID, {"user_id": user_id})
         return result.scalars().first()
 
     async def get_user_role(self, user_id: UUID) -> UserRole | None:
-        result = await self.session.execute(
-            select(Profile).where(Profile.id == user_id)
-        )
+        result = await self.session.execute(_BY_ID, {"user_id": user_id})
         profile = result.scalars().first()
         return profile.role if profile else None
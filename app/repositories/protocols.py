@@ -34,8 +34,10 @@ class CompanyRepositoryProtocol(Protocol):
         """Get company by user ID"""
         ...
 
-    async def update(self, company_id: UUID, data: dict[str, Any]) -> Company | None:
-        """Update company data"""
+    async def update(
+        self, company_id: UUID, data: dict[str, Any], expected_version: int | None
+    ) -> Company | None:
+        """Update company data if its version still matches"""
         ...
 
     async def list(
@@ -82,9 +84,9 @@ class CreditApplicationRepositoryProtocol(Protocol):
         ...
 
     async def update_application(
-        self, application_id: UUID, data: dict[str, Any]
+        self, application_id: UUID, data: dict[str, Any], expected_version: int | None
     ) -> CreditApplication | None:
-        """Update credit application data"""
+        """Update credit application data if its version still matches"""
         ...
 
     async def delete_application(self, application_id: UUID) -> bool:
@@ -109,6 +111,12 @@ class DocumentRepositoryProtocol(Protocol):
         """Get document by DocuSign signature request ID (envelope ID)"""
         ...
 
+    async def get_by_signature_request_ids(
+        self, signature_request_ids: Sequence[str]
+    ) -> Sequence[Document]:
+        """Get documents for several signature request IDs in one query"""
+        ...
+
     async def list_by_user(
         self, user_id: UUID, page: int = 1, limit: int = 20
     ) -> tuple[Sequence[Document], int]:
@@ -128,18 +136,42 @@ class DocumentRepositoryProtocol(Protocol):
         signature_request_id: str | None = None,
         signed_at: datetime | None = None,
         signed_file_path: str | None = None,
+        *,
+        refresh: bool = True,
     ) -> Document | None:
         """Update document signature status and related fields"""
         ...
 
+    async def list_pending_signatures(self, *, limit: int = 1000) -> Sequence[Document]:
+        """List documents whose signature is still pending, oldest first"""
+        ...
+
+    async def bulk_update_signature_status(self, updates: list[dict[str, Any]]) -> int:
+        """Apply several signature status changes in a single UPDATE"""
+        ...
+
     async def update_status(
         self,
         document_id: UUID,
         status: DocumentStatus,
+        expected_version: int | None = None,
     ) -> Document | None:
         """Update document review status (pending, approved, rejected, expired)"""
         ...
 
+    async def reserve_upload(
+        self,
+        document_id: UUID,
+        *,
+        storage_path: str,
+        bucket_name: str,
+        file_name: str,
+        mime_type: str,
+        upload: dict[str, Any],
+    ) -> Document | None:
+        """Reserve the storage path of a requested placeholder before upload"""
+        ...
+
     async def create_document(self, document: Document) -> Document:
         """Create a new document record (placeholder or actual upload)."""
         ...
@@ -0,0 +1,115 @@
+"""Utilidades de SQL compartidas por los repositorios.
+
+Las consultas de los repositorios se construyen una sola vez, a nivel de módulo,
+con `bindparam` en lugar de los valores de cada llamada. Armar un `select(...)`
+en cada llamada obliga a SQLAlchemy a recorrer el árbol nuevo para calcular la
+clave de su caché de compilación; una sentencia preconstruida memoriza esa clave
+y cada ejecución solo aporta los parámetros. Las consultas con partes opcionales
+(filtros, orden) se arman en funciones con `lru_cache`, una vez por combinación.
+`python -m perf.statements` mide la diferencia.
+"""
+
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from sqlalchemy import Executable, Integer, Update, bindparam, literal, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import GenerativeSelect
+
+S = TypeVar("S", bound=GenerativeSelect)
+M = TypeVar("M")
+
+# Cantidad de combinaciones de filtros/orden que se conservan por consulta
+QUERY_CACHE_SIZE = 128
+
+
+def inline(column: ColumnElement[Any], value: Any) -> ColumnElement[Any]:
+    """Compara contra `value` como literal en el SQL, no como parámetro.
+
+    Para los filtros que coinciden con el predicado de un índice parcial
+    (`status <> 'draft'`, `signature_status = 'pending'`): con un parámetro, el
+    plan genérico de un prepared statement no puede probar el predicado y
+    descarta el índice. Usar solo con valores de enums, nunca con datos del
+    usuario, y para filtros con pocos valores posibles.
+    """
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        return bindparam(
+            None,
+            list(value),
+            expanding=True,
+            literal_execute=True,
+            type_=column.type,
+        )
+    return literal(value, column.type, literal_execute=True)
+
+
+def paged(query: S) -> S:
+    """`query` con `LIMIT :limit OFFSET :offset`, para ejecutar con `page_params`."""
+    return query.offset(bindparam("offset", type_=Integer)).limit(
+        bindparam("limit", type_=Integer)
+    )
+
+
+def page_params(page: int, limit: int) -> dict[str, int]:
+    return {"offset": (page - 1) * limit, "limit": limit}
+
+
+# Conteo y página de un listado son independientes: los repositorios los piden
+# con `gather_reads` (app/core/parallel_reads.py), que les pasa la sesión
+async def scalar_one(
+    session: AsyncSession, statement: Executable, params: dict[str, Any] | None = None
+) -> Any:
+    return (await session.execute(statement, params)).scalar_one()
+
+
+async def scalars_all(
+    session: AsyncSession, statement: Executable, params: dict[str, Any] | None = None
+) -> Sequence[Any]:
+    return (await session.execute(statement, params)).scalars().all()
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _versioned_update(
+    model: type, fields: tuple[str, ...], check_version: bool
+) -> Update:
+    table = model.__table__  # type: ignore[attr-defined]
+    conditions = [model.id == bindparam("row_id")]  # type: ignore[attr-defined]
+    if check_version:
+        conditions.append(model.version == bindparam("expected_version"))  # type: ignore[attr-defined]
+    values: dict[Any, Any] = {
+        getattr(model, field): bindparam(f"set_{field}", type_=table.c[field].type)
+        for field in fields
+    }
+    values[model.version] = model.version + 1  # type: ignore[attr-defined]
+    return (
+        update(model)
+        .where(*conditions)
+        .values(values)
+        .returning(model)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def compare_and_set(
+    session: AsyncSession,
+    model: type[M],
+    row_id: Any,
+    values: dict[str, Any],
+    expected_version: int | None,
+) -> M | None:
+    """`UPDATE ... SET <values>, version = version + 1 WHERE id = :row_id AND
+    version = :expected_version RETURNING *`, sin leer antes ni bloquear la fila.
+
+    Devuelve la fila actualizada, o None si no existe o si otra escritura la
+    cambió desde que se leyó `expected_version`. Con `expected_version=None` no
+    se compara la versión (la escritura no depende de nada leído antes).
+    """
+    statement = _versioned_update(
+        model, tuple(sorted(values)), expected_version is not None
+    )
+    params = {"row_id": row_id, **{f"set_{k}": v for k, v in values.items()}}
+    if expected_version is not None:
+        params["expected_version"] = expected_version
+    return (await session.execute(statement, params)).scalars().first()
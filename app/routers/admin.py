@@ -0,0 +1,81 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import PlainTextResponse
+
+from app.core.admission import Priority, priority
+from app.core.query_tracking import query_budget
+from app.dependencies.auth import CurrentUserDep
+from app.dependencies.services import AdminServiceDep
+from app.schemas.admin import AllocationReportResponse, SlowQueryResponse
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/slow-queries", response_model=list[SlowQueryResponse])
+@query_budget(1)
+@priority(Priority.low)
+async def list_slow_queries(
+    service: AdminServiceDep,
+    user: CurrentUserDep,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+):
+    """Consultas SQL más lentas que el umbral configurado, de la más reciente a la
+    más antigua, con su plan cuando fue capturado (solo admin).
+
+    El registro es por proceso: con varios workers cada uno tiene el suyo.
+    """
+    return await service.list_slow_queries(user, limit)
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+@query_budget(1)
+@priority(Priority.low)
+async def profile(
+    service: AdminServiceDep,
+    user: CurrentUserDep,
+    seconds: Annotated[float, Query(gt=0, le=300)] = 10.0,
+    include_idle: bool = False,
+):
+    """Perfila este worker durante `seconds` (acotado por PROFILING_MAX_SECONDS)
+    con un profiler de muestreo y devuelve las pilas en formato folded, listo
+    para flamegraph.pl, inferno o speedscope (solo admin).
+    """
+    return PlainTextResponse(await service.profile(user, seconds, include_idle))
+
+
+@router.post("/memory/snapshot", response_model=AllocationReportResponse)
+@query_budget(1)
+@priority(Priority.low)
+async def memory_snapshot(
+    service: AdminServiceDep,
+    user: CurrentUserDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    """Toma un snapshot de tracemalloc y devuelve los sitios de asignación con más
+    memoria viva por ruta. El primero inicia tracemalloc (solo admin).
+    """
+    return await service.memory_snapshot(user, limit)
+
+
+@router.post("/memory/diff", response_model=AllocationReportResponse)
+@query_budget(1)
+@priority(Priority.low)
+async def memory_diff(
+    service: AdminServiceDep,
+    user: CurrentUserDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    """Toma un snapshot nuevo y devuelve cuánto cambió cada sitio por ruta desde el
+    anterior (solo admin).
+    """
+    return await service.memory_diff(user, limit)
+
+
+@router.delete("/memory", status_code=204)
+@query_budget(1)
+@priority(Priority.low)
+async def memory_stop(service: AdminServiceDep, user: CurrentUserDep):
+    """Detiene tracemalloc, que agrega costo a cada asignación (solo admin)."""
+    await service.memory_stop(user)
+    return Response(status_code=204)
@@ -1,8 +1,12 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
+from app.core.admission import Priority, priority
+from app.core.query_tracking import query_budget
+from app.core.rate_limit import rate_cost
 from app.dependencies.auth import CurrentUserDep
+from app.dependencies.preconditions import IfMatchDep, set_etag
 from app.dependencies.services import CompanyServiceDep
 from app.schemas.company import CompanyResponse, CompanyUpdate
 from app.schemas.pagination import Paginated, PaginatedParams, pagination_params
@@ -11,25 +15,39 @@ router = APIRouter(prefix="/companies", tags=["companies"])
 
 
 @router.get("/me", response_model=CompanyResponse)
+@query_budget(2)
 async def read_my_company(
     service: CompanyServiceDep,
     user: CurrentUserDep,
+    response: Response,
 ):
     """Devuelve la empresa asociada al usuario autenticado."""
-    return await service.get_company_by_user_id(user)
+    company = await service.get_company_by_user_id(user)
+    set_etag(response, company.version)
+    return company
 
 
 @router.patch("/me", response_model=CompanyResponse)
+@query_budget(2)
 async def update_my_company(
     service: CompanyServiceDep,
     company: CompanyUpdate,
     user: CurrentUserDep,
+    response: Response,
+    if_match: IfMatchDep,
 ):
-    """Actualiza parcialmente los datos de la empresa asociada al usuario autenticado."""
-    return await service.update_user_company(user, company)
+    """Actualiza parcialmente los datos de la empresa asociada al usuario autenticado.
+
+    Con `If-Match` (el ETag de la empresa leída) responde 412 si cambió desde
+    entonces; sin él, 409 si cambió durante este request.
+    """
+    updated = await service.update_user_company(user, company, if_match)
+    set_etag(response, updated.version)
+    return updated
 
 
 @router.get("/{company_id}", response_model=CompanyResponse)
+@query_budget(3)
 async def read_company(
     service: CompanyServiceDep,
     company_id: UUID,
@@ -40,6 +58,9 @@ async def read_company(
 
 
 @router.get("/", response_model=Paginated[CompanyResponse])
+@query_budget(4)
+@priority(Priority.low)
+@rate_cost(5)
 async def list_companies(
     service: CompanyServiceDep,
     user: CurrentUserDep,
@@ -2,8 +2,13 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
+from app.core.admission import Priority, priority
 from app.core.enums import CreditApplicationStatus
+from app.core.query_tracking import query_budget
+from app.core.rate_limit import rate_cost
 from app.dependencies.auth import CurrentUserDep
+from app.dependencies.idempotency import Idempotent
+from app.dependencies.preconditions import IfMatchDep, set_etag
 from app.dependencies.services import CreditApplicationServiceDep
 from app.schemas.credit_application import (
     CreditApplicationCreate,
@@ -29,6 +34,9 @@ ALLOWED_SORT_FIELDS = {
 
 
 @router.get("/", response_model=Paginated[CreditApplicationResponse])
+@query_budget(5)
+@priority(Priority.low)
+@rate_cost(5)
 async def list_credit_applications(
     service: CreditApplicationServiceDep,
     user: CurrentUserDep,
@@ -65,7 +73,10 @@ async def list_credit_applications(
     )
 
 
-@router.post("/", response_model=CreditApplicationResponse)
+# +2 consultas con Idempotency-Key: reserva y respuesta guardada
+@router.post("/", response_model=CreditApplicationResponse, dependencies=[Idempotent])
+@query_budget(8)
+@priority(Priority.high)
 async def create_credit_application(
     service: CreditApplicationServiceDep,
     application: CreditApplicationCreate,
@@ -76,25 +87,33 @@ async def create_credit_application(
 
 
 @router.get("/{application_id}", response_model=CreditApplicationResponse)
+@query_budget(4)
 async def get_credit_application(
     service: CreditApplicationServiceDep,
     application_id: UUID,
     user: CurrentUserDep,
+    response: Response,
 ):
     """Obtener una solicitud de crédito por su ID.
 
     - Los solicitantes solo pueden ver sus propias solicitudes.
     - Los operadores y administradores pueden ver todas las solicitudes.
     """
-    return await service.get_application_by_id(application_id, user)
+    application = await service.get_application_by_id(application_id, user)
+    set_etag(response, application.version)
+    return application
 
 
 @router.patch("/{application_id}", response_model=CreditApplicationResponse)
+@query_budget(4)
+@priority(Priority.high)
 async def update_credit_application(
     service: CreditApplicationServiceDep,
     application_id: UUID,
     application: CreditApplicationUpdate,
     user: CurrentUserDep,
+    response: Response,
+    if_match: IfMatchDep,
 ):
     """Actualizar parcialmente una solicitud de crédito.
 
@@ -106,11 +125,19 @@ async def update_credit_application(
     operators/admin:
     - Pueden cambiar el estado el estado de todas las solicitudes que no sean draft a cualquier otro estado excepto draft.
     - Pueden cambiar todos los demás campos.
+
+    Con `If-Match` (el ETag de la solicitud leída) responde 412 si otra edición
+    la cambió desde entonces; sin él, 409 si cambió durante este request.
     """
-    return await service.update_application(user, application_id, application)
+    updated = await service.update_application(
+        user, application_id, application, if_match
+    )
+    set_etag(response, updated.version)
+    return updated
 
 
 @router.delete("/{application_id}", status_code=204)
+@query_budget(6)
 async def delete_credit_application(
     service: CreditApplicationServiceDep,
     application_id: UUID,
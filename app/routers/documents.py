@@ -1,13 +1,21 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
+from app.core.admission import Priority, priority
+from app.core.deadlines import deadline
+from app.core.query_tracking import query_budget
+from app.core.rate_limit import rate_cost
 from app.dependencies.auth import CurrentUserDep
+from app.dependencies.idempotency import Idempotent
+from app.dependencies.preconditions import IfMatchDep, set_etag
 from app.dependencies.services import DocumentServiceDep
 from app.schemas.document import (
     DocumentRequest,
     DocumentResponse,
     DocumentUpdate,
+    DocumentUploadRequest,
+    DocumentUploadResponse,
     SignatureRequest,
     SignatureResponse,
 )
@@ -17,6 +25,9 @@ router = APIRouter(prefix="/documents", tags=["documents"])
 
 
 @router.get("/", response_model=Paginated[DocumentResponse])
+@query_budget(4)
+@priority(Priority.low)
+@rate_cost(5)
 async def list_documents(
     service: DocumentServiceDep,
     user: CurrentUserDep,
@@ -37,20 +48,31 @@ async def list_documents(
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
+@query_budget(3)
 async def get_document(
     service: DocumentServiceDep,
     document_id: UUID,
     user: CurrentUserDep,
+    response: Response,
 ):
     """Obtiene un documento por ID.
 
     Admin/operator pueden ver cualquier documento.
     Applicant solo puede ver sus propios documentos.
     """
-    return await service.get_document(document_id=document_id, user_sub=user.sub)
+    document = await service.get_document(document_id=document_id, user_sub=user.sub)
+    set_etag(response, document.version)
+    return document
 
 
-@router.post("/{document_id}/sign", response_model=SignatureResponse)
+# +2 consultas con Idempotency-Key: reserva y respuesta guardada
+@router.post(
+    "/{document_id}/sign", response_model=SignatureResponse, dependencies=[Idempotent]
+)
+@query_budget(8)
+@priority(Priority.high)
+# Storage y HelloSign en serie: más que REQUEST_DEADLINE
+@deadline(30)
 async def sign_document(
     service: DocumentServiceDep,
     document_id: UUID,
@@ -69,27 +91,59 @@ async def sign_document(
     )
 
 
+@router.post("/{document_id}/upload-url", response_model=DocumentUploadResponse)
+@query_budget(7)
+@priority(Priority.high)
+async def create_upload_url(
+    service: DocumentServiceDep,
+    document_id: UUID,
+    upload: DocumentUploadRequest,
+    user: CurrentUserDep,
+):
+    """Emite una URL firmada para subir el archivo de un documento solicitado.
+
+    El archivo se sube directamente a Supabase Storage (no pasa por la API).
+    Para archivos grandes incluye una sesión resumable (TUS) sobre la misma ruta.
+    Solo el solicitante dueño del documento o admin/operator pueden pedirla.
+    """
+    return await service.create_upload_url(
+        document_id=document_id,
+        upload=upload,
+        user_sub=user.sub,
+    )
+
+
 @router.patch("/{document_id}", response_model=DocumentResponse)
+@query_budget(3)
 async def update_document_status(
     service: DocumentServiceDep,
     document_id: UUID,
     document_update: DocumentUpdate,
     user: CurrentUserDep,
+    response: Response,
+    if_match: IfMatchDep,
 ):
     """Actualiza el status de revisión de un documento (solo admin/operator).
 
     Permite cambiar el estado de un documento entre: approved, rejected.
     Nota: "uploaded" lo establece el sistema cuando el usuario sube el archivo.
     Solo usuarios con rol admin u operator pueden actualizar el status.
+    Con `If-Match` (el ETag del documento leído) responde 412 si cambió desde
+    entonces.
     """
-    return await service.update_document_status(
+    document = await service.update_document_status(
         document_id=document_id,
         status=document_update.status,
         user_sub=user.sub,
+        if_match=if_match,
     )
+    set_etag(response, document.version)
+    return document
 
 
-@router.post("/request", response_model=DocumentResponse)
+# +2 consultas con Idempotency-Key: reserva y respuesta guardada
+@router.post("/request", response_model=DocumentResponse, dependencies=[Idempotent])
+@query_budget(6)
 async def request_document(
     service: DocumentServiceDep,
     payload: DocumentRequest,
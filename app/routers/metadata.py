@@ -1,13 +1,18 @@
 from typing import Sequence
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.core.enums import CreditApplicationPurpose
+from app.core.query_tracking import query_budget
+from app.core.rate_limit import limit_by_ip
 from app.schemas.credit_application import (
     CreditPurposeResponse,
 )
 
-router = APIRouter(prefix="/metadata", tags=["metadata"])
+# Sin JWT: rate limit por IP
+router = APIRouter(
+    prefix="/metadata", tags=["metadata"], dependencies=[Depends(limit_by_ip)]
+)
 
 
 CREDIT_PURPOSES_LABELS = {
@@ -21,6 +26,7 @@ CREDIT_PURPOSES_LABELS = {
 
 
 @router.get("/credit-purposes", response_model=Sequence[CreditPurposeResponse])
+@query_budget(0)
 async def list_credit_purposes():
     """Listado de propósitos de crédito válidos para el frontend."""
     return [
@@ -2,6 +2,7 @@ from uuid import UUID
 
 from fastapi import APIRouter
 
+from app.core.query_tracking import query_budget
 from app.dependencies.auth import CurrentUserDep
 from app.dependencies.services import ProfileServiceDep
 from app.schemas.profile import ProfileResponse
@@ -10,6 +11,7 @@ router = APIRouter(prefix="/profiles", tags=["profiles"])
 
 
 @router.get("/me", response_model=ProfileResponse)
+@query_budget(2)
 async def read_my_profile(
     service: ProfileServiceDep,
     user: CurrentUserDep,
@@ -20,6 +22,7 @@ async def read_my_profile(
 
 
 @router.get("/{user_id}", response_model=ProfileResponse)
+@query_budget(3)
 async def read_profile_by_id(
     user_id: UUID,
     service: ProfileServiceDep,
@@ -0,0 +1,36 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Form
+from fastapi.responses import PlainTextResponse
+
+from app.config import Settings, get_settings
+from app.core.admission import Priority, priority
+from app.core.query_tracking import query_budget
+from app.dependencies.services import SignatureEventQueueDep
+from app.services.signature_webhook_service import (
+    HELLOSIGN_ACK,
+    parse_hellosign_callback,
+)
+
+# Sin rate limit por IP: HelloSign envía todos los callbacks desde pocas IPs y
+# cada uno se valida con su `event_hash` (HMAC con la API key)
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+
+@router.post("/hellosign", response_class=PlainTextResponse)
+@query_budget(0)
+@priority(Priority.high)
+async def hellosign_callback(
+    queue: SignatureEventQueueDep,
+    payload: Annotated[str, Form(alias="json")],
+    settings: Settings = Depends(get_settings),
+):
+    """Recibe callbacks de HelloSign (sin JWT, validados con el `event_hash`).
+
+    Responde de inmediato; los cambios de `signature_status` se aplican en lote
+    desde una cola interna. Los eventos repetidos se ignoran.
+    """
+    event = parse_hellosign_callback(payload, settings.hellosign_api_key)
+    if event is not None:
+        queue.submit(event)
+    return HELLOSIGN_ACK
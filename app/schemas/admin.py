@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Annotated, Any
+
+from pydantic import BaseModel, Field
+
+
+class SlowQueryResponse(BaseModel):
+    """Consulta que superó el umbral de lentitud"""
+
+    statement: Annotated[
+        str, Field(description="SQL normalizada (literales reemplazados por ?)")
+    ]
+    parameters: Annotated[
+        str, Field(description="Tipos de los parámetros enviados (sin valores)")
+    ]
+    caller: Annotated[
+        str | None, Field(description="Método del repositorio que la ejecutó")
+    ]
+    duration_ms: Annotated[float, Field(description="Duración en milisegundos")]
+    occurred_at: Annotated[datetime, Field(description="Momento de la ejecución")]
+    plan: Annotated[
+        Any | None,
+        Field(description="Plan de EXPLAIN (FORMAT JSON), si fue capturado"),
+    ] = None
+    plan_error: Annotated[
+        str | None, Field(description="Error al capturar el plan, si lo hubo")
+    ] = None
+
+
+class AllocationSite(BaseModel):
+    """Línea de código con memoria asignada (o su variación)"""
+
+    site: Annotated[str, Field(description="archivo:línea de la asignación")]
+    size_bytes: Annotated[
+        int, Field(description="Bytes vivos (o diferencia, en un diff)")
+    ]
+
+
+class AllocationReportResponse(BaseModel):
+    """Sitios de asignación agrupados por ruta"""
+
+    traced_bytes: Annotated[
+        int, Field(description="Memoria rastreada por tracemalloc al tomarlo")
+    ]
+    peak_bytes: Annotated[int, Field(description="Pico rastreado por tracemalloc")]
+    routes: Annotated[
+        dict[str, list[AllocationSite]],
+        Field(
+            description="Top de sitios por ruta (`GET /api/v1/...`); lo no "
+            "atribuible a un endpoint va en `<sin ruta>`"
+        ),
+    ]
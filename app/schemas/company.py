@@ -35,6 +35,9 @@ class CompanyResponse(BaseModel):
     updated_at: Annotated[
         datetime, Field(description="Fecha de actualización de la empresa")
     ]
+    version: Annotated[
+        int, Field(description="Versión del recurso; enviarla en If-Match al editar")
+    ]
 
 
 class CompanyUpdate(BaseModel):
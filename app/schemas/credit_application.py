@@ -84,6 +84,9 @@ class CreditApplicationResponse(BaseModel):
     interest_rate: Annotated[Decimal | None, Field(description="Tasa de interés")]
     created_at: Annotated[datetime, Field(description="Fecha de creación")]
     updated_at: Annotated[datetime, Field(description="Fecha de actualización")]
+    version: Annotated[
+        int, Field(description="Versión del recurso; enviarla en If-Match al editar")
+    ]
 
 
 class CreditPurposeResponse(BaseModel):
@@ -40,6 +40,9 @@ class DocumentResponse(BaseModel):
     ]
     created_at: Annotated[datetime, Field(description="Fecha de creación")]
     updated_at: Annotated[datetime, Field(description="Fecha de actualización")]
+    version: Annotated[
+        int, Field(description="Versión del recurso; enviarla en If-Match al editar")
+    ]
 
 
 class SignatureRequest(BaseModel):
@@ -88,3 +91,43 @@ class DocumentRequest(BaseModel):
     application_id: Annotated[UUID, Field(description="ID de solicitud asociada")]
     document_type: Annotated[DocumentType, Field(description="Tipo de documento")]
     notes: Annotated[str, Field(description="Notas adicionales")]
+
+
+class DocumentUploadRequest(BaseModel):
+    """Schema para solicitar una URL de subida para un documento solicitado"""
+
+    file_name: Annotated[
+        str, Field(min_length=1, max_length=255, description="Nombre del archivo")
+    ]
+    file_size: Annotated[int, Field(gt=0, description="Tamaño declarado en bytes")]
+    mime_type: Annotated[str, Field(description="Tipo MIME del archivo")]
+
+
+class ResumableUploadSession(BaseModel):
+    """Datos para subir el archivo por partes con el protocolo TUS"""
+
+    endpoint: Annotated[str, Field(description="Endpoint TUS de Supabase Storage")]
+    chunk_size: Annotated[int, Field(description="Tamaño de cada parte en bytes")]
+    headers: Annotated[
+        dict[str, str], Field(description="Headers a enviar en cada petición TUS")
+    ]
+    upload_metadata: Annotated[
+        dict[str, str], Field(description="Valores de Upload-Metadata (sin codificar)")
+    ]
+
+
+class DocumentUploadResponse(BaseModel):
+    """URL firmada para subir el archivo directamente a Supabase Storage"""
+
+    document_id: Annotated[UUID, Field(description="ID del documento")]
+    bucket_name: Annotated[str, Field(description="Bucket de storage")]
+    storage_path: Annotated[str, Field(description="Ruta reservada en storage")]
+    upload_url: Annotated[str, Field(description="URL firmada para PUT del archivo")]
+    headers: Annotated[
+        dict[str, str], Field(description="Headers a enviar junto con el archivo")
+    ]
+    expires_at: Annotated[datetime, Field(description="Expiración de la URL")]
+    resumable: Annotated[
+        ResumableUploadSession | None,
+        Field(description="Sesión TUS para archivos grandes (opcional)"),
+    ]
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Annotated
+
+from pydantic import BaseModel, Field
+
+from app.core.enums import SignatureStatus
+
+
+class SignatureStatusEvent(BaseModel):
+    """Transición de firma derivada de un callback de HelloSign"""
+
+    event_id: Annotated[str, Field(description="ID del evento para deduplicación")]
+    signature_request_id: Annotated[
+        str, Field(description="ID de la solicitud de firma en HelloSign")
+    ]
+    signature_status: Annotated[
+        SignatureStatus, Field(description="Nuevo estado de firma")
+    ]
+    event_time: Annotated[datetime, Field(description="Fecha del evento")]
+    signed_at: Annotated[datetime | None, Field(None, description="Fecha de firma")]
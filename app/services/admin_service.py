@@ -0,0 +1,126 @@
+import asyncio
+import tracemalloc
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import UserRole
+from app.core.errors import NotFoundError
+from app.core.profiling import AllocationTracker, SamplingProfiler
+from app.core.slow_queries import SlowQueryLog
+from app.schemas.admin import (
+    AllocationReportResponse,
+    AllocationSite,
+    SlowQueryResponse,
+)
+from app.schemas.auth import Principal
+from app.services.base_service import BaseService
+
+
+class AdminService(BaseService):
+    """Herramientas de diagnóstico del proceso, solo para administradores."""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        slow_query_log: SlowQueryLog | None,
+        profiler: SamplingProfiler | None = None,
+        allocation_tracker: AllocationTracker | None = None,
+    ):
+        super().__init__(session)
+        self.slow_query_log = slow_query_log
+        self.profiler = profiler
+        self.allocation_tracker = allocation_tracker
+
+    async def list_slow_queries(
+        self, user: Principal, limit: int = 50
+    ) -> list[SlowQueryResponse]:
+        """Devuelve las consultas lentas más recientes de este proceso.
+
+        Raises:
+            ForbiddenError: Si el usuario no es admin
+            NotFoundError: Si el registro está desactivado (SLOW_QUERY_THRESHOLD_MS <= 0)
+        """
+        await self.assert_role(user.sub, UserRole.admin)
+        if self.slow_query_log is None:
+            raise NotFoundError("Registro de consultas lentas desactivado")
+        return [
+            SlowQueryResponse(
+                statement=entry.statement,
+                parameters=entry.parameters,
+                caller=entry.caller,
+                duration_ms=entry.duration_ms,
+                occurred_at=entry.occurred_at,
+                plan=entry.plan,
+                plan_error=entry.plan_error,
+            )
+            for entry in self.slow_query_log.recent(limit)
+        ]
+
+    async def profile(
+        self, user: Principal, seconds: float, include_idle: bool = False
+    ) -> str:
+        """Muestrea las pilas del proceso durante `seconds` (formato folded).
+
+        Raises:
+            ForbiddenError: Si el usuario no es admin
+            NotFoundError: Si el perfilado está desactivado (PROFILING_ENABLED)
+            ConflictError: Si ya hay un perfil en curso
+        """
+        await self.assert_role(user.sub, UserRole.admin)
+        if self.profiler is None:
+            raise NotFoundError("Perfilado desactivado")
+        # No retener una conexión del pool mientras dura el muestreo
+        await self.session.close()
+        return await asyncio.to_thread(
+            self.profiler.profile, seconds, include_idle=include_idle
+        )
+
+    async def memory_snapshot(
+        self, user: Principal, limit: int = 10
+    ) -> AllocationReportResponse:
+        """Toma un snapshot de tracemalloc (iniciándolo si hacía falta).
+
+        Raises:
+            ForbiddenError: Si el usuario no es admin
+            NotFoundError: Si el perfilado está desactivado (PROFILING_ENABLED)
+        """
+        tracker = await self._allocation_tracker(user)
+        return _allocation_report(await asyncio.to_thread(tracker.snapshot, limit))
+
+    async def memory_diff(
+        self, user: Principal, limit: int = 10
+    ) -> AllocationReportResponse:
+        """Compara un snapshot nuevo con el anterior.
+
+        Raises:
+            ForbiddenError: Si el usuario no es admin
+            NotFoundError: Si el perfilado está desactivado (PROFILING_ENABLED)
+            ConflictError: Si no hay un snapshot previo
+        """
+        tracker = await self._allocation_tracker(user)
+        return _allocation_report(await asyncio.to_thread(tracker.diff, limit))
+
+    async def memory_stop(self, user: Principal) -> None:
+        """Detiene tracemalloc y descarta el snapshot guardado."""
+        tracker = await self._allocation_tracker(user)
+        tracker.stop()
+
+    async def _allocation_tracker(self, user: Principal) -> AllocationTracker:
+        await self.assert_role(user.sub, UserRole.admin)
+        if self.allocation_tracker is None:
+            raise NotFoundError("Perfilado desactivado")
+        return self.allocation_tracker
+
+
+def _allocation_report(
+    routes: dict[str, list[tuple[str, int]]],
+) -> AllocationReportResponse:
+    traced, peak = tracemalloc.get_traced_memory()
+    return AllocationReportResponse(
+        traced_bytes=traced,
+        peak_bytes=peak,
+        routes={
+            route: [AllocationSite(site=site, size_bytes=size) for site, size in sites]
+            for route, sites in routes.items()
+        },
+    )
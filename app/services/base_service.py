@@ -1,25 +1,51 @@
+import inspect
+from collections.abc import Callable
+from typing import Any, TypeVar
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.enums import UserRole
-from app.core.errors import ForbiddenError
+from app.core.errors import (
+    ConflictError,
+    ForbiddenError,
+    PreconditionFailedError,
+    ServiceError,
+)
+from app.core.metrics import REGISTRY
+from app.core.parallel_reads import Read
+from app.core.tracing import traced
 from app.repositories.profiles_repository import ProfileRepository
 from app.repositories.protocols import ProfileRepositoryProtocol
 from app.schemas.pagination import PaginationMeta
 
+R = TypeVar("R")
+
+_ROLE_LOOKUPS = REGISTRY.counter(
+    "authz_role_lookups", "Consultas del rol del usuario en la BD (assert_role)"
+)
+
 
 class BaseService:
     """Servicio base con lógica común de autorización"""
 
+    def __init_subclass__(cls, **kwargs):
+        """Cada método público async de los servicios queda dentro de un span."""
+        super().__init_subclass__(**kwargs)
+        for name, member in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(member):
+                setattr(cls, name, traced(f"{cls.__name__}.{name}")(member))
+
     def __init__(
         self,
         session: AsyncSession,
         profile_repo: ProfileRepositoryProtocol | None = None,
     ):
         self.session = session
-        self.profile_repo = profile_repo or ProfileRepository(session)
+        self._repo_factories: dict[int, Callable[[AsyncSession], Any]] = {}
+        self.profile_repo = self._bind(profile_repo, ProfileRepository)
 
+    @traced()
     async def assert_role(self, user_sub: str, *allowed: UserRole) -> UserRole:
         """Verifica que el usuario tenga uno de los roles permitidos.
 
@@ -33,7 +59,22 @@ class BaseService:
         Raises:
             ForbiddenError: Si el usuario no tiene rol o no está autorizado
         """
+        _ROLE_LOOKUPS.inc()
         user_role = await self.profile_repo.get_user_role(UUID(user_sub))
+        return self._check_role(user_role, *allowed)
+
+    def _role_lookup(self, user_sub: str) -> Read:
+        """Lectura del rol para `gather_reads`; se valida luego con `_check_role`."""
+
+        def read(session: AsyncSession):
+            _ROLE_LOOKUPS.inc()
+            repo = self._repo(self.profile_repo, session)
+            return repo.get_user_role(UUID(user_sub))
+
+        return read
+
+    @staticmethod
+    def _check_role(user_role: UserRole | None, *allowed: UserRole) -> UserRole:
         if user_role is None:
             raise ForbiddenError("Perfil sin rol")
 
@@ -42,6 +83,43 @@ class BaseService:
 
         return user_role
 
+    @staticmethod
+    def _version_conflict(if_match: int | None) -> ServiceError:
+        """Error para un compare-and-set que no aplicó: 412 si el cliente envió
+        `If-Match`; 409 si la fila cambió durante el request."""
+        if if_match is not None:
+            return PreconditionFailedError(
+                "La versión del recurso no coincide con If-Match"
+            )
+        return ConflictError("El recurso fue modificado por otra operación")
+
+    @classmethod
+    def _check_if_match(cls, if_match: int | None, version: int) -> None:
+        """412 si el cliente envió `If-Match` con una versión que no es la leída."""
+        if if_match is not None and if_match != version:
+            raise cls._version_conflict(if_match)
+
+    def _bind(self, repo: R | None, factory: Callable[[AsyncSession], R]) -> R:
+        """El repositorio inyectado, o uno de `factory` sobre la sesión del servicio.
+
+        `_repo` usa `factory` para crear otro igual sobre una sesión de
+        `gather_reads`; un repositorio inyectado (p. ej. un doble en pruebas) se
+        reutiliza tal cual en todas las sesiones.
+        """
+        if repo is not None:
+            return repo
+        repo = factory(self.session)
+        self._repo_factories[id(repo)] = factory
+        return repo
+
+    def _repo(self, repo: R, session: AsyncSession) -> R:
+        """El repositorio del servicio, o uno igual sobre otra sesión de
+        `gather_reads` (lecturas en paralelo)."""
+        factory = self._repo_factories.get(id(repo))
+        if session is self.session or factory is None:
+            return repo
+        return factory(session)
+
     async def has_role(self, user_sub: str, role: UserRole) -> bool:
         """Verifica si el usuario tiene un rol específico.
 
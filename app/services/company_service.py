@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.enums import UserRole
 from app.core.errors import NotFoundError, ValidationDomainError
+from app.core.parallel_reads import gather_reads
 from app.repositories.companies_repository import CompanyRepository
 from app.repositories.protocols import (
     CompanyRepositoryProtocol,
@@ -25,13 +26,17 @@ class CompanyService(BaseService):
         profile_repo: ProfileRepositoryProtocol | None = None,
     ):
         super().__init__(session, profile_repo)
-        self.company_repo = company_repo or CompanyRepository(session)
+        self.company_repo = self._bind(company_repo, CompanyRepository)
 
     async def get_company_by_id(
         self, user: Principal, company_id: UUID
     ) -> CompanyResponse:
-        await self.assert_role(user.sub, UserRole.admin, UserRole.operator)
-        company = await self.company_repo.get_by_id(company_id)
+        role, company = await gather_reads(
+            self.session,
+            self._role_lookup(user.sub),
+            lambda s: self._repo(self.company_repo, s).get_by_id(company_id),
+        )
+        self._check_role(role, UserRole.admin, UserRole.operator)
         if not company:
             raise NotFoundError("Empresa no encontrada")
         return CompanyResponse.model_validate(company.model_dump())
@@ -46,18 +51,24 @@ class CompanyService(BaseService):
         self,
         user: Principal,
         company: CompanyUpdate,
+        if_match: int | None = None,
     ) -> CompanyResponse:
         existing = await self.company_repo.get_by_user_id(UUID(user.sub))
         if not existing:
             raise NotFoundError("Empresa no encontrada para el usuario dado")
+        self._check_if_match(if_match, existing.version)
 
         update_data = {k: v for k, v in company.model_dump().items() if v is not None}
         if not update_data:
             raise ValidationDomainError("No hay datos para actualizar")
 
-        updated = await self.company_repo.update(existing.id, update_data)
+        updated = await self.company_repo.update(
+            existing.id,
+            update_data,
+            existing.version,
+        )
         if not updated:
-            raise ValidationDomainError("Error al actualizar datos de la empresa")
+            raise self._version_conflict(if_match)
         return CompanyResponse.model_validate(updated.model_dump())
 
     async def list_companies(
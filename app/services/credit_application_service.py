@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.enums import CreditApplicationPurpose, CreditApplicationStatus, UserRole
 from app.core.errors import ForbiddenError, NotFoundError, ValidationDomainError
+from app.core.parallel_reads import gather_reads
 from app.models.credit_application import CreditApplication
 from app.repositories.companies_repository import CompanyRepository
 from app.repositories.credit_applications_repository import CreditApplicationRepository
@@ -33,8 +34,8 @@ class CreditApplicationService(BaseService):
         profile_repo: ProfileRepositoryProtocol | None = None,
     ):
         super().__init__(session, profile_repo)
-        self.app_repo = app_repo or CreditApplicationRepository(session)
-        self.company_repo = company_repo or CompanyRepository(session)
+        self.app_repo = self._bind(app_repo, CreditApplicationRepository)
+        self.company_repo = self._bind(company_repo, CompanyRepository)
 
     async def list_applications(
         self,
@@ -100,8 +101,14 @@ class CreditApplicationService(BaseService):
     async def get_application_by_id(
         self, application_id: UUID, user: Principal
     ) -> CreditApplicationResponse:
-        role = await self.assert_role(user.sub)
-        application = await self.app_repo.get_application_by_id(application_id)
+        role, application = await gather_reads(
+            self.session,
+            self._role_lookup(user.sub),
+            lambda s: self._repo(self.app_repo, s).get_application_by_id(
+                application_id
+            ),
+        )
+        role = self._check_role(role)
         if not application:
             raise NotFoundError("Solicitud no encontrada")
         if role == UserRole.applicant:
@@ -157,14 +164,24 @@ class CreditApplicationService(BaseService):
         user: Principal,
         application_id: UUID,
         application: CreditApplicationUpdate,
+        if_match: int | None = None,
     ) -> CreditApplicationResponse:
         """Actualiza parcialmente una aplicación de crédito según permisos:
         - Applicants: pueden editar sus propias solicitudes en estado 'draft'. No pueden editar solicitudes en estado 'pending' o superior.
         - Operators/Admins: pueden editar cualquier solicitud que no esté en estado 'draft'.
+
+        Con `if_match` distinto de la versión leída responde 412 sin más; la
+        escritura exige la versión leída, sobre la que se validaron los permisos.
         """
-        user_role = await self.assert_role(user.sub)
-        user_company = await self.company_repo.get_by_user_id(UUID(user.sub))
-        existing_app = await self.app_repo.get_application_by_id(application_id)
+        user_role, user_company, existing_app = await gather_reads(
+            self.session,
+            self._role_lookup(user.sub),
+            lambda s: self._repo(self.company_repo, s).get_by_user_id(UUID(user.sub)),
+            lambda s: self._repo(self.app_repo, s).get_application_by_id(
+                application_id
+            ),
+        )
+        user_role = self._check_role(user_role)
         update_data = {
             k: v for k, v in application.model_dump().items() if v is not None
         }
@@ -178,6 +195,8 @@ class CreditApplicationService(BaseService):
         if existing_app.company_id != user_company.id:
             raise ForbiddenError("Solicitud no pertenece a este usuario")
 
+        self._check_if_match(if_match, existing_app.version)
+
         if user_role == UserRole.applicant:
             if existing_app.status == CreditApplicationStatus.pending:
                 raise ForbiddenError("No puede editar una solicitud ya enviada")
@@ -214,10 +233,13 @@ class CreditApplicationService(BaseService):
         if not update_data:
             raise ValidationDomainError("No se proporcionaron campos para actualizar")
 
-        updated = await self.app_repo.update_application(application_id, update_data)
-
+        updated = await self.app_repo.update_application(
+            application_id,
+            update_data,
+            existing_app.version,
+        )
         if not updated:
-            raise ValidationDomainError("Error al actualizar la aplicación")
+            raise self._version_conflict(if_match)
 
         return CreditApplicationResponse.model_validate(updated.model_dump())
 
@@ -227,9 +249,14 @@ class CreditApplicationService(BaseService):
         - Applicants: solo pueden eliminar sus propias aplicaciones en estado 'draft' o 'pending'.
         - Operators/Admins: pueden eliminar (permiso elevado).
         """
-        role = await self.assert_role(user.sub)
-
-        existing_app = await self.app_repo.get_application_by_id(application_id)
+        role, existing_app = await gather_reads(
+            self.session,
+            self._role_lookup(user.sub),
+            lambda s: self._repo(self.app_repo, s).get_application_by_id(
+                application_id
+            ),
+        )
+        role = self._check_role(role)
         if not existing_app:
             raise NotFoundError("Solicitud no encontrada")
 
@@ -1,6 +1,10 @@
 """Servicio de documentos con workflow de firma digital (HelloSign)"""
 
-from datetime import datetime, timedelta, timezone
+import base64
+import json
+import re
+from datetime import UTC, datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
 from uuid import UUID
 
 import httpx
@@ -8,6 +12,7 @@ from dropbox_sign.api.embedded_api import EmbeddedApi
 from dropbox_sign.api.signature_request_api import SignatureRequestApi
 from dropbox_sign.api_client import ApiClient
 from dropbox_sign.configuration import Configuration
+from dropbox_sign.exceptions import OpenApiException
 from dropbox_sign.models.signature_request_create_embedded_request import (
     SignatureRequestCreateEmbeddedRequest,
 )
@@ -15,21 +20,51 @@ from dropbox_sign.models.sub_signature_request_signer import (
     SubSignatureRequestSigner,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 
 from app.config import Settings
 from app.core.enums import DocumentStatus, DocumentType, SignatureStatus, UserRole
-from app.core.errors import ForbiddenError, NotFoundError, ValidationDomainError
+from app.core.errors import (
+    ConflictError,
+    ForbiddenError,
+    NotFoundError,
+    ValidationDomainError,
+)
+from app.core.parallel_reads import gather_reads
+from app.core.resilience import (
+    HELLOSIGN,
+    STORAGE,
+    OutboundPolicy,
+    build_outbound_policies,
+)
+from app.core.tracing import inject
+from app.core.unit_of_work import manual_commit
 from app.models.document import Document
+from app.repositories.companies_repository import CompanyRepository
+from app.repositories.credit_applications_repository import CreditApplicationRepository
 from app.repositories.documents_repository import DocumentRepository
-from app.repositories.protocols import DocumentRepositoryProtocol
+from app.repositories.protocols import (
+    CompanyRepositoryProtocol,
+    CreditApplicationRepositoryProtocol,
+    DocumentRepositoryProtocol,
+)
 from app.schemas.document import (
     DocumentResponse,
+    DocumentUploadRequest,
+    DocumentUploadResponse,
+    ResumableUploadSession,
     SignatureRequest,
     SignatureResponse,
 )
 from app.schemas.pagination import Paginated
 from app.services.base_service import BaseService
 
+# Supabase Storage fija la validez de las URLs de subida firmadas en 2 horas
+UPLOAD_URL_TTL = timedelta(hours=2)
+# Supabase exige partes de exactamente 6 MB en subidas resumables
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+_UNSAFE_FILE_NAME_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
 
 class DocumentService(BaseService):
     """Servicio para gestionar documentos y workflow de firma digital con HelloSign"""
@@ -39,10 +74,18 @@ class DocumentService(BaseService):
         session: AsyncSession,
         settings: Settings,
         document_repo: DocumentRepositoryProtocol | None = None,
+        policies: dict[str, OutboundPolicy] | None = None,
+        company_repo: CompanyRepositoryProtocol | None = None,
+        app_repo: CreditApplicationRepositoryProtocol | None = None,
     ):
         super().__init__(session)
         self.settings = settings
-        self.document_repo = document_repo or DocumentRepository(session)
+        self.document_repo = self._bind(document_repo, DocumentRepository)
+        self.company_repo = self._bind(company_repo, CompanyRepository)
+        self.app_repo = self._bind(app_repo, CreditApplicationRepository)
+        # Las políticas se comparten a nivel de app para que el estado del
+        # circuit breaker y del bulkhead persista entre requests
+        self.policies = policies or build_outbound_policies(settings)
 
     async def get_document(self, document_id: UUID, user_sub: str) -> DocumentResponse:
         """Obtiene un documento por ID con verificación de permisos.
@@ -58,12 +101,12 @@ class DocumentService(BaseService):
             NotFoundError: Si el documento no existe
             ForbiddenError: Si el usuario no tiene acceso al documento
         """
-        document = await self.document_repo.get_by_id(document_id)
+        document, user_role = await self._document_and_role(document_id, user_sub)
         if not document:
             raise NotFoundError("Documento no encontrado")
 
         # Verificar permisos: admin/operator puede ver todo, applicant solo sus documentos
-        user_role = await self.assert_role(user_sub)
+        user_role = self._check_role(user_role)
         if user_role == UserRole.applicant and document.user_id != UUID(user_sub):
             raise ForbiddenError("No tiene acceso a este documento")
 
@@ -142,12 +185,12 @@ class DocumentService(BaseService):
             ForbiddenError: Si el usuario no tiene acceso o el documento ya está firmado
             ValidationError: Si hay errores en la integración con HelloSign
         """
-        document = await self.document_repo.get_by_id(document_id)
+        document, user_role = await self._document_and_role(document_id, user_sub)
         if not document:
             raise NotFoundError("Documento no encontrado")
 
         # Verificar permisos: solo el dueño o admin/operator pueden solicitar firma
-        user_role = await self.assert_role(user_sub)
+        user_role = self._check_role(user_role)
         if user_role == UserRole.applicant and document.user_id != UUID(user_sub):
             raise ForbiddenError("No tiene acceso a este documento")
 
@@ -161,16 +204,23 @@ class DocumentService(BaseService):
                 "El documento no tiene ruta de almacenamiento válida"
             )
 
-        document_url = self._get_storage_signed_url(
+        # Flujo largo: Storage y HelloSign pueden tardar segundos. Se cierra la
+        # transacción de lectura para devolver la conexión al pool durante las
+        # llamadas, y el resultado se confirma apenas se registra
+        manual_commit(self.session)
+        await self.session.commit()
+
+        document_url = await self._get_storage_signed_url(
             document.storage_path, document.bucket_name
         )
 
         # Crear Signature Request embebida en HelloSign
-        signing_url = ""
-        expires_at: datetime | None = None
-        signature_request_id = ""
+        hellosign = self.policies[HELLOSIGN]
         try:
-            configuration = Configuration(username=self.settings.hellosign_api_key)
+            configuration = Configuration(
+                username=self.settings.hellosign_api_key,
+                host=self.settings.hellosign_api_host,
+            )
             with ApiClient(configuration) as api_client:
                 sig_api = SignatureRequestApi(api_client)
                 emb_api = EmbeddedApi(api_client)
@@ -189,7 +239,13 @@ class DocumentService(BaseService):
                     file_urls=[document_url],
                 )
 
-                create_res = sig_api.signature_request_create_embedded(req)
+                # Crear la solicitud no es idempotente: sin reintentos
+                create_res = await hellosign.call_sync(
+                    lambda: sig_api.signature_request_create_embedded(
+                        req, _request_timeout=hellosign.timeout
+                    ),
+                    retry=False,
+                )
                 sr = create_res.signature_request
                 signature_request_id = sr.signature_request_id or ""
                 # Obtener el primer signature_id para la URL embebida
@@ -202,7 +258,11 @@ class DocumentService(BaseService):
                 if not signature_id:
                     raise ValidationDomainError("HelloSign no devolvió signature_id")
 
-                emb_res = emb_api.embedded_sign_url(signature_id)
+                emb_res = await hellosign.call_sync(
+                    lambda: emb_api.embedded_sign_url(
+                        signature_id, _request_timeout=hellosign.timeout
+                    )
+                )
                 signing_url = emb_res.embedded.sign_url or ""
 
                 # Agregar client_id y skip_domain_verification para test_mode
@@ -219,13 +279,20 @@ class DocumentService(BaseService):
 
                 exp_val = getattr(emb_res.embedded, "expires_at", None)
                 if exp_val is not None:
-                    expires_at = datetime.fromtimestamp(float(exp_val), tz=timezone.utc)
+                    expires_at = datetime.fromtimestamp(float(exp_val), tz=UTC)
                 else:
                     expires_at = None
-        except Exception as e:
+        except (OpenApiException, Urllib3HTTPError, ValueError) as e:
+            # Rechazos del SDK (4xx) o respuestas inválidas; las fallas
+            # transitorias ya salen de `call_sync` como 503/504
             raise ValidationDomainError(
                 f"Error creando solicitud de firma en HelloSign: {e}"
-            )
+            ) from e
+
+        # La revisión del operador pudo cambiar el documento (y su versión)
+        # durante las llamadas; la firma no depende de ella: releerlo
+        if document in self.session:
+            self.session.expire(document)
 
         # Actualizar documento con signature_request_id y estado pending
         await self.document_repo.update_signature_status(
@@ -233,16 +300,17 @@ class DocumentService(BaseService):
             signature_request_id=signature_request_id,
             signature_status=SignatureStatus.pending,
         )
+        await self.session.commit()
 
         # HelloSign controla la expiración de la URL retornada; si no viene, estimar 1 hora
-        expires_at = expires_at or (datetime.now(timezone.utc) + timedelta(hours=1))
+        expires_at = expires_at or (datetime.now(UTC) + timedelta(hours=1))
         return SignatureResponse(
             signature_request_id=signature_request_id,
             signing_url=signing_url,
             expires_at=expires_at,
         )
 
-    def _get_storage_signed_url(self, storage_path: str, bucket_name: str) -> str:
+    async def _get_storage_signed_url(self, storage_path: str, bucket_name: str) -> str:
         """Genera URL firmada temporal para acceder al documento en Supabase Storage.
 
         Args:
@@ -255,29 +323,203 @@ class DocumentService(BaseService):
         # Usar Supabase Storage API para generar signed URL
         # Esto requiere el service key para operaciones privilegiadas
         url = f"{self.settings.project_url}/storage/v1/object/sign/{bucket_name}/{storage_path}"
+        storage = self.policies[STORAGE]
 
-        try:
-            with httpx.Client() as client:
-                response = client.post(
+        async def sign() -> str:
+            async with httpx.AsyncClient(timeout=storage.timeout) as client:
+                response = await client.post(
                     url,
                     json={"expiresIn": 3600},  # 1 hora
-                    headers={
-                        "Authorization": f"Bearer {self.settings.supabase_service_key}",
-                        "apikey": self.settings.supabase_service_key,
-                    },
+                    headers=inject(
+                        {
+                            "Authorization": f"Bearer {self.settings.supabase_service_key}",
+                            "apikey": self.settings.supabase_service_key,
+                        }
+                    ),
                 )
                 response.raise_for_status()
-                signed_url = response.json()["signedURL"]
-                # La URL firmada es relativa, construir URL completa
-                return f"{self.settings.project_url}/storage/v1{signed_url}"
+                return response.json()["signedURL"]
+
+        try:
+            signed_url = await storage.call(sign)
         except httpx.HTTPError as e:
             raise ValidationDomainError(f"Error generando URL firmada: {e}")
+        # La URL firmada es relativa, construir URL completa
+        return f"{self.settings.project_url}/storage/v1{signed_url}"
+
+    async def create_upload_url(
+        self,
+        document_id: UUID,
+        upload: DocumentUploadRequest,
+        user_sub: str,
+    ) -> DocumentUploadResponse:
+        """Emite una URL firmada para subir el archivo de un documento solicitado.
+
+        Reserva en el placeholder la ruta de storage (que la URL firmada fija) y el
+        tamaño declarado, de modo que el trigger `handle_storage_upload` asocia la
+        subida al documento sin depender del metadata que envíe el cliente. Para
+        archivos grandes devuelve además una sesión TUS sobre la misma ruta.
+
+        Args:
+            document_id: ID del documento (debe estar en `requested`)
+            upload: Nombre, tamaño y tipo MIME del archivo a subir
+            user_sub: ID del usuario autenticado
+
+        Returns:
+            DocumentUploadResponse: URL firmada, headers y sesión resumable opcional
+
+        Raises:
+            NotFoundError: Si el documento no existe
+            ForbiddenError: Si el usuario no puede subir este documento
+            ConflictError: Si el documento no está pendiente de subida
+            ValidationDomainError: Si el archivo no cumple los límites
+        """
+        document, user_role = await self._document_and_role(document_id, user_sub)
+        if not document:
+            raise NotFoundError("Documento no encontrado")
+
+        user_role = self._check_role(user_role)
+        if user_role == UserRole.applicant and not await self._owns_document(
+            document, UUID(user_sub)
+        ):
+            raise ForbiddenError("No tiene acceso a este documento")
+
+        if document.status != DocumentStatus.requested:
+            raise ConflictError("El documento no está pendiente de subida")
+        if upload.file_size > self.settings.document_upload_max_bytes:
+            raise ValidationDomainError(
+                "El archivo excede el tamaño máximo de "
+                f"{self.settings.document_upload_max_bytes} bytes"
+            )
+        if upload.mime_type not in self.settings.document_upload_mime_types:
+            raise ValidationDomainError(
+                f"Tipo de archivo no permitido: {upload.mime_type}"
+            )
+
+        file_name = _safe_file_name(upload.file_name)
+        bucket_name = self.settings.document_upload_bucket
+        owner = document.application_id or document.user_id
+        storage_path = f"{owner}/{document.id}/{file_name}"
+
+        signed_path = await self._create_storage_upload_url(storage_path, bucket_name)
+        token = parse_qs(urlsplit(signed_path).query).get("token", [""])[0]
+        expires_at = datetime.now(UTC) + UPLOAD_URL_TTL
+
+        reserved = await self.document_repo.reserve_upload(
+            document.id,
+            storage_path=storage_path,
+            bucket_name=bucket_name,
+            file_name=file_name,
+            mime_type=upload.mime_type,
+            upload={
+                "max_size": upload.file_size,
+                "expires_at": expires_at.isoformat(),
+                "issued_to": user_sub,
+            },
+        )
+        if not reserved:
+            raise ConflictError("El documento no está pendiente de subida")
+
+        # user_metadata que el trigger espera (compatibilidad con subidas vía SDK)
+        user_metadata = {
+            "user_id": str(document.user_id),
+            "document_id": str(document.id),
+        }
+        if document.application_id:
+            user_metadata["application_id"] = str(document.application_id)
+        if document.document_type:
+            user_metadata["document_type"] = document.document_type.value
+
+        resumable = None
+        if upload.file_size > self.settings.document_resumable_threshold_bytes:
+            resumable = ResumableUploadSession(
+                endpoint=f"{self.settings.project_url}/storage/v1/upload/resumable",
+                chunk_size=TUS_CHUNK_SIZE,
+                headers={"x-signature": token, "x-upsert": "false"},
+                upload_metadata={
+                    "bucketName": bucket_name,
+                    "objectName": storage_path,
+                    "contentType": upload.mime_type,
+                    "metadata": json.dumps(user_metadata),
+                },
+            )
+
+        return DocumentUploadResponse(
+            document_id=document.id,
+            bucket_name=bucket_name,
+            storage_path=storage_path,
+            upload_url=f"{self.settings.project_url}/storage/v1{signed_path}",
+            headers={
+                "Content-Type": upload.mime_type,
+                "x-metadata": base64.b64encode(
+                    json.dumps(user_metadata).encode()
+                ).decode(),
+            },
+            expires_at=expires_at,
+            resumable=resumable,
+        )
+
+    async def _document_and_role(
+        self, document_id: UUID, user_sub: str
+    ) -> tuple[Document | None, UserRole | None]:
+        """Documento y rol del usuario en paralelo (ver `gather_reads`). El
+        documento va primero, en la sesión del request: luego se modifica."""
+        document, user_role = await gather_reads(
+            self.session,
+            lambda s: self._repo(self.document_repo, s).get_by_id(document_id),
+            self._role_lookup(user_sub),
+        )
+        return document, user_role
+
+    async def _owns_document(self, document: Document, user_id: UUID) -> bool:
+        """Un applicant puede subir sus documentos o los solicitados para una
+        solicitud de crédito de su empresa."""
+        if document.user_id == user_id:
+            return True
+        if document.application_id is None:
+            return False
+        company = await self.company_repo.get_by_user_id(user_id)
+        if not company:
+            return False
+        application = await self.app_repo.get_application_by_id(document.application_id)
+        return application is not None and application.company_id == company.id
+
+    async def _create_storage_upload_url(
+        self, storage_path: str, bucket_name: str
+    ) -> str:
+        """Pide a Supabase Storage una URL de subida firmada para `storage_path`.
+
+        Returns:
+            str: Ruta relativa a `/storage/v1` con el token de subida
+        """
+        url = f"{self.settings.project_url}/storage/v1/object/upload/sign/{bucket_name}/{storage_path}"
+        storage = self.policies[STORAGE]
+
+        async def sign() -> str:
+            async with httpx.AsyncClient(timeout=storage.timeout) as client:
+                response = await client.post(
+                    url,
+                    headers=inject(
+                        {
+                            "Authorization": f"Bearer {self.settings.supabase_service_key}",
+                            "apikey": self.settings.supabase_service_key,
+                        }
+                    ),
+                )
+                response.raise_for_status()
+                return response.json()["url"]
+
+        try:
+            return await storage.call(sign)
+        except httpx.HTTPError as e:
+            raise ValidationDomainError(f"Error generando URL de subida: {e}")
 
     async def update_document_status(
         self,
         document_id: UUID,
         status: DocumentStatus,
         user_sub: str,
+        if_match: int | None = None,
     ) -> DocumentResponse:
         """Actualiza el status de un documento (solo admin/operator).
 
@@ -285,6 +527,7 @@ class DocumentService(BaseService):
             document_id: ID del documento
             status: Nuevo estado (pending, approved, rejected)
             user_sub: ID del usuario autenticado
+            if_match: Versión que el cliente leyó; None para no compararla
 
         Returns:
             DocumentResponse: Documento actualizado
@@ -292,6 +535,7 @@ class DocumentService(BaseService):
         Raises:
             NotFoundError: Si el documento no existe
             ForbiddenError: Si el usuario no tiene permisos (debe ser admin/operator)
+            PreconditionFailedError: Si el documento ya no está en la versión `if_match`
         """
         # Verificar permisos: solo admin/operator pueden cambiar status
         user_role = await self.assert_role(user_sub)
@@ -304,9 +548,13 @@ class DocumentService(BaseService):
         document = await self.document_repo.update_status(
             document_id=document_id,
             status=status,
+            expected_version=if_match,
         )
         if not document:
-            raise NotFoundError("Documento no encontrado")
+            # Sin If-Match solo falla si no existe; con él, distinguir el 412
+            if if_match is None or not await self.document_repo.get_by_id(document_id):
+                raise NotFoundError("Documento no encontrado")
+            raise self._version_conflict(if_match)
 
         return DocumentResponse.model_validate(document, from_attributes=True)
 
@@ -348,3 +596,10 @@ class DocumentService(BaseService):
 
         created = await self.document_repo.create_document(doc)
         return DocumentResponse.model_validate(created, from_attributes=True)
+
+
+def _safe_file_name(file_name: str) -> str:
+    """Nombre de archivo apto para una ruta de storage (sin directorios)."""
+    name = file_name.replace("\\", "/").rsplit("/", 1)[-1]
+    name = _UNSAFE_FILE_NAME_CHARS.sub("_", name).strip("._")
+    return name[:200] or "archivo"
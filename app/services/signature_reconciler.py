@@ -0,0 +1,232 @@
+"""Reconciliación periódica de firmas pendientes contra HelloSign"""
+
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any
+
+from dropbox_sign.api.signature_request_api import SignatureRequestApi
+from dropbox_sign.api_client import ApiClient
+from dropbox_sign.configuration import Configuration
+from dropbox_sign.models.signature_request_response import SignatureRequestResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
+
+from app.config import Settings
+from app.core.enums import SignatureStatus
+from app.core.metrics import REGISTRY
+from app.core.resilience import HELLOSIGN, OutboundPolicy
+from app.core.tracing import traced
+from app.repositories.documents_repository import DocumentRepository
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock que elige al único worker que reconcilia en cada ciclo
+RECONCILER_LOCK_KEY = 0x5349474E
+_TRY_LOCK = text("SELECT pg_try_advisory_lock(:key)")
+_UNLOCK = text("SELECT pg_advisory_unlock(:key)")
+
+_RUNS = REGISTRY.counter(
+    "signature_reconciler_runs", "Ejecuciones del reconciliador", ["outcome"]
+)
+_PENDING = REGISTRY.gauge(
+    "signature_reconciler_pending_documents",
+    "Documentos con firma pending en la última ejecución",
+)
+_LAG = REGISTRY.gauge(
+    "signature_reconciler_lag_seconds",
+    "Antigüedad del documento con firma pending más antiguo",
+)
+_LAST_SUCCESS = REGISTRY.gauge(
+    "signature_reconciler_last_success_timestamp_seconds",
+    "Momento de la última reconciliación completada",
+)
+_PAGES = REGISTRY.counter(
+    "signature_reconciler_provider_pages", "Páginas consultadas a HelloSign"
+)
+_BATCH = REGISTRY.histogram(
+    "signature_reconciler_batch_size",
+    "Documentos actualizados por ejecución",
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000),
+)
+
+
+def provider_status_update(
+    document_id: Any, signature_request: SignatureRequestResponse
+) -> dict[str, Any] | None:
+    """Traduce el estado de HelloSign a un cambio de firma (None si sigue pendiente).
+
+    Como en el webhook, `signed_file_path` no se toma de `files_url`.
+    """
+    if signature_request.is_declined:
+        return {
+            "id": document_id,
+            "signature_status": SignatureStatus.declined,
+            "signed_at": None,
+        }
+    if signature_request.is_complete:
+        signed_ts = max(
+            (s.signed_at for s in signature_request.signatures or [] if s.signed_at),
+            default=None,
+        )
+        return {
+            "id": document_id,
+            "signature_status": SignatureStatus.signed,
+            "signed_at": (
+                datetime.fromtimestamp(signed_ts, tz=UTC)
+                if signed_ts
+                else datetime.now(UTC)
+            ),
+        }
+    return None
+
+
+class SignatureReconciler:
+    """Recupera los cambios de firma cuyos callbacks se perdieron.
+
+    En cada ciclo el worker que obtiene el advisory lock lee los documentos en
+    `pending`, recorre el listado paginado de HelloSign (en lugar de un
+    `signature_request_get` por documento) y aplica los cambios con un único
+    UPDATE. Cada paso con la base es una transacción corta: ninguna queda
+    abierta mientras se espera a HelloSign. El lock es de sesión y se suelta
+    al terminar el ciclo, también si falla.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        settings: Settings,
+        policies: dict[str, OutboundPolicy],
+    ):
+        self._session_maker = session_maker
+        self.settings = settings
+        self.hellosign = policies[HELLOSIGN]
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="signature-reconciler")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.signature_reconcile_interval)
+            try:
+                await self.run_once()
+            except Exception:
+                _RUNS.labels("error").inc()
+                logger.exception("Error reconciliando firmas pendientes")
+
+    @traced()
+    async def run_once(self) -> int:
+        """Ejecuta un ciclo de reconciliación. Devuelve los documentos actualizados."""
+        # El lock es de sesión: se toma y se suelta en la misma conexión, que
+        # queda reservada durante el ciclo pero sin transacción abierta
+        engine = self._session_maker.kw["bind"]
+        async with engine.connect() as connection:
+            acquired = (
+                await connection.execute(_TRY_LOCK, {"key": RECONCILER_LOCK_KEY})
+            ).scalar_one()
+            await connection.commit()
+            if not acquired:
+                _RUNS.labels("not_leader").inc()
+                return 0
+            try:
+                updated = await self._reconcile(connection)
+            finally:
+                await _unlock(connection)
+
+        _BATCH.observe(updated)
+        _LAST_SUCCESS.set(time.time())
+        _RUNS.labels("ok").inc()
+        return updated
+
+    async def _reconcile(self, connection: AsyncConnection) -> int:
+        async with self._session_maker(bind=connection) as session:
+            pending = await DocumentRepository(session).list_pending_signatures(
+                limit=self.settings.signature_reconcile_batch_limit
+            )
+            await session.commit()
+        _PENDING.set(len(pending))
+        _LAG.set(_age_seconds(pending[0].updated_at) if pending else 0)
+        if not pending:
+            return 0
+
+        # Las páginas de HelloSign se recorren sin transacción abierta
+        by_request_id = {str(d.signature_request_id): d.id for d in pending}
+        found = await self._fetch_provider_statuses(set(by_request_id))
+        updates: list[dict[str, Any]] = []
+        for request_id, signature_request in found.items():
+            update = provider_status_update(
+                by_request_id[request_id], signature_request
+            )
+            if update is not None:
+                updates.append(update)
+        if not updates:
+            return 0
+
+        async with self._session_maker(bind=connection) as session:
+            updated = await DocumentRepository(session).bulk_update_signature_status(
+                updates
+            )
+            await session.commit()
+        return updated
+
+    async def _fetch_provider_statuses(
+        self, pending_ids: set[str]
+    ) -> dict[str, SignatureRequestResponse]:
+        """Recorre el listado de HelloSign hasta encontrar todas las solicitudes
+        pendientes o agotar `signature_reconcile_max_pages`."""
+        found: dict[str, SignatureRequestResponse] = {}
+        configuration = Configuration(
+            username=self.settings.hellosign_api_key,
+            host=self.settings.hellosign_api_host,
+        )
+        with ApiClient(configuration) as api_client:
+            api = SignatureRequestApi(api_client)
+            page = 1
+            while page <= self.settings.signature_reconcile_max_pages:
+                res = await self.hellosign.call_sync(
+                    partial(
+                        api.signature_request_list,
+                        page=page,
+                        page_size=self.settings.signature_reconcile_page_size,
+                        _request_timeout=self.hellosign.timeout,
+                    )
+                )
+                _PAGES.inc()
+                for sr in res.signature_requests or []:
+                    if sr.signature_request_id in pending_ids:
+                        found[sr.signature_request_id] = sr
+                num_pages = res.list_info.num_pages if res.list_info else None
+                if len(found) == len(pending_ids) or page >= (num_pages or 0):
+                    break
+                page += 1
+        return found
+
+
+async def _unlock(connection: AsyncConnection) -> None:
+    try:
+        await connection.execute(_UNLOCK, {"key": RECONCILER_LOCK_KEY})
+        await connection.commit()
+    except BaseException:
+        # De vuelta al pool la conexión retendría el lock; cerrarla lo suelta
+        await connection.invalidate()
+        raise
+
+
+def _age_seconds(moment: datetime) -> float:
+    # documents.updated_at es TIMESTAMP sin zona en la BD (UTC)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return max((datetime.now(UTC) - moment).total_seconds(), 0.0)
@@ -0,0 +1,186 @@
+"""Ingesta de callbacks de HelloSign con deduplicación y actualizaciones en lote"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import UTC, datetime
+
+from dropbox_sign.event_callback_helper import EventCallbackHelper
+from dropbox_sign.models.event_callback_request import EventCallbackRequest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.enums import SignatureStatus
+from app.core.errors import UnauthorizedError, ValidationDomainError
+from app.core.tracing import traced
+from app.repositories.documents_repository import DocumentRepository
+from app.schemas.webhook import SignatureStatusEvent
+
+logger = logging.getLogger(__name__)
+
+# Respuesta que HelloSign espera para considerar el callback entregado
+HELLOSIGN_ACK = "Hello API Event Received"
+
+_EVENT_SIGNATURE_STATUS = {
+    "signature_request_all_signed": SignatureStatus.signed,
+    "signature_request_declined": SignatureStatus.declined,
+}
+
+
+def parse_hellosign_callback(raw: str, api_key: str) -> SignatureStatusEvent | None:
+    """Valida un callback de HelloSign y lo traduce a una transición de firma.
+
+    Args:
+        raw: Campo `json` del formulario enviado por HelloSign
+        api_key: API key usada para verificar el `event_hash`
+
+    Returns:
+        SignatureStatusEvent | None: Transición a aplicar, o None si el evento no
+        cambia el estado de firma (viewed, callback_test, etc.)
+
+    Raises:
+        ValidationDomainError: Si el payload no es un callback válido
+        UnauthorizedError: Si el `event_hash` no coincide
+    """
+    try:
+        callback = EventCallbackRequest.from_json(raw)
+    except ValueError as e:
+        raise ValidationDomainError(f"Payload de HelloSign inválido: {e}") from e
+    if callback is None:
+        raise ValidationDomainError("Payload de HelloSign vacío")
+
+    if not EventCallbackHelper.is_valid(api_key, callback):
+        raise UnauthorizedError("Hash del evento de HelloSign inválido")
+
+    event = callback.event
+    signature_status = _EVENT_SIGNATURE_STATUS.get(event.event_type)
+    signature_request = callback.signature_request
+    if (
+        signature_status is None
+        or signature_request is None
+        or not signature_request.signature_request_id
+    ):
+        return None
+
+    try:
+        event_time = datetime.fromtimestamp(int(event.event_time), tz=UTC)
+    except ValueError as e:
+        raise ValidationDomainError(f"event_time inválido: {event.event_time}") from e
+
+    # `signed_file_path` queda sin asignar: es una ruta de Storage y `files_url`
+    # es una URL temporal de HelloSign. Se completa al copiar el archivo firmado
+    signed = signature_status == SignatureStatus.signed
+    return SignatureStatusEvent(
+        event_id=f"{event.event_hash}:{signature_request.signature_request_id}",
+        signature_request_id=signature_request.signature_request_id,
+        signature_status=signature_status,
+        event_time=event_time,
+        signed_at=event_time if signed else None,
+    )
+
+
+class SignatureEventQueue:
+    """Cola interna que aplica en lotes los eventos de firma de HelloSign.
+
+    El endpoint responde en cuanto el evento queda encolado. Un único consumidor
+    agrupa hasta `batch_size` eventos (o los recibidos durante `flush_interval`
+    segundos) y los aplica en una sola transacción. Los eventos perdidos por un
+    fallo al aplicar el lote los recupera la reconciliación periódica.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        *,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        dedup_size: int = 10000,
+    ):
+        self._session_maker = session_maker
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._dedup_size = dedup_size
+        self._queue: asyncio.Queue[SignatureStatusEvent | None] = asyncio.Queue()
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._task: asyncio.Task | None = None
+
+    def submit(self, event: SignatureStatusEvent) -> bool:
+        """Encola un evento. Devuelve False si ya fue recibido (reintento de HelloSign)."""
+        if event.event_id in self._seen:
+            self._seen.move_to_end(event.event_id)
+            return False
+        self._seen[event.event_id] = None
+        if len(self._seen) > self._dedup_size:
+            self._seen.popitem(last=False)
+        self._queue.put_nowait(event)
+        return True
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="hellosign-event-queue")
+
+    async def stop(self) -> None:
+        """Aplica los eventos pendientes y detiene el consumidor."""
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            event = await self._queue.get()
+            if event is None:
+                break
+            batch = [event]
+            deadline = loop.time() + self._flush_interval
+            while len(batch) < self._batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+            await self._apply(batch)
+
+    @traced("SignatureEventQueue.apply")
+    async def _apply(self, batch: list[SignatureStatusEvent]) -> None:
+        # Para una misma solicitud de firma solo importa el evento más reciente
+        latest: dict[str, SignatureStatusEvent] = {}
+        for event in batch:
+            current = latest.get(event.signature_request_id)
+            if current is None or event.event_time >= current.event_time:
+                latest[event.signature_request_id] = event
+
+        try:
+            async with self._session_maker() as session:
+                repo = DocumentRepository(session)
+                documents = await repo.get_by_signature_request_ids(list(latest))
+                for document in documents:
+                    event = latest[str(document.signature_request_id)]
+                    # "signed" es terminal; tampoco se reescribe el mismo estado
+                    if document.signature_status in (
+                        SignatureStatus.signed,
+                        event.signature_status,
+                    ):
+                        continue
+                    await repo.update_signature_status(
+                        document_id=document.id,
+                        signature_status=event.signature_status,
+                        signed_at=event.signed_at,
+                        refresh=False,
+                    )
+                await session.commit()
+        except Exception:
+            logger.exception(
+                "Error aplicando lote de %d eventos de HelloSign", len(batch)
+            )
+            # HelloSign ya recibió el ACK y no reintenta: solo SignatureReconciler
+            # recupera estos cambios. Se olvidan para no descartar un duplicado
+            for event in batch:
+                self._seen.pop(event.event_id, None)
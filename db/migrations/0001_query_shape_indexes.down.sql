@@ -0,0 +1,26 @@
+-- ============================================================================
+-- Reversión de la migración 0001 (índices según las consultas)
+-- ============================================================================
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0001_query_shape_indexes.down.sql
+-- ============================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_id
+  ON public.documents USING btree (id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_application_id
+  ON public.documents USING btree (application_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_user_id
+  ON public.documents USING btree (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_docs_status
+  ON public.documents USING btree (status);
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_documents_pending_signature;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_documents_signature_request_id;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_documents_application_created;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_documents_user_created;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_companies_created_at;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_company_open;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_created_not_draft;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_status_created;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_company_created;
+
+DELETE FROM public.schema_migrations WHERE version = '0001_query_shape_indexes';
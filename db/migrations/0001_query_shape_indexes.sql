@@ -0,0 +1,89 @@
+-- ============================================================================
+-- Migración 0001: índices compuestos y parciales según las consultas de los
+-- repositorios
+-- ============================================================================
+-- Cada índice corresponde a un camino de acceso de app/repositories/*:
+--
+--   list_applications (applicant)      company_id = ? ORDER BY created_at
+--   list_applications (operator/admin) status NOT IN ('draft') ORDER BY created_at
+--   list_applications (status=?)       status = ? ORDER BY created_at
+--   check_company_has_pending_app.     company_id = ? AND status IN ('pending', 'in_review')
+--   companies.list                     ORDER BY created_at
+--   documents.list_by_user             user_id = ? ORDER BY created_at
+--   documents.list_by_application      application_id = ? ORDER BY created_at
+--   get_by_signature_request_id(s)     signature_request_id = ? / IN (...)
+--   list_pending_signatures            signature_status = 'pending' ORDER BY updated_at
+--
+-- Los filtros de los índices parciales se emiten como literales desde los
+-- repositorios (app/repositories/sql.py): con parámetros, el plan genérico de un
+-- prepared statement no puede usarlos.
+--
+-- También elimina idx_docs_status (duplicado de idx_documents_status),
+-- ix_documents_id (duplicado de documents_pkey) e ix_documents_user_id /
+-- ix_documents_application_id (prefijos de los nuevos compuestos).
+--
+-- Ejecutar fuera de una transacción: CREATE/DROP INDEX CONCURRENTLY no bloquea
+-- escrituras pero no admite BEGIN/COMMIT (psql sin -1 / --single-transaction):
+--
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0001_query_shape_indexes.sql
+--
+-- Es idempotente. Si una creación concurrente se interrumpe, el índice queda
+-- INVALID y IF NOT EXISTS no lo reconstruye: `python -m perf.index_check`
+-- los reporta; eliminarlos con DROP INDEX CONCURRENTLY y volver a ejecutar.
+-- Revertir con 0001_query_shape_indexes.down.sql.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS public.schema_migrations (
+  version VARCHAR(255) NOT NULL,
+  applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  CONSTRAINT schema_migrations_pkey PRIMARY KEY (version)
+);
+
+-- ----------------------------------------------------------------------------
+-- credit_applications
+-- ----------------------------------------------------------------------------
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_company_created
+  ON public.credit_applications USING btree (company_id, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_status_created
+  ON public.credit_applications USING btree (status, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_created_not_draft
+  ON public.credit_applications USING btree (created_at)
+  WHERE status <> 'draft'::credit_application_status;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_company_open
+  ON public.credit_applications USING btree (company_id)
+  WHERE status IN ('pending'::credit_application_status, 'in_review'::credit_application_status);
+
+-- ----------------------------------------------------------------------------
+-- companies
+-- ----------------------------------------------------------------------------
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_companies_created_at
+  ON public.companies USING btree (created_at);
+
+-- ----------------------------------------------------------------------------
+-- documents
+-- ----------------------------------------------------------------------------
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_user_created
+  ON public.documents USING btree (user_id, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_application_created
+  ON public.documents USING btree (application_id, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_signature_request_id
+  ON public.documents USING btree (signature_request_id)
+  WHERE signature_request_id IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_pending_signature
+  ON public.documents USING btree (updated_at)
+  WHERE signature_status = 'pending'::signature_status AND signature_request_id IS NOT NULL;
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_docs_status;
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_documents_id;
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_documents_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_documents_application_id;
+
+INSERT INTO public.schema_migrations (version)
+VALUES ('0001_query_shape_indexes')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,14 @@
+-- ============================================================================
+-- Reversión de la migración 0002 (índices para ordenar el listado)
+-- ============================================================================
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0002_sort_field_indexes.down.sql
+-- ============================================================================
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_updated_at_not_draft;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_interest_rate_not_draft;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_approved_amount_not_draft;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_risk_score_not_draft;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_term_months_not_draft;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_credit_applications_requested_amount_not_draft;
+
+DELETE FROM public.schema_migrations WHERE version = '0002_sort_field_indexes';
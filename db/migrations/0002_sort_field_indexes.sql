@@ -0,0 +1,49 @@
+-- ============================================================================
+-- Migración 0002: índices para ordenar el listado de operadores
+-- ============================================================================
+-- Los operadores y administradores listan solicitudes con
+-- `status NOT IN ('draft') ORDER BY <campo>` y pueden ordenar por cualquiera de
+-- ALLOWED_SORT_FIELDS (app/routers/credit_applications.py). Sin un índice por
+-- campo, cada página recorre la tabla entera y la ordena. Ya tenían camino:
+-- id (PK), status (idx_credit_applications_status_created) y created_at
+-- (idx_credit_applications_created_not_draft). Los solicitantes filtran por
+-- company_id y ordenan pocas filas, así que no los necesitan.
+--
+-- Son parciales (sin borradores) como el de created_at: el filtro se emite como
+-- literal desde el repositorio. Un índice btree sirve en ambos sentidos, y el
+-- DESC por defecto de Postgres (NULLS FIRST) coincide con el recorrido inverso.
+--
+-- Ejecutar fuera de una transacción, igual que 0001:
+--
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0002_sort_field_indexes.sql
+--
+-- Revertir con 0002_sort_field_indexes.down.sql.
+-- ============================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_requested_amount_not_draft
+  ON public.credit_applications USING btree (requested_amount)
+  WHERE status <> 'draft'::credit_application_status;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_term_months_not_draft
+  ON public.credit_applications USING btree (term_months)
+  WHERE status <> 'draft'::credit_application_status;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_risk_score_not_draft
+  ON public.credit_applications USING btree (risk_score)
+  WHERE status <> 'draft'::credit_application_status;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_approved_amount_not_draft
+  ON public.credit_applications USING btree (approved_amount)
+  WHERE status <> 'draft'::credit_application_status;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_interest_rate_not_draft
+  ON public.credit_applications USING btree (interest_rate)
+  WHERE status <> 'draft'::credit_application_status;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_applications_updated_at_not_draft
+  ON public.credit_applications USING btree (updated_at)
+  WHERE status <> 'draft'::credit_application_status;
+
+INSERT INTO public.schema_migrations (version)
+VALUES ('0002_sort_field_indexes')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,9 @@
+-- ============================================================================
+-- Reversión de la migración 0003 (baldes de rate limiting)
+-- ============================================================================
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0003_rate_limit_buckets.down.sql
+-- ============================================================================
+
+DROP TABLE IF EXISTS public.rate_limit_buckets;
+
+DELETE FROM public.schema_migrations WHERE version = '0003_rate_limit_buckets';
@@ -0,0 +1,27 @@
+-- ============================================================================
+-- Migración 0003: baldes de rate limiting compartidos entre workers
+-- ============================================================================
+-- Con RATE_LIMIT_BACKEND=postgres cada request consume tokens de su balde
+-- (`user:<sub>` o `ip:<host>`) con un upsert atómico sobre esta tabla
+-- (app/core/rate_limit.py). Es UNLOGGED: perder los baldes en un crash solo
+-- los deja llenos, y así cada request no escribe en el WAL. RLS sin políticas
+-- la oculta de la API REST de Supabase; el backend se conecta como dueño.
+--
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0003_rate_limit_buckets.sql
+--
+-- Revertir con 0003_rate_limit_buckets.down.sql.
+-- ============================================================================
+
+CREATE UNLOGGED TABLE IF NOT EXISTS public.rate_limit_buckets (
+  key TEXT NOT NULL,
+  tokens DOUBLE PRECISION NOT NULL,
+  allowed BOOLEAN NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+  CONSTRAINT rate_limit_buckets_pkey PRIMARY KEY (key)
+);
+
+ALTER TABLE public.rate_limit_buckets ENABLE ROW LEVEL SECURITY;
+
+INSERT INTO public.schema_migrations (version)
+VALUES ('0003_rate_limit_buckets')
+ON CONFLICT (version) DO NOTHING;
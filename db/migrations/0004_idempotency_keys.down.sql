@@ -0,0 +1,9 @@
+-- ============================================================================
+-- Reversión de la migración 0004 (claves de idempotencia)
+-- ============================================================================
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0004_idempotency_keys.down.sql
+-- ============================================================================
+
+DROP TABLE IF EXISTS public.idempotency_keys;
+
+DELETE FROM public.schema_migrations WHERE version = '0004_idempotency_keys';
@@ -0,0 +1,36 @@
+-- ============================================================================
+-- Migración 0004: claves de idempotencia
+-- ============================================================================
+-- Los POST que crean recursos (solicitudes de crédito, documentos y firmas)
+-- aceptan `Idempotency-Key`. Cada fila reserva una clave por usuario mientras
+-- el primer request está en curso (locked_until) y luego guarda su respuesta
+-- para devolverla en los reintentos (app/core/idempotency.py). La aplicación
+-- borra las filas vencidas (expires_at) de forma periódica; el índice sirve
+-- a ese DELETE. RLS sin políticas la oculta de la API REST de Supabase.
+--
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0004_idempotency_keys.sql
+--
+-- Revertir con 0004_idempotency_keys.down.sql.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS public.idempotency_keys (
+  user_id UUID NOT NULL,
+  key VARCHAR(255) NOT NULL,
+  fingerprint CHAR(64) NOT NULL,
+  status_code INTEGER NULL,
+  content_type VARCHAR(255) NULL,
+  body BYTEA NULL,
+  locked_until TIMESTAMPTZ NULL,
+  expires_at TIMESTAMPTZ NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  CONSTRAINT idempotency_keys_pkey PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at
+  ON public.idempotency_keys USING btree (expires_at);
+
+ALTER TABLE public.idempotency_keys ENABLE ROW LEVEL SECURITY;
+
+INSERT INTO public.schema_migrations (version)
+VALUES ('0004_idempotency_keys')
+ON CONFLICT (version) DO NOTHING;
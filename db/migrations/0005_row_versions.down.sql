@@ -0,0 +1,16 @@
+-- ============================================================================
+-- Reversión de la migración 0005 (columna version)
+-- ============================================================================
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0005_row_versions.down.sql
+-- ============================================================================
+
+DROP TRIGGER IF EXISTS bump_documents_version ON public.documents;
+DROP TRIGGER IF EXISTS bump_credit_applications_version ON public.credit_applications;
+DROP TRIGGER IF EXISTS bump_companies_version ON public.companies;
+DROP FUNCTION IF EXISTS public.bump_row_version();
+
+ALTER TABLE public.documents DROP COLUMN IF EXISTS version;
+ALTER TABLE public.credit_applications DROP COLUMN IF EXISTS version;
+ALTER TABLE public.companies DROP COLUMN IF EXISTS version;
+
+DELETE FROM public.schema_migrations WHERE version = '0005_row_versions';
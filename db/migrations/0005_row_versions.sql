@@ -0,0 +1,49 @@
+-- ============================================================================
+-- Migración 0005: columna version para concurrencia optimista
+-- ============================================================================
+-- Los PATCH de solicitudes, documentos y empresas escriben con un único
+-- `UPDATE ... WHERE id = :id AND version = :v RETURNING *` (compare-and-set,
+-- sin bloquear la fila): si otra escritura cambió la fila desde que se leyó,
+-- la API responde 409, o 412 si el cliente envió `If-Match`.
+--
+-- ADD COLUMN con un DEFAULT constante no reescribe la tabla (Postgres 11+).
+-- El trigger bump_row_version incrementa la versión en los UPDATE que no la
+-- tocan (handle_storage_upload, SQL manual); la API la incrementa ella misma.
+--
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f db/migrations/0005_row_versions.sql
+--
+-- Revertir con 0005_row_versions.down.sql.
+-- ============================================================================
+
+ALTER TABLE public.companies ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE public.credit_applications ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE public.documents ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION public.bump_row_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.version = OLD.version THEN
+    NEW.version = OLD.version + 1;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_companies_version ON public.companies;
+CREATE TRIGGER bump_companies_version
+  BEFORE UPDATE ON public.companies
+  FOR EACH ROW EXECUTE FUNCTION public.bump_row_version();
+
+DROP TRIGGER IF EXISTS bump_credit_applications_version ON public.credit_applications;
+CREATE TRIGGER bump_credit_applications_version
+  BEFORE UPDATE ON public.credit_applications
+  FOR EACH ROW EXECUTE FUNCTION public.bump_row_version();
+
+DROP TRIGGER IF EXISTS bump_documents_version ON public.documents;
+CREATE TRIGGER bump_documents_version
+  BEFORE UPDATE ON public.documents
+  FOR EACH ROW EXECUTE FUNCTION public.bump_row_version();
+
+INSERT INTO public.schema_migrations (version)
+VALUES ('0005_row_versions')
+ON CONFLICT (version) DO NOTHING;
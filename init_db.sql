@@ -111,6 +111,7 @@ CREATE TABLE public.companies (
   address JSONB NOT NULL,
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  version INTEGER NOT NULL DEFAULT 1,
   CONSTRAINT companies_pkey PRIMARY KEY (id),
   CONSTRAINT companies_tax_id_key UNIQUE (tax_id),
   CONSTRAINT companies_user_id_key UNIQUE (user_id),
@@ -142,6 +143,7 @@ CREATE TABLE public.credit_applications (
   interest_rate NUMERIC(5, 2) NULL,
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  version INTEGER NOT NULL DEFAULT 1,
   CONSTRAINT credit_applications_pkey PRIMARY KEY (id),
   CONSTRAINT credit_applications_company_id_fkey FOREIGN KEY (company_id) REFERENCES public.companies(id) ON DELETE CASCADE,
   CONSTRAINT credit_applications_requested_amount_check CHECK (requested_amount > 0::numeric),
@@ -185,6 +187,7 @@ CREATE TABLE public.documents (
   created_at TIMESTAMP NOT NULL DEFAULT NOW(),
   updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
   status document_status NOT NULL DEFAULT 'pending'::document_status,
+  version INTEGER NOT NULL DEFAULT 1,
   CONSTRAINT documents_pkey PRIMARY KEY (id),
   CONSTRAINT fk_documents_application FOREIGN KEY (application_id) REFERENCES public.credit_applications(id) ON DELETE CASCADE,
   CONSTRAINT fk_documents_user FOREIGN KEY (user_id) REFERENCES public.profiles(id) ON DELETE CASCADE
@@ -199,12 +202,74 @@ COMMENT ON COLUMN public.documents.signature_request_id IS 'ID de solicitud de f
 COMMENT ON COLUMN public.documents.signature_status IS 'Estado de firma: unsigned, pending, signed, declined';
 COMMENT ON COLUMN public.documents.signed_file_path IS 'Ruta del archivo firmado en storage';
 
-CREATE INDEX IF NOT EXISTS ix_documents_id ON public.documents USING btree (id);
-CREATE INDEX IF NOT EXISTS ix_documents_application_id ON public.documents USING btree (application_id);
-CREATE INDEX IF NOT EXISTS ix_documents_user_id ON public.documents USING btree (user_id);
 CREATE UNIQUE INDEX IF NOT EXISTS ix_documents_storage_path ON public.documents USING btree (storage_path);
 CREATE INDEX IF NOT EXISTS idx_documents_status ON public.documents USING btree (status);
-CREATE INDEX IF NOT EXISTS idx_docs_status ON public.documents USING btree (status);
+
+-- ----------------------------------------------------------------------------
+-- Baldes de rate limiting (RATE_LIMIT_BACKEND=postgres, ver app/core/rate_limit.py)
+-- ----------------------------------------------------------------------------
+CREATE UNLOGGED TABLE public.rate_limit_buckets (
+  key TEXT NOT NULL,
+  tokens DOUBLE PRECISION NOT NULL,
+  allowed BOOLEAN NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+  CONSTRAINT rate_limit_buckets_pkey PRIMARY KEY (key)
+);
+ALTER TABLE public.rate_limit_buckets ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.rate_limit_buckets IS 'Token buckets por usuario o IP; sin WAL, perderlos solo los rellena';
+
+-- ----------------------------------------------------------------------------
+-- Claves de idempotencia de los POST (ver app/core/idempotency.py)
+-- ----------------------------------------------------------------------------
+CREATE TABLE public.idempotency_keys (
+  user_id UUID NOT NULL,
+  key VARCHAR(255) NOT NULL,
+  fingerprint CHAR(64) NOT NULL,
+  status_code INTEGER NULL,
+  content_type VARCHAR(255) NULL,
+  body BYTEA NULL,
+  locked_until TIMESTAMPTZ NULL,
+  expires_at TIMESTAMPTZ NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  CONSTRAINT idempotency_keys_pkey PRIMARY KEY (user_id, key)
+);
+ALTER TABLE public.idempotency_keys ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.idempotency_keys IS 'Reserva por (usuario, Idempotency-Key) y respuesta guardada para los reintentos';
+COMMENT ON COLUMN public.idempotency_keys.fingerprint IS 'SHA-256 de método, ruta y cuerpo del request original';
+COMMENT ON COLUMN public.idempotency_keys.locked_until IS 'Vencimiento de la reserva mientras el request está en curso';
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON public.idempotency_keys USING btree (expires_at);
+
+-- ----------------------------------------------------------------------------
+-- Índices según las consultas de los repositorios
+-- (db/migrations/0001_query_shape_indexes.sql y 0002_sort_field_indexes.sql
+-- explican cada uno)
+-- ----------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_credit_applications_company_created ON public.credit_applications USING btree (company_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_credit_applications_status_created ON public.credit_applications USING btree (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_credit_applications_created_not_draft ON public.credit_applications USING btree (created_at) WHERE status <> 'draft'::credit_application_status;
+CREATE INDEX IF NOT EXISTS idx_credit_applications_company_open ON public.credit_applications USING btree (company_id) WHERE status IN ('pending'::credit_application_status, 'in_review'::credit_application_status);
+CREATE INDEX IF NOT EXISTS idx_credit_applications_requested_amount_not_draft ON public.credit_applications USING btree (requested_amount) WHERE status <> 'draft'::credit_application_status;
+CREATE INDEX IF NOT EXISTS idx_credit_applications_term_months_not_draft ON public.credit_applications USING btree (term_months) WHERE status <> 'draft'::credit_application_status;
+CREATE INDEX IF NOT EXISTS idx_credit_applications_risk_score_not_draft ON public.credit_applications USING btree (risk_score) WHERE status <> 'draft'::credit_application_status;
+CREATE INDEX IF NOT EXISTS idx_credit_applications_approved_amount_not_draft ON public.credit_applications USING btree (approved_amount) WHERE status <> 'draft'::credit_application_status;
+CREATE INDEX IF NOT EXISTS idx_credit_applications_interest_rate_not_draft ON public.credit_applications USING btree (interest_rate) WHERE status <> 'draft'::credit_application_status;
+CREATE INDEX IF NOT EXISTS idx_credit_applications_updated_at_not_draft ON public.credit_applications USING btree (updated_at) WHERE status <> 'draft'::credit_application_status;
+CREATE INDEX IF NOT EXISTS idx_companies_created_at ON public.companies USING btree (created_at);
+CREATE INDEX IF NOT EXISTS idx_documents_user_created ON public.documents USING btree (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_documents_application_created ON public.documents USING btree (application_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_documents_signature_request_id ON public.documents USING btree (signature_request_id) WHERE signature_request_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_documents_pending_signature ON public.documents USING btree (updated_at) WHERE signature_status = 'pending'::signature_status AND signature_request_id IS NOT NULL;
+
+-- Migraciones de db/migrations/ ya incluidas en este script
+CREATE TABLE IF NOT EXISTS public.schema_migrations (
+  version VARCHAR(255) NOT NULL,
+  applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  CONSTRAINT schema_migrations_pkey PRIMARY KEY (version)
+);
+INSERT INTO public.schema_migrations (version) VALUES ('0001_query_shape_indexes'), ('0002_sort_field_indexes'), ('0003_rate_limit_buckets'), ('0004_idempotency_keys'), ('0005_row_versions') ON CONFLICT (version) DO NOTHING;
 
 -- ============================================================================
 -- 3. FUNCIONES
@@ -301,6 +366,7 @@ $$;
 -- Crea registro en documents cuando se sube archivo a storage
 -- Extrae metadata (user_id, application_id, document_type) y valida permisos
 -- Soporta placeholders: si viene document_id, actualiza el registro existente
+-- Las rutas reservadas por la API se asocian al placeholder sin mirar metadata
 -- ----------------------------------------------------------------------------
 CREATE OR REPLACE FUNCTION public.handle_storage_upload()
 RETURNS TRIGGER
@@ -320,11 +386,39 @@ DECLARE
   v_conflict_id uuid;
   v_user_role text;
   v_requires_signature boolean;
+  v_max_size bigint;
 BEGIN
   -- DEBUG: Log de entrada
   RAISE NOTICE 'handle_storage_upload - Procesando: name=%, bucket=%, metadata=%, user_metadata=%', 
     NEW.name, NEW.bucket_id, md::text, umd::text;
 
+  -- Subidas con URL firmada emitida por la API (POST /documents/{id}/upload-url):
+  -- la ruta reservada identifica el placeholder sin depender del user_metadata
+  SELECT id, (extra_metadata->'upload'->>'max_size')::bigint
+  INTO v_document_id, v_max_size
+  FROM public.documents
+  WHERE storage_path = NEW.name
+    AND bucket_name = NEW.bucket_id
+    AND status = 'requested'::document_status;
+
+  IF v_document_id IS NOT NULL THEN
+    IF v_max_size IS NOT NULL AND (md->>'size')::bigint > v_max_size THEN
+      RAISE EXCEPTION 'El archivo (% bytes) excede el tamaño declarado (% bytes)',
+        md->>'size', v_max_size;
+    END IF;
+
+    UPDATE public.documents
+    SET
+      file_size = (md->>'size')::integer,
+      mime_type = COALESCE(md->>'mimetype', md->>'contentType', mime_type),
+      status = 'uploaded'::document_status,
+      updated_at = NOW()
+    WHERE id = v_document_id;
+
+    RAISE NOTICE 'Documento % (ruta reservada) marcado como uploaded', v_document_id;
+    RETURN NEW;
+  END IF;
+
   -- Solo procesar si hay user_metadata con user_id
   IF umd IS NULL THEN
     RAISE NOTICE 'user_metadata es NULL, saltando procesamiento';
@@ -515,6 +609,22 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- ----------------------------------------------------------------------------
+-- Función: bump_row_version
+-- Incrementa `version` en los UPDATE que no la cambian (triggers de storage,
+-- SQL manual), para que el control de concurrencia optimista de la API los
+-- detecte. La API ya la incrementa en sus propios UPDATE.
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION public.bump_row_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.version = OLD.version THEN
+    NEW.version = OLD.version + 1;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================================
 -- 4. TRIGGERS
 -- ============================================================================
@@ -551,6 +661,19 @@ CREATE TRIGGER update_documents_updated_at
   BEFORE UPDATE ON public.documents
   FOR EACH ROW EXECUTE FUNCTION public.update_updated_at_column();
 
+-- Trigger: Incrementar version (concurrencia optimista)
+CREATE TRIGGER bump_companies_version
+  BEFORE UPDATE ON public.companies
+  FOR EACH ROW EXECUTE FUNCTION public.bump_row_version();
+
+CREATE TRIGGER bump_credit_applications_version
+  BEFORE UPDATE ON public.credit_applications
+  FOR EACH ROW EXECUTE FUNCTION public.bump_row_version();
+
+CREATE TRIGGER bump_documents_version
+  BEFORE UPDATE ON public.documents
+  FOR EACH ROW EXECUTE FUNCTION public.bump_row_version();
+
 -- ============================================================================
 -- FIN DEL SCRIPT
 -- ============================================================================
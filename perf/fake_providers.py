@@ -0,0 +1,205 @@
+"""Dobles locales de Supabase Auth/Storage y HelloSign para pruebas de rendimiento.
+
+Levantar con un único worker (la clave ES256 se genera al importar el módulo):
+
+    uv run uvicorn perf.fake_providers:app --port 9999
+
+y apuntar la API a él:
+
+    SUPABASE_URL=http://127.0.0.1:9999
+    HELLOSIGN_API_HOST=http://127.0.0.1:9999/v3
+
+La latencia y la tasa de errores se configuran con variables `FAKE_*`
+(ver `FakeProviderSettings`).
+"""
+
+import asyncio
+import random
+import secrets
+import time
+import uuid
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class FakeProviderSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="FAKE_", extra="ignore")
+
+    latency_ms: float = 30.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    # Sobrescrituras por servicio (None = usar latency_ms / error_rate)
+    auth_latency_ms: float | None = None
+    storage_latency_ms: float | None = None
+    hellosign_latency_ms: float | None = None
+    storage_error_rate: float | None = None
+    hellosign_error_rate: float | None = None
+    sign_url_ttl: int = 3600
+
+
+class TokenRequest(BaseModel):
+    sub: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    email: str | None = None
+    user_role: str | None = None
+    expires_in: int = 3600
+
+
+settings = FakeProviderSettings()
+
+KEY_ID = "fake-es256"
+_private_key = ec.generate_private_key(ec.SECP256R1())
+_public_jwk: dict[str, Any] = {
+    **jwt.algorithms.ECAlgorithm.to_jwk(_private_key.public_key(), as_dict=True),
+    "kid": KEY_ID,
+    "alg": "ES256",
+    "use": "sig",
+}
+
+# Solicitudes de firma creadas, para que el listado las devuelva
+_signature_requests: dict[str, dict[str, Any]] = {}
+
+
+def mint_token(
+    issuer: str,
+    sub: str,
+    *,
+    email: str | None = None,
+    user_role: str | None = None,
+    expires_in: int = 3600,
+) -> str:
+    """Firma un JWT con la misma forma que los de Supabase Auth.
+
+    `issuer` debe ser `{SUPABASE_URL}/auth/v1`, igual que valida la API.
+    """
+    now = int(time.time())
+    claims: dict[str, Any] = {
+        "iss": issuer,
+        "aud": "authenticated",
+        "sub": sub,
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + expires_in,
+    }
+    if email:
+        claims["email"] = email
+    if user_role:
+        claims["user_role"] = user_role
+    return jwt.encode(claims, _private_key, algorithm="ES256", headers={"kid": KEY_ID})
+
+
+async def _simulate(latency_ms: float | None, error_rate: float | None) -> None:
+    """Aplica la latencia configurada y, con la probabilidad dada, falla con 503."""
+    base = settings.latency_ms if latency_ms is None else latency_ms
+    delay = max(base + random.uniform(-settings.jitter_ms, settings.jitter_ms), 0)
+    await asyncio.sleep(delay / 1000)
+    rate = settings.error_rate if error_rate is None else error_rate
+    if rate and random.random() < rate:
+        raise HTTPException(status_code=503, detail="Fallo simulado")
+
+
+app = FastAPI(title="Fake providers (Supabase + HelloSign)")
+
+
+# --- Supabase Auth ---------------------------------------------------------
+
+
+@app.get("/auth/v1/.well-known/jwks.json")
+async def jwks():
+    await _simulate(settings.auth_latency_ms, 0)
+    return {"keys": [_public_jwk]}
+
+
+@app.post("/auth/v1/token")
+async def issue_token(request: Request, payload: TokenRequest):
+    """Emite un token de prueba (no valida credenciales)."""
+    issuer = f"{str(request.base_url).rstrip('/')}/auth/v1"
+    token = mint_token(
+        issuer,
+        payload.sub,
+        email=payload.email,
+        user_role=payload.user_role,
+        expires_in=payload.expires_in,
+    )
+    return {
+        "access_token": token,
+        "token_type": "bearer",
+        "expires_in": payload.expires_in,
+        "user": {"id": payload.sub, "email": payload.email},
+    }
+
+
+# --- Supabase Storage ------------------------------------------------------
+
+
+@app.get("/storage/v1/bucket/{bucket}")
+async def storage_bucket(bucket: str):
+    await _simulate(settings.storage_latency_ms, settings.storage_error_rate)
+    return {"id": bucket, "name": bucket, "public": False}
+
+
+@app.post("/storage/v1/object/sign/{bucket}/{path:path}")
+async def storage_sign(bucket: str, path: str):
+    await _simulate(settings.storage_latency_ms, settings.storage_error_rate)
+    return {"signedURL": f"/object/sign/{bucket}/{path}?token={secrets.token_hex(16)}"}
+
+
+@app.post("/storage/v1/object/upload/sign/{bucket}/{path:path}")
+async def storage_upload_sign(bucket: str, path: str):
+    await _simulate(settings.storage_latency_ms, settings.storage_error_rate)
+    token = secrets.token_hex(16)
+    return {"url": f"/object/upload/sign/{bucket}/{path}?token={token}"}
+
+
+# --- HelloSign -------------------------------------------------------------
+
+
+@app.post("/v3/signature_request/create_embedded")
+async def hellosign_create_embedded():
+    await _simulate(settings.hellosign_latency_ms, settings.hellosign_error_rate)
+    signature_request_id = secrets.token_hex(20)
+    signature_request = {
+        "signature_request_id": signature_request_id,
+        "test_mode": True,
+        "created_at": int(time.time()),
+        "is_complete": False,
+        "is_declined": False,
+        "has_error": False,
+        "files_url": f"https://fake.hellosign/files/{signature_request_id}",
+        "signatures": [
+            {"signature_id": secrets.token_hex(16), "status_code": "awaiting_signature"}
+        ],
+    }
+    _signature_requests[signature_request_id] = signature_request
+    return {"signature_request": signature_request}
+
+
+@app.get("/v3/embedded/sign_url/{signature_id}")
+async def hellosign_sign_url(signature_id: str):
+    await _simulate(settings.hellosign_latency_ms, settings.hellosign_error_rate)
+    return {
+        "embedded": {
+            "sign_url": f"https://fake.hellosign/sign/{signature_id}",
+            "expires_at": int(time.time()) + settings.sign_url_ttl,
+        }
+    }
+
+
+@app.get("/v3/signature_request/list")
+async def hellosign_list(page: int = 1, page_size: int = 20):
+    await _simulate(settings.hellosign_latency_ms, settings.hellosign_error_rate)
+    items = list(reversed(_signature_requests.values()))
+    start = (page - 1) * page_size
+    return {
+        "signature_requests": items[start : start + page_size],
+        "list_info": {
+            "num_pages": max((len(items) + page_size - 1) // page_size, 1),
+            "num_results": len(items),
+            "page": page,
+            "page_size": page_size,
+        },
+    }
@@ -0,0 +1,486 @@
+"""Prueba de carga de extremo a extremo con escenarios mixtos.
+
+    uv run python -m perf.seed --create-schema --truncate
+    uv run python -m perf.loadtest run --duration 60 --concurrency 32 \\
+        --output perf-results/$(git rev-parse --short HEAD).json
+    uv run python -m perf.loadtest compare perf-results/a1b2c3d.json \\
+        perf-results/e4f5a6b.json
+
+Por defecto levanta `perf.fake_providers` en un puerto local, apunta la API a él
+y la ejercita en el mismo proceso a través de su interfaz ASGI (lifespan
+incluido), contra la base de `DB_*` sembrada con `perf.seed`. Con `--base-url`
+ataca una API ya levantada; sus tokens tienen que salir del mismo doble de
+proveedores, indicado con `--providers-url`.
+
+Cada usuario virtual elige un escenario según `--mix` y ejecuta sus pasos en
+orden. El reporte es JSON con p50/p95/p99, RPS y errores por endpoint (plantilla
+de ruta) y por escenario, y el commit medido.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from perf.seed import DEFAULT_MANIFEST
+
+API = "/api/v1"
+DEFAULT_MIX = "applicant_dashboard=6,operator_review=3,document_signing=1"
+
+
+class Recorder:
+    """Latencias por endpoint y por escenario, descartando el calentamiento."""
+
+    def __init__(self, measure_from: float) -> None:
+        self.measure_from = measure_from
+        self.endpoints: dict[str, list[float]] = {}
+        self.endpoint_errors: dict[str, int] = {}
+        self.scenarios: dict[str, list[float]] = {}
+        self.scenario_errors: dict[str, int] = {}
+
+    def _measuring(self) -> bool:
+        return time.perf_counter() >= self.measure_from
+
+    def endpoint(self, name: str, elapsed: float, ok: bool) -> None:
+        if not self._measuring():
+            return
+        self.endpoints.setdefault(name, []).append(elapsed)
+        if not ok:
+            self.endpoint_errors[name] = self.endpoint_errors.get(name, 0) + 1
+
+    def scenario(self, name: str, elapsed: float, ok: bool) -> None:
+        if not self._measuring():
+            return
+        self.scenarios.setdefault(name, []).append(elapsed)
+        if not ok:
+            self.scenario_errors[name] = self.scenario_errors.get(name, 0) + 1
+
+
+class VirtualUser:
+    """Cliente HTTP con el token de un usuario sembrado."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        recorder: Recorder,
+        token: str,
+        user: dict[str, Any],
+        rng: random.Random,
+    ) -> None:
+        self.client = client
+        self.recorder = recorder
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.user = user
+        self.rng = rng
+
+    async def call(
+        self, method: str, template: str, json_body: Any = None, **params: Any
+    ) -> httpx.Response:
+        """Ejecuta `template` (con `{param}` sustituidos) y lo registra bajo la
+        plantilla, igual que las métricas de la API."""
+        path = API + template
+        url = path.format(**{k: v for k, v in params.items() if f"{{{k}}}" in path})
+        query = {k: v for k, v in params.items() if f"{{{k}}}" not in path}
+        started = time.perf_counter()
+        response = await self.client.request(
+            method, url, params=query, json=json_body, headers=self.headers
+        )
+        ok = response.status_code < 400
+        self.recorder.endpoint(f"{method} {path}", time.perf_counter() - started, ok)
+        if not ok:
+            raise ScenarioError(f"{method} {url} -> {response.status_code}")
+        return response
+
+
+class ScenarioError(Exception):
+    pass
+
+
+# --- Escenarios -------------------------------------------------------------
+
+
+async def applicant_dashboard(vu: VirtualUser) -> None:
+    """Lo que carga el tablero de un solicitante al entrar."""
+    await vu.call("GET", "/profiles/me")
+    await vu.call("GET", "/companies/me")
+    await vu.call("GET", "/credit-applications/", limit=10)
+    await vu.call("GET", "/documents/", limit=10)
+    if vu.user["application_ids"]:
+        await vu.call(
+            "GET",
+            "/credit-applications/{application_id}",
+            application_id=vu.rng.choice(vu.user["application_ids"]),
+        )
+
+
+async def operator_review(vu: VirtualUser, queue: list[str]) -> None:
+    """Un operador toma una solicitud de la cola y revisa empresa y documentos."""
+    await vu.call(
+        "GET", "/credit-applications/", status="pending", limit=20, sort="created_at"
+    )
+    if not queue:
+        return
+    application_id = vu.rng.choice(queue)
+    response = await vu.call(
+        "GET", "/credit-applications/{application_id}", application_id=application_id
+    )
+    await vu.call("GET", "/documents/", application_id=application_id, limit=20)
+    await vu.call(
+        "GET", "/companies/{company_id}", company_id=response.json()["company_id"]
+    )
+
+
+async def document_signing(vu: VirtualUser) -> None:
+    """Un solicitante abre un documento subido y pide la firma embebida."""
+    if not vu.user["document_ids"]:
+        return
+    document_id = vu.rng.choice(vu.user["document_ids"])
+    await vu.call("GET", "/documents/{document_id}", document_id=document_id)
+    await vu.call(
+        "POST",
+        "/documents/{document_id}/sign",
+        json_body={"signer_email": vu.user["email"], "signer_name": "Perf Firmante"},
+        document_id=document_id,
+    )
+
+
+# Escenario -> (rol de los usuarios que lo ejecutan, función)
+SCENARIOS: dict[str, tuple[str, Callable[..., Awaitable[None]]]] = {
+    "applicant_dashboard": ("applicants", applicant_dashboard),
+    "operator_review": ("operators", operator_review),
+    "document_signing": ("applicants", document_signing),
+}
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights: dict[str, float] = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Escenario desconocido: {name.strip()}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+# --- Reporte ----------------------------------------------------------------
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada."""
+    if not ordered:
+        return 0.0
+    index = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(samples: list[float], errors: int, seconds: float) -> dict[str, Any]:
+    ordered = sorted(samples)
+    ms = 1000
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / seconds, 2) if seconds else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * ms, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * ms, 2),
+        "p95_ms": round(percentile(ordered, 95) * ms, 2),
+        "p99_ms": round(percentile(ordered, 99) * ms, 2),
+        "max_ms": round(ordered[-1] * ms, 2) if ordered else 0.0,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(
+    recorder: Recorder, seconds: float, meta: dict[str, Any]
+) -> dict[str, Any]:
+    all_samples = [s for samples in recorder.endpoints.values() for s in samples]
+    return {
+        "meta": {**meta, "commit": git_commit(), "measured_seconds": round(seconds, 2)},
+        "overall": summarize(
+            all_samples, sum(recorder.endpoint_errors.values()), seconds
+        ),
+        "endpoints": {
+            name: summarize(samples, recorder.endpoint_errors.get(name, 0), seconds)
+            for name, samples in sorted(recorder.endpoints.items())
+        },
+        "scenarios": {
+            name: summarize(samples, recorder.scenario_errors.get(name, 0), seconds)
+            for name, samples in sorted(recorder.scenarios.items())
+        },
+    }
+
+
+# --- Ejecución --------------------------------------------------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _mint_remote(providers_url: str, user: dict[str, Any], role: str) -> str:
+    async with httpx.AsyncClient(base_url=providers_url) as client:
+        response = await client.post(
+            "/auth/v1/token",
+            json={"sub": user["id"], "email": user["email"], "user_role": role},
+        )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+
+async def mint_tokens(
+    providers_url: str,
+    users: list[dict[str, Any]],
+    role: str,
+    *,
+    remote: bool,
+    expires_in: int,
+) -> list[str]:
+    """Un token por usuario del manifiesto, emitido por el doble de proveedores
+    (en el proceso, o por HTTP si la API corre aparte)."""
+    if remote:
+        return list(
+            await asyncio.gather(
+                *(_mint_remote(providers_url, user, role) for user in users)
+            )
+        )
+    from perf.fake_providers import mint_token
+
+    issuer = f"{providers_url}/auth/v1"
+    return [
+        mint_token(
+            issuer,
+            user["id"],
+            email=user["email"],
+            user_role=role,
+            expires_in=expires_in,
+        )
+        for user in users
+    ]
+
+
+@asynccontextmanager
+async def api_target(
+    base_url: str | None, providers_url: str | None, *, client_name: str
+) -> AsyncIterator[tuple[httpx.AsyncClient, str]]:
+    """Cliente contra la API y URL del doble de proveedores que emite sus tokens.
+
+    Sin `base_url` levanta el doble en un puerto local y la API en el mismo
+    proceso (ASGI, lifespan incluido)."""
+    if base_url:
+        if not providers_url:
+            raise SystemExit("--base-url requiere --providers-url")
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+            yield client, providers_url
+        return
+
+    import uvicorn
+
+    from perf.fake_providers import app as fake_app
+
+    port = _free_port()
+    providers_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(
+        uvicorn.Config(fake_app, port=port, log_level="warning", lifespan="off")
+    )
+    # En su propio hilo y loop: la API valida el JWT con un fetch síncrono del
+    # JWKS que bloquearía un doble servido desde el mismo loop
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    try:
+        while not server.started:
+            await asyncio.sleep(0.05)
+        # Deben quedar fijadas antes de importar app.main (lee Settings al importar)
+        os.environ["SUPABASE_URL"] = providers_url
+        os.environ["HELLOSIGN_API_HOST"] = f"{providers_url}/v3"
+        os.environ.setdefault("SUPABASE_SECRET_KEY", "perf-service-key")
+        os.environ.setdefault("HELLOSIGN_API_KEY", "perf-api-key")
+        os.environ.setdefault("HELLOSIGN_CLIENT_ID", "perf-client-id")
+        os.environ["SIGNATURE_RECONCILE_ENABLED"] = "false"
+        from app.main import app
+
+        async with (
+            app.router.lifespan_context(app),
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url=f"http://{client_name}",
+                timeout=30,
+            ) as client,
+        ):
+            yield client, providers_url
+    finally:
+        server.should_exit = True
+        await asyncio.to_thread(server_thread.join)
+
+
+async def _virtual_user(
+    worker: int,
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    tokens: dict[str, dict[str, str]],
+    manifest: dict[str, Any],
+    weights: dict[str, float],
+    deadline: float,
+    seed: int,
+) -> None:
+    rng = random.Random(seed + worker)
+    names = list(weights)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, list(weights.values()))[0]
+        role, scenario = SCENARIOS[name]
+        user = rng.choice(manifest[role])
+        vu = VirtualUser(client, recorder, tokens[role][user["id"]], user, rng)
+        args = (manifest["review_queue"],) if name == "operator_review" else ()
+        started = time.perf_counter()
+        ok = True
+        try:
+            await scenario(vu, *args)
+        except (ScenarioError, httpx.HTTPError, KeyError, ValueError):
+            ok = False
+        recorder.scenario(name, time.perf_counter() - started, ok)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    manifest = json.loads(Path(args.manifest).read_text())
+    weights = parse_mix(args.mix)
+    for name in weights:
+        role = SCENARIOS[name][0]
+        if not manifest.get(role):
+            raise SystemExit(f"El manifiesto no tiene {role} para {name}")
+
+    meta = {
+        "started_at": datetime.now(UTC).isoformat(),
+        "target": args.base_url or "asgi",
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "concurrency": args.concurrency,
+        "mix": weights,
+        "seed": args.seed,
+    }
+    async with api_target(
+        args.base_url, args.providers_url, client_name="loadtest"
+    ) as (client, providers_url):
+        tokens: dict[str, dict[str, str]] = {}
+        for role in {SCENARIOS[name][0] for name in weights}:
+            minted = await mint_tokens(
+                providers_url,
+                manifest[role],
+                role.removesuffix("s"),
+                remote=bool(args.base_url),
+                expires_in=int(args.duration + args.warmup) + 600,
+            )
+            tokens[role] = {
+                u["id"]: t for u, t in zip(manifest[role], minted, strict=True)
+            }
+        return await _drive(client, tokens, manifest, weights, args, meta)
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    tokens: dict[str, dict[str, str]],
+    manifest: dict[str, Any],
+    weights: dict[str, float],
+    args: argparse.Namespace,
+    meta: dict[str, Any],
+) -> dict[str, Any]:
+    start = time.perf_counter()
+    recorder = Recorder(start + args.warmup)
+    deadline = start + args.warmup + args.duration
+    await asyncio.gather(
+        *(
+            _virtual_user(
+                i, client, recorder, tokens, manifest, weights, deadline, args.seed
+            )
+            for i in range(args.concurrency)
+        )
+    )
+    measured = time.perf_counter() - recorder.measure_from
+    return build_report(recorder, measured, meta)
+
+
+def compare(base: dict[str, Any], new: dict[str, Any]) -> str:
+    """Tabla de p50/p95/p99 y RPS por endpoint entre dos reportes."""
+    lines = [
+        f"{'endpoint':<55} {'p50':>14} {'p95':>14} {'p99':>14} {'rps':>14}",
+    ]
+    names = sorted(base["endpoints"].keys() | new["endpoints"].keys())
+    for name in ["overall", *names]:
+        a = base["overall"] if name == "overall" else base["endpoints"].get(name)
+        b = new["overall"] if name == "overall" else new["endpoints"].get(name)
+        if a is None or b is None:
+            lines.append(f"{name:<55} {'(solo en uno de los reportes)':>59}")
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            delta = (b[key] - a[key]) / a[key] * 100 if a[key] else 0.0
+            cells.append(f"{b[key]:>7.1f} {delta:+5.0f}%")
+        lines.append(f"{name:<55} " + " ".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="ejecuta los escenarios y emite el reporte")
+    run_p.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    run_p.add_argument("--duration", type=float, default=30.0)
+    run_p.add_argument("--warmup", type=float, default=5.0)
+    run_p.add_argument("--concurrency", type=int, default=16)
+    run_p.add_argument("--mix", default=DEFAULT_MIX)
+    run_p.add_argument("--seed", type=int, default=42)
+    run_p.add_argument("--base-url", help="API ya levantada (por defecto, ASGI)")
+    run_p.add_argument("--providers-url", help="doble de proveedores de --base-url")
+    run_p.add_argument("--output", help="archivo JSON (por defecto, stdout)")
+
+    cmp_p = sub.add_parser("compare", help="compara dos reportes")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("new")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        base = json.loads(Path(args.base).read_text())
+        new = json.loads(Path(args.new).read_text())
+        print(compare(base, new))
+        return 0
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+    overall = report["overall"]
+    print(
+        f"{overall['count']} requests, {overall['rps']} rps, "
+        f"p95 {overall['p95_ms']} ms, {overall['errors']} errores",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Lista el presupuesto de consultas SQL de cada endpoint de `app/routers/`.
+
+    uv run python -m perf.query_budgets
+
+Termina con código 1 si algún endpoint de la API no declara `@query_budget(n)`,
+para que un endpoint nuevo no quede cubierto solo por el presupuesto global.
+Para verificar el número real de consultas de un endpoint en una prueba, usar
+`app.core.query_tracking.assert_max_queries`.
+"""
+
+import sys
+
+from fastapi.routing import APIRoute
+
+from app.core.query_tracking import BUDGET_ATTR
+from app.main import app
+
+
+def main() -> int:
+    missing = 0
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not route.path.startswith("/api/"):
+            continue
+        budget = getattr(route.endpoint, BUDGET_ATTR, None)
+        methods = ",".join(sorted(route.methods))
+        shown = "-" if budget is None else str(budget)
+        print(f"{methods:<7} {route.path:<55} {shown:>3}")
+        if budget is None:
+            missing += 1
+    if missing:
+        print(f"\n{missing} endpoint(s) sin @query_budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
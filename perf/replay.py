@@ -0,0 +1,333 @@
+"""Reproduce tráfico capturado con `TRAFFIC_CAPTURE_ENABLED` contra datos sembrados.
+
+    uv run python -m perf.seed --create-schema --truncate
+    uv run python -m perf.replay traffic.jsonl --speed 2 \\
+        --output perf-results/replay-$(git rev-parse --short HEAD).json
+    uv run python -m perf.loadtest compare perf-results/replay-a1b2c3d.json \\
+        perf-results/replay-e4f5a6b.json
+
+Emite los requests de la captura en orden respetando su separación original
+(`--speed 1`), N veces más rápido (`--speed N`) o lo más rápido posible
+(`--speed 0`), siempre con a lo sumo `--concurrency` en vuelo. El destino es el
+mismo que en `perf.loadtest`: la API en el mismo proceso (ASGI) contra la base de
+`DB_*`, o `--base-url` con `--providers-url`.
+
+Los seudónimos de la captura se traducen a datos del manifiesto de `perf.seed`:
+cada actor (rol + seudónimo del `sub`) pasa a ser un usuario sembrado de su rol,
+y cada ID seudonimizado, un ID real del mismo tipo visible para ese usuario, de
+forma estable (un mismo documento capturado es siempre el mismo documento en el
+replay). Así se conservan la mezcla de endpoints y la localidad de los accesos.
+
+El reporte tiene el formato de `perf.loadtest` (comparable con `compare`), más
+las latencias originales de la captura por endpoint y el retraso del replay
+respecto al cronograma. Los requests de escritura modifican la base: para
+comparar versiones hay que volver a sembrar antes de cada replay, o usar
+`--read-only`.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from perf.loadtest import (
+    Recorder,
+    api_target,
+    build_report,
+    mint_tokens,
+    percentile,
+    summarize,
+)
+from perf.seed import DEFAULT_MANIFEST
+
+# Rutas que no se pueden reproducir con sentido (webhooks firmados, perfilado)
+DEFAULT_EXCLUDE = ("/webhooks/", "/admin/")
+ROLE_KEYS = {"applicant": "applicants", "operator": "operators", "admin": "admins"}
+_TOKEN = re.compile(r"<(uuid|email|digits|str):([^>]+)>")
+
+
+class Resolver:
+    """Traduce actores e IDs seudonimizados a usuarios e IDs del manifiesto."""
+
+    def __init__(self, manifest: dict[str, Any], rng: random.Random) -> None:
+        self.manifest = manifest
+        self.rng = rng
+        self.users: dict[tuple[str, str], dict[str, Any]] = {}
+        self.values: dict[tuple[str | None, str, str], str] = {}
+
+    def user(self, role: str | None, actor: str | None) -> tuple[str, dict] | None:
+        """(clave de rol en el manifiesto, usuario) para el actor, o None si el
+        request original no estaba autenticado."""
+        if actor is None:
+            return None
+        key = ROLE_KEYS.get(role or "", "applicants")
+        if not self.manifest.get(key):
+            key = "applicants"
+        if (key, actor) not in self.users:
+            self.users[(key, actor)] = self.rng.choice(self.manifest[key])
+        return key, self.users[(key, actor)]
+
+    def _candidates(self, name: str, owner: tuple[str, dict] | None) -> list[str]:
+        own = owner[1] if owner and owner[0] == "applicants" else None
+        other = self.rng.choice(self.manifest["applicants"])
+        if name == "application_id":
+            if own:
+                return own["application_ids"]
+            return self.manifest.get("review_queue") or other["application_ids"]
+        if name == "document_id":
+            return (own or other)["document_ids"]
+        if name == "company_id":
+            return [(own or other)["company_id"]]
+        if name in ("user_id", "profile_id"):
+            return [(own or other)["id"]]
+        return []
+
+    def materialize(self, value: Any, name: str, owner: tuple[str, dict] | None) -> Any:
+        if isinstance(value, dict):
+            return {k: self.materialize(v, k, owner) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.materialize(v, name, owner) for v in value]
+        if not isinstance(value, str):
+            return value
+        if value == "<datetime>":
+            return datetime.now(UTC).isoformat()
+        match = _TOKEN.fullmatch(value)
+        if match is None:
+            return value
+        kind, detail = match.groups()
+        if kind == "digits":
+            return "".join(self.rng.choices("0123456789", k=int(detail)))
+        if kind == "str":
+            return "x" * int(detail)
+        if kind == "email":
+            return f"replay-{detail}@perf.example.com"
+        key = (owner[1]["id"] if owner else None, name, detail)
+        if key not in self.values:
+            candidates = self._candidates(name, owner)
+            self.values[key] = (
+                self.rng.choice(candidates)
+                if candidates
+                else str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+            )
+        return self.values[key]
+
+
+def load_capture(
+    path: str, *, read_only: bool, exclude: tuple[str, ...], limit: int | None
+) -> list[dict[str, Any]]:
+    entries = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if read_only and entry["method"] != "GET":
+                continue
+            if any(pattern in entry["route"] for pattern in exclude):
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda e: e["ts"])
+    return entries[:limit] if limit else entries
+
+
+class _Request:
+    __slots__ = (
+        "captured_status",
+        "json",
+        "method",
+        "name",
+        "offset",
+        "params",
+        "url",
+        "user",
+    )
+
+    def __init__(self, entry: dict[str, Any], t0: float, resolver: Resolver) -> None:
+        owner = resolver.user(entry.get("role"), entry.get("actor"))
+        path_params = {
+            k: resolver.materialize(v, k, owner)
+            for k, v in entry["path_params"].items()
+        }
+        self.offset = entry["ts"] - t0
+        self.method = entry["method"]
+        self.name = f"{entry['method']} {entry['route']}"
+        self.url = entry["route"].format(**path_params)
+        self.params = [
+            (k, resolver.materialize(v, k, owner))
+            for k, values in entry["query"].items()
+            for v in values
+        ]
+        self.json = (
+            resolver.materialize(entry["body"], "", owner)
+            if entry.get("body") is not None
+            else None
+        )
+        self.user = owner
+        self.captured_status = entry["status"]
+
+
+async def _replay(
+    client: httpx.AsyncClient,
+    requests: list[_Request],
+    tokens: dict[str, str],
+    *,
+    speed: float,
+    concurrency: int,
+) -> tuple[Recorder, float, list[float]]:
+    start = time.perf_counter()
+    recorder = Recorder(start)
+    semaphore = asyncio.Semaphore(concurrency)
+    lags: list[float] = []
+
+    async def fire(request: _Request, scheduled: float) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            lags.append(max(started - scheduled, 0.0))
+            headers = (
+                {"Authorization": f"Bearer {tokens[request.user[1]['id']]}"}
+                if request.user
+                else {}
+            )
+            try:
+                response = await client.request(
+                    request.method,
+                    request.url,
+                    params=request.params,
+                    json=request.json,
+                    headers=headers,
+                )
+                status = response.status_code
+                # Un 4xx que también falló en la captura es el comportamiento esperado
+                ok = status < 400 or (request.captured_status >= 400 and status < 500)
+            except httpx.HTTPError:
+                ok = False
+            recorder.endpoint(request.name, time.perf_counter() - started, ok)
+
+    tasks = []
+    for request in requests:
+        scheduled = start + (request.offset / speed if speed > 0 else 0.0)
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(request, scheduled)))
+    await asyncio.gather(*tasks)
+    return recorder, time.perf_counter() - start, lags
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    manifest = json.loads(Path(args.manifest).read_text())
+    entries = load_capture(
+        args.capture,
+        read_only=args.read_only,
+        exclude=tuple(args.exclude or DEFAULT_EXCLUDE),
+        limit=args.limit,
+    )
+    if not entries:
+        raise SystemExit(f"{args.capture} no tiene requests para reproducir")
+    if not manifest.get("applicants"):
+        raise SystemExit("El manifiesto no tiene applicants")
+
+    resolver = Resolver(manifest, random.Random(args.seed))
+    t0 = entries[0]["ts"]
+    requests = [_Request(entry, t0, resolver) for entry in entries]
+    span = entries[-1]["ts"] - t0
+
+    meta = {
+        "started_at": datetime.now(UTC).isoformat(),
+        "target": args.base_url or "asgi",
+        "capture": args.capture,
+        "requests": len(requests),
+        "capture_seconds": round(span, 2),
+        "speed": args.speed,
+        "concurrency": args.concurrency,
+        "read_only": args.read_only,
+        "seed": args.seed,
+    }
+    async with api_target(args.base_url, args.providers_url, client_name="replay") as (
+        client,
+        providers_url,
+    ):
+        tokens: dict[str, str] = {}
+        by_role: dict[str, dict[str, dict[str, Any]]] = {}
+        for key, user in resolver.users.items():
+            by_role.setdefault(key[0], {})[user["id"]] = user
+        for role, users in by_role.items():
+            minted = await mint_tokens(
+                providers_url,
+                list(users.values()),
+                role.removesuffix("s"),
+                remote=bool(args.base_url),
+                expires_in=int(span / args.speed if args.speed else 0) + 600,
+            )
+            tokens.update(zip(users, minted, strict=True))
+        recorder, seconds, lags = await _replay(
+            client,
+            requests,
+            tokens,
+            speed=args.speed,
+            concurrency=args.concurrency,
+        )
+
+    lags.sort()
+    meta["lag_p95_ms"] = round(percentile(lags, 95) * 1000, 2)
+    meta["lag_max_ms"] = round(lags[-1] * 1000, 2) if lags else 0.0
+    report = build_report(recorder, seconds, meta)
+    captured: dict[str, list[float]] = {}
+    for entry in entries:
+        name = f"{entry['method']} {entry['route']}"
+        captured.setdefault(name, []).append(entry["duration_ms"] / 1000)
+    report["captured"] = {
+        name: summarize(samples, 0, span) for name, samples in sorted(captured.items())
+    }
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="archivo JSONL de TRAFFIC_CAPTURE_FILE")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="multiplicador; 0 = sin esperas"
+    )
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--read-only", action="store_true", help="solo GET")
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        help=f"subcadena de ruta a omitir (por defecto {', '.join(DEFAULT_EXCLUDE)})",
+    )
+    parser.add_argument("--limit", type=int, help="solo los primeros N requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", help="API ya levantada (por defecto, ASGI)")
+    parser.add_argument("--providers-url", help="doble de proveedores de --base-url")
+    parser.add_argument("--output", help="archivo JSON (por defecto, stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+    overall = report["overall"]
+    print(
+        f"{overall['count']} requests, {overall['rps']} rps, "
+        f"p95 {overall['p95_ms']} ms, {overall['errors']} errores, "
+        f"retraso p95 {report['meta']['lag_p95_ms']} ms",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,545 @@
+"""Genera grafos sintéticos profiles -> companies -> credit_applications ->
+documents y los carga con COPY.
+
+    uv run python -m perf.seed --create-schema --truncate --applicants 1000
+    uv run python -m perf.seed --truncate --applicants 330000   # ~1M solicitudes
+
+Usa las variables `DB_*` de la API (o `--database-url`) y escribe un manifiesto
+JSON con una muestra de IDs por rol (`--manifest-limit`), que `perf.loadtest` usa
+para armar los escenarios. Con la misma `--seed` genera los mismos datos.
+
+Los datos se generan y cargan por bloques de `--chunk-size` empresas, cada uno en
+su propia transacción y en orden de claves foráneas, así que la memoria no crece
+con el volumen. En Postgres cada tabla del bloque se carga con
+`copy_records_to_table` de asyncpg; en otros motores (p. ej. SQLite para probar
+la herramienta) con INSERT por lotes.
+
+Las distribuciones siguen lo que se ve en producción: la mayoría de las
+solicitudes pendientes o en revisión, montos log-normales redondeados a miles,
+plazos concentrados en 12-36 meses, documentos del checklist habitual por
+solicitud y estados de documento y firma coherentes con el de la solicitud.
+
+`--create-schema` crea los tipos enum y las tablas en un Postgres vacío. Con el
+esquema de `init_db.sql` (donde `profiles.id` referencia `auth.users`) hace falta
+sembrar antes `auth.users`; la herramienta está pensada para una base dedicada.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from faker import Faker
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlmodel import SQLModel
+
+from app.config import Settings
+from app.core.enums import (
+    CreditApplicationPurpose,
+    CreditApplicationStatus,
+    DocumentStatus,
+    DocumentType,
+    SignatureStatus,
+    UserRole,
+)
+from app.models.company import Company
+from app.models.credit_application import CreditApplication
+from app.models.document import Document
+from app.models.profile import Profile
+
+BATCH_SIZE = 1000
+DEFAULT_MANIFEST = "seed-manifest.json"
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_MANIFEST_LIMIT = 5000
+# Tamaño de los conjuntos de nombres, empresas y direcciones precalculados con
+# Faker: generarlos por fila domina el tiempo a millones de filas
+_POOL_SIZE = 5000
+
+# (enum, nombre del tipo en Postgres)
+_ENUM_TYPES = (
+    (UserRole, "user_role"),
+    (CreditApplicationStatus, "credit_application_status"),
+    (CreditApplicationPurpose, "credit_application_purpose"),
+    (DocumentType, "document_type"),
+    (SignatureStatus, "signature_status"),
+    (DocumentStatus, "document_status"),
+)
+# Tablas en orden de claves foráneas
+TABLES = (
+    ("profiles", Profile),
+    ("companies", Company),
+    ("applications", CreditApplication),
+    ("documents", Document),
+)
+
+_APPLICATION_STATUS_WEIGHTS = {
+    CreditApplicationStatus.draft: 15,
+    CreditApplicationStatus.pending: 30,
+    CreditApplicationStatus.in_review: 20,
+    CreditApplicationStatus.approved: 25,
+    CreditApplicationStatus.rejected: 10,
+}
+_PURPOSE_WEIGHTS = {
+    CreditApplicationPurpose.working_capital: 35,
+    CreditApplicationPurpose.equipment: 20,
+    CreditApplicationPurpose.expansion: 15,
+    CreditApplicationPurpose.inventory: 15,
+    CreditApplicationPurpose.refinancing: 10,
+    CreditApplicationPurpose.other: 5,
+}
+_TERM_WEIGHTS = {6: 5, 12: 25, 18: 10, 24: 25, 36: 20, 48: 8, 60: 7}
+# Checklist habitual de una solicitud; a partir del quinto documento, extras
+_CHECKLIST = (
+    DocumentType.tax_return,
+    DocumentType.financial_statement,
+    DocumentType.id_document,
+    DocumentType.bank_statement,
+)
+_EXTRA_DOCUMENTS = (DocumentType.business_license, DocumentType.other)
+_MIME_TYPES = {"pdf": "application/pdf", "jpg": "image/jpeg", "png": "image/png"}
+# Estados de aplicación que ve un operador en su cola de revisión
+REVIEW_QUEUE = (CreditApplicationStatus.pending, CreditApplicationStatus.in_review)
+
+
+def database_url(settings: Settings) -> str:
+    """Misma URL que arma `app.bootstrap` a partir de las variables `DB_*`."""
+    return (
+        f"postgresql+asyncpg://{settings.db_user}:{settings.db_pass}"
+        f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
+    )
+
+
+async def create_schema(conn: AsyncConnection) -> None:
+    """Crea los tipos enum (los modelos usan `create_type=False`) y las tablas."""
+    if conn.dialect.name == "postgresql":
+        for enum, name in _ENUM_TYPES:
+            labels = ", ".join(f"'{member.value}'" for member in enum)
+            await conn.execute(
+                text(
+                    f"DO $$ BEGIN CREATE TYPE {name} AS ENUM ({labels}); "
+                    "EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+                )
+            )
+    await conn.run_sync(SQLModel.metadata.create_all)
+
+
+async def truncate(conn: AsyncConnection) -> None:
+    if conn.dialect.name == "postgresql":
+        await conn.execute(
+            text("TRUNCATE documents, credit_applications, companies, profiles CASCADE")
+        )
+        return
+    for _, model in reversed(TABLES):
+        await conn.execute(model.__table__.delete())
+
+
+class SeedData:
+    """Un bloque de filas por tabla y la parte del manifiesto que le corresponde."""
+
+    def __init__(self) -> None:
+        self.profiles: list[dict[str, Any]] = []
+        self.companies: list[dict[str, Any]] = []
+        self.applications: list[dict[str, Any]] = []
+        self.documents: list[dict[str, Any]] = []
+        self.manifest: dict[str, Any] = {
+            "applicants": [],
+            "operators": [],
+            "admins": [],
+            "review_queue": [],
+        }
+
+
+class _Pools:
+    """Valores de Faker precalculados, elegidos luego con el `Random` del grafo."""
+
+    def __init__(self, seed: int) -> None:
+        fake = Faker("es_MX")
+        fake.seed_instance(seed)
+        self.first_names = [fake.first_name()[:100] for _ in range(_POOL_SIZE)]
+        self.last_names = [fake.last_name()[:100] for _ in range(_POOL_SIZE)]
+        self.companies = [fake.company()[:200] for _ in range(_POOL_SIZE)]
+        self.addresses = [
+            {
+                "street": fake.street_address(),
+                "city": fake.city(),
+                "state": fake.state(),
+                "zip_code": fake.postcode(),
+                "country": "México",
+            }
+            for _ in range(_POOL_SIZE)
+        ]
+        self.slugs = [fake.slug() for _ in range(_POOL_SIZE)]
+        self.sentences = [fake.sentence(nb_words=4) for _ in range(200)]
+
+
+def _document_states(
+    status: CreditApplicationStatus, rng: random.Random
+) -> tuple[DocumentStatus, SignatureStatus]:
+    """Estado de revisión y de firma de un documento según el de su solicitud."""
+    if status == CreditApplicationStatus.draft:
+        return (
+            DocumentStatus.requested if rng.random() < 0.5 else DocumentStatus.uploaded,
+            SignatureStatus.unsigned,
+        )
+    if status == CreditApplicationStatus.pending:
+        return (
+            DocumentStatus.requested if rng.random() < 0.1 else DocumentStatus.uploaded,
+            SignatureStatus.unsigned,
+        )
+    if status == CreditApplicationStatus.in_review:
+        review = rng.choices(
+            (DocumentStatus.uploaded, DocumentStatus.pending, DocumentStatus.approved),
+            (3, 4, 3),
+        )[0]
+        return review, SignatureStatus.unsigned
+    if status == CreditApplicationStatus.approved:
+        signature = rng.choices(
+            (SignatureStatus.signed, SignatureStatus.pending, SignatureStatus.unsigned),
+            (7, 2, 1),
+        )[0]
+        return DocumentStatus.approved, signature
+    review = rng.choices((DocumentStatus.approved, DocumentStatus.rejected), (6, 4))[0]
+    declined = rng.random() < 0.05
+    return review, SignatureStatus.declined if declined else SignatureStatus.unsigned
+
+
+def iter_chunks(
+    *,
+    applicants: int,
+    applications_per_company: int,
+    documents_per_application: int,
+    operators: int,
+    admins: int,
+    seed: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[SeedData]:
+    """Genera el grafo por bloques de `chunk_size` empresas, de forma
+    determinista para `seed`. Operadores y admins van en el primer bloque."""
+    rng = random.Random(seed)
+    pools = _Pools(seed)
+    now = datetime.now(UTC)
+    statuses = list(_APPLICATION_STATUS_WEIGHTS)
+    status_weights = list(_APPLICATION_STATUS_WEIGHTS.values())
+    purposes = list(_PURPOSE_WEIGHTS)
+    purpose_weights = list(_PURPOSE_WEIGHTS.values())
+    terms = list(_TERM_WEIGHTS)
+    term_weights = list(_TERM_WEIGHTS.values())
+    extensions = list(_MIME_TYPES)
+
+    def new_uuid() -> uuid.UUID:
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    def profile(data: SeedData, role: UserRole, index: int) -> dict[str, Any]:
+        row = {
+            "id": new_uuid(),
+            "email": f"{role.value}{index}@perf.example.com",
+            "first_name": rng.choice(pools.first_names),
+            "last_name": rng.choice(pools.last_names),
+            "role": role,
+            "created_at": now,
+            "updated_at": now,
+        }
+        data.profiles.append(row)
+        return row
+
+    data = SeedData()
+    for role, count, key in (
+        (UserRole.operator, operators, "operators"),
+        (UserRole.admin, admins, "admins"),
+    ):
+        for i in range(count):
+            row = profile(data, role, i)
+            data.manifest[key].append({"id": str(row["id"]), "email": row["email"]})
+
+    for i in range(applicants):
+        if i and i % chunk_size == 0:
+            yield data
+            data = SeedData()
+        user = profile(data, UserRole.applicant, i)
+        company_id = new_uuid()
+        created = now - timedelta(days=rng.randint(30, 1080))
+        data.companies.append(
+            {
+                "id": company_id,
+                "user_id": user["id"],
+                "legal_name": f"{rng.choice(pools.companies)} {i}",
+                "tax_id": f"PERF{i:010d}",
+                "contact_email": user["email"],
+                "contact_phone": f"55{rng.randrange(10**8):08d}",
+                "address": rng.choice(pools.addresses),
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+        entry: dict[str, Any] = {
+            "id": str(user["id"]),
+            "email": user["email"],
+            "company_id": str(company_id),
+            "application_ids": [],
+            "document_ids": [],
+        }
+        for _ in range(applications_per_company):
+            app_id = new_uuid()
+            status = rng.choices(statuses, status_weights)[0]
+            purpose = rng.choices(purposes, purpose_weights)[0]
+            # Log-normal con mediana ~500k, acotada a [50k, 20M] y en miles
+            amount = Decimal(
+                round(min(max(rng.lognormvariate(13.1, 0.9), 50_000), 20_000_000), -3)
+            )
+            approved = status == CreditApplicationStatus.approved
+            app_created = created + timedelta(days=rng.randint(0, 29))
+            app_updated = min(app_created + timedelta(days=rng.randint(0, 20)), now)
+            data.applications.append(
+                {
+                    "id": app_id,
+                    "company_id": company_id,
+                    "requested_amount": amount,
+                    "purpose": purpose,
+                    "purpose_other": rng.choice(pools.sentences)
+                    if purpose == CreditApplicationPurpose.other
+                    else None,
+                    "term_months": rng.choices(terms, term_weights)[0],
+                    "status": status,
+                    "risk_score": Decimal(rng.randint(0, 10000)) / 100
+                    if status != CreditApplicationStatus.draft
+                    else None,
+                    "approved_amount": (
+                        amount * Decimal(rng.choice((50, 75, 90, 100))) / 100
+                    ).quantize(Decimal("1.00"))
+                    if approved
+                    else None,
+                    "interest_rate": Decimal(rng.randint(900, 3200)) / 100
+                    if approved
+                    else None,
+                    "created_at": app_created,
+                    "updated_at": app_updated,
+                }
+            )
+            entry["application_ids"].append(str(app_id))
+            if status in REVIEW_QUEUE:
+                data.manifest["review_queue"].append(str(app_id))
+            for d in range(documents_per_application):
+                doc_id = new_uuid()
+                document_type = (
+                    _CHECKLIST[d]
+                    if d < len(_CHECKLIST)
+                    else rng.choice(_EXTRA_DOCUMENTS)
+                )
+                review, signature = _document_states(status, rng)
+                uploaded = review != DocumentStatus.requested
+                extension = rng.choices(extensions, (8, 1, 1))[0]
+                file_name = f"{rng.choice(pools.slugs)}.{extension}"
+                signed_at = app_updated if signature == SignatureStatus.signed else None
+                data.documents.append(
+                    {
+                        "id": doc_id,
+                        "user_id": user["id"],
+                        "application_id": app_id,
+                        "storage_path": f"{app_id}/{doc_id}/{file_name}"
+                        if uploaded
+                        else None,
+                        "bucket_name": "documents" if uploaded else None,
+                        "file_name": file_name if uploaded else None,
+                        "file_size": int(rng.lognormvariate(13, 1)) + 10_000
+                        if uploaded
+                        else None,
+                        "mime_type": _MIME_TYPES[extension] if uploaded else None,
+                        "document_type": document_type,
+                        "status": review,
+                        "extra_metadata": None,
+                        "signature_request_id": uuid.UUID(int=rng.getrandbits(128)).hex
+                        if signature != SignatureStatus.unsigned
+                        else None,
+                        "signature_status": signature,
+                        "signed_at": signed_at,
+                        "signed_file_path": f"signed/{doc_id}.pdf"
+                        if signed_at
+                        else None,
+                        "created_at": app_created,
+                        "updated_at": app_updated,
+                    }
+                )
+                if uploaded and signature != SignatureStatus.signed:
+                    entry["document_ids"].append(str(doc_id))
+        data.manifest["applicants"].append(entry)
+    yield data
+
+
+def _copy_value(value: Any, column_type: str) -> Any:
+    """Adapta un valor de la fila al tipo de la columna para COPY binario."""
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        return value.value
+    if column_type in ("json", "jsonb"):
+        return json.dumps(value)
+    if column_type == "timestamp without time zone" and isinstance(value, datetime):
+        return value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+async def _column_types(conn: AsyncConnection, table: str) -> dict[str, str]:
+    result = await conn.execute(
+        text(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table"
+        ),
+        {"table": table},
+    )
+    return dict(result.tuples().all())
+
+
+async def copy_chunk(conn: AsyncConnection, data: SeedData) -> None:
+    """Carga el bloque con `copy_records_to_table` de asyncpg, tabla por tabla y
+    dentro de la transacción de `conn`."""
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+    for attr, model in TABLES:
+        rows = getattr(data, attr)
+        if not rows:
+            continue
+        table = model.__table__.name
+        types = await _column_types(conn, table)
+        columns = [name for name in rows[0] if name in types]
+        await driver.copy_records_to_table(
+            table,
+            columns=columns,
+            records=[
+                tuple(_copy_value(row[c], types[c]) for c in columns) for row in rows
+            ],
+        )
+
+
+async def insert_chunk(conn: AsyncConnection, data: SeedData) -> None:
+    for attr, model in TABLES:
+        rows = getattr(data, attr)
+        for start in range(0, len(rows), BATCH_SIZE):
+            await conn.execute(
+                insert(model.__table__), rows[start : start + BATCH_SIZE]
+            )
+
+
+class _Manifest:
+    """Manifiesto acotado: los primeros `limit` solicitantes y solicitudes en
+    cola, más todos los operadores y admins."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.data: dict[str, list[Any]] = {
+            "applicants": [],
+            "operators": [],
+            "admins": [],
+            "review_queue": [],
+        }
+
+    def add(self, part: dict[str, list[Any]]) -> None:
+        for key, values in part.items():
+            room = (
+                len(values)
+                if key in ("operators", "admins")
+                else self.limit - len(self.data[key])
+            )
+            self.data[key].extend(values[: max(room, 0)])
+
+
+async def seed_database(
+    engine: AsyncEngine,
+    chunks: Iterable[SeedData],
+    *,
+    schema: bool = False,
+    clear: bool = False,
+    manifest_limit: int = DEFAULT_MANIFEST_LIMIT,
+) -> dict[str, Any]:
+    """Carga los bloques (una transacción por bloque) y devuelve el manifiesto
+    acotado y los totales por tabla."""
+    async with engine.begin() as conn:
+        if schema:
+            await create_schema(conn)
+        if clear:
+            await truncate(conn)
+
+    manifest = _Manifest(manifest_limit)
+    totals = dict.fromkeys((attr for attr, _ in TABLES), 0)
+    for data in chunks:
+        async with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                # Los datos sintéticos se regeneran si se pierden: no esperar el WAL
+                await conn.execute(text("SET LOCAL synchronous_commit = off"))
+                await copy_chunk(conn, data)
+            else:
+                await insert_chunk(conn, data)
+        manifest.add(data.manifest)
+        for attr in totals:
+            totals[attr] += len(getattr(data, attr))
+    return {"manifest": manifest.data, "totals": totals}
+
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="por defecto, a partir de DB_*")
+    parser.add_argument("--applicants", type=int, default=1000)
+    parser.add_argument("--applications-per-company", type=int, default=3)
+    parser.add_argument("--documents-per-application", type=int, default=4)
+    parser.add_argument("--operators", type=int, default=20)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--create-schema", action="store_true")
+    parser.add_argument("--truncate", action="store_true")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--manifest-limit", type=int, default=DEFAULT_MANIFEST_LIMIT)
+    args = parser.parse_args(argv)
+
+    chunks = iter_chunks(
+        applicants=args.applicants,
+        applications_per_company=args.applications_per_company,
+        documents_per_application=args.documents_per_application,
+        operators=args.operators,
+        admins=args.admins,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+    )
+    engine = create_async_engine(args.database_url or database_url(Settings()))
+    started = time.perf_counter()
+    try:
+        result = await seed_database(
+            engine,
+            _progress(chunks, math.ceil(args.applicants / args.chunk_size)),
+            schema=args.create_schema,
+            clear=args.truncate,
+            manifest_limit=args.manifest_limit,
+        )
+    finally:
+        await engine.dispose()
+
+    Path(args.manifest).write_text(json.dumps(result["manifest"], indent=2))
+    totals = result["totals"]
+    print(
+        f"{totals['profiles']} perfiles, {totals['companies']} empresas, "
+        f"{totals['applications']} solicitudes, {totals['documents']} documentos "
+        f"en {time.perf_counter() - started:.1f}s; manifiesto en {args.manifest}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _progress(chunks: Iterator[SeedData], total: int) -> Iterator[SeedData]:
+    for n, data in enumerate(chunks, 1):
+        yield data
+        if total > 1:
+            print(f"bloque {n}/{total}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,223 @@
+"""Fixtures compartidas: la app sobre SQLite (aiosqlite) sin lifespan.
+
+Cada prueba arma en `app.state` los mismos recursos que `app_lifespan`, sobre
+una base SQLite en un directorio temporal. `idempotency_keys` vive en el
+esquema `public` de Postgres: aquí es una segunda base adjunta con ese nombre.
+El JWT no se verifica: el token es directamente el `sub` del usuario.
+"""
+
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlmodel import SQLModel
+
+from app.config import Settings, get_settings
+from app.core.enums import (
+    CreditApplicationPurpose,
+    CreditApplicationStatus,
+    DocumentStatus,
+    DocumentType,
+    UserRole,
+)
+from app.core.idempotency import IdempotencyStore
+from app.core.instrumentation import instrument_engine
+from app.core.rate_limit import MemoryBackend, RateLimiter
+from app.core.resilience import build_outbound_policies
+from app.core.unit_of_work import UnitOfWorkSession
+from app.dependencies.auth import BearerToken, get_jwt_payload
+from app.main import app as main_app
+from app.models import Company, CreditApplication, Profile
+
+# No se exporta en app.models: importarlo registra la tabla documents
+from app.models.document import Document
+from app.services.signature_webhook_service import SignatureEventQueue
+
+_IDEMPOTENCY_KEYS = """
+CREATE TABLE public.idempotency_keys (
+    user_id CHAR(32) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    fingerprint VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    content_type VARCHAR(255),
+    body BLOB,
+    locked_until DATETIME,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, key)
+)
+"""
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat(" ")
+
+
+@pytest.fixture
+def settings() -> Settings:
+    """Configuración de pruebas; cada módulo puede sobrescribirla."""
+    return Settings(
+        _env_file=None,
+        SUPABASE_URL="http://127.0.0.1:9",
+        HELLOSIGN_API_KEY="test-key",
+        HELLOSIGN_CLIENT_ID="test-client",
+        SLOW_QUERY_THRESHOLD_MS=0,
+        SIGNATURE_RECONCILE_ENABLED=False,
+    )
+
+
+@pytest.fixture
+async def engine(tmp_path) -> AsyncIterator[AsyncEngine]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+    public = tmp_path / "public.db"
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _connect(dbapi_connection: Any, connection_record: Any) -> None:
+        # Funciones de Postgres que usan los server_default de los modelos
+        dbapi_connection.create_function("now", 0, _now)
+        dbapi_connection.create_function("gen_random_uuid", 0, lambda: uuid4().hex)
+        dbapi_connection.execute(f"ATTACH DATABASE '{public}' AS public")
+
+    instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.exec_driver_sql(_IDEMPOTENCY_KEYS)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        sync_session_class=UnitOfWorkSession,
+        expire_on_commit=False,
+    )
+
+
+@pytest.fixture
+def commits(engine: AsyncEngine) -> list[None]:
+    """Un elemento por cada COMMIT que llega a la base."""
+    seen: list[None] = []
+    event.listen(engine.sync_engine, "commit", lambda conn: seen.append(None))
+    return seen
+
+
+async def _jwt_payload(creds: BearerToken) -> dict:
+    return {"sub": creds.credentials}
+
+
+@pytest.fixture
+def app(
+    settings: Settings,
+    engine: AsyncEngine,
+    session_maker: async_sessionmaker[AsyncSession],
+) -> Iterator[FastAPI]:
+    state = main_app.state
+    state.settings = settings
+    state.async_session = session_maker
+    state.slow_query_log = None
+    state.profiler = None
+    state.allocation_tracker = None
+    state.outbound_policies = build_outbound_policies(settings)
+    state.rate_limiter = RateLimiter(
+        MemoryBackend(),
+        rate=settings.rate_limit_rate,
+        burst=settings.rate_limit_burst,
+    )
+    state.idempotency = IdempotencyStore(
+        engine, ttl=settings.idempotency_ttl, lease=settings.idempotency_lease
+    )
+    state.signature_event_queue = SignatureEventQueue(session_maker)
+    main_app.dependency_overrides[get_jwt_payload] = _jwt_payload
+    main_app.dependency_overrides[get_settings] = lambda: settings
+    yield main_app
+    main_app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def client(app: FastAPI) -> AsyncIterator[AsyncClient]:
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@dataclass
+class Seed:
+    applicant: UUID
+    operator: UUID
+    company: UUID
+    application: UUID
+    document: UUID
+
+    @property
+    def as_applicant(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.applicant}"}
+
+    @property
+    def as_operator(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.operator}"}
+
+
+@pytest.fixture
+async def seed(session_maker: async_sessionmaker[AsyncSession]) -> Seed:
+    """Un solicitante con empresa, una solicitud pendiente y un documento
+    solicitado, y un operador."""
+    applicant = Profile(id=uuid4(), email="applicant@example.com")
+    operator = Profile(id=uuid4(), email="operator@example.com", role=UserRole.operator)
+    company = Company(
+        user_id=applicant.id,
+        legal_name="Ferretería El Tornillo SpA",
+        tax_id="76.123.456-7",
+        contact_email="contacto@eltornillo.cl",
+        contact_phone="+56912345678",
+        address={
+            "street": "Av. Siempre Viva 742",
+            "city": "Santiago",
+            "state": "Región Metropolitana",
+            "zip_code": "8320000",
+            "country": "Chile",
+        },
+    )
+    application = CreditApplication(
+        company_id=company.id,
+        requested_amount=Decimal(5000000),
+        purpose=CreditApplicationPurpose.working_capital,
+        term_months=24,
+        status=CreditApplicationStatus.pending,
+        interest_rate=Decimal(10),
+    )
+    document = Document(
+        user_id=applicant.id,
+        application_id=application.id,
+        document_type=DocumentType.tax_return,
+        status=DocumentStatus.requested,
+    )
+    async with session_maker() as session:
+        session.add_all([applicant, operator])
+        await session.flush()
+        session.add(company)
+        await session.flush()
+        session.add_all([application, document])
+        await session.commit()
+    return Seed(
+        applicant=applicant.id,
+        operator=operator.id,
+        company=company.id,
+        application=application.id,
+        document=document.id,
+    )
@@ -0,0 +1,142 @@
+"""Control de admisión: cupos, cola por prioridad y rechazo con el pool saturado
+(ver app/core/admission.py)."""
+
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejected,
+    PoolWait,
+    Priority,
+    route_priority,
+)
+from app.main import app as main_app
+
+
+def controller(**overrides) -> AdmissionController:
+    options = {
+        "max_in_flight": 1,
+        "max_queue": 4,
+        "queue_timeout": 1.0,
+        "pool_wait_target": 0.05,
+        "pool_wait": PoolWait(),
+    }
+    return AdmissionController(**{**options, **overrides})
+
+
+async def test_fast_path_admits_up_to_max_in_flight():
+    admission = controller(max_in_flight=2)
+
+    assert admission.try_admit()
+    assert admission.try_admit()
+    assert not admission.try_admit()
+    assert admission.in_flight == 2
+
+
+async def test_released_slot_goes_to_highest_priority_waiter():
+    admission = controller()
+    assert admission.try_admit()
+    order: list[Priority] = []
+
+    async def wait(level: Priority) -> None:
+        await admission.admit(level)
+        order.append(level)
+        admission.release(0.01)
+
+    waiters = [
+        asyncio.create_task(wait(level))
+        for level in (Priority.low, Priority.normal, Priority.high)
+    ]
+    await asyncio.sleep(0)
+    assert admission.queued == 3
+
+    admission.release(0.01)
+    await asyncio.gather(*waiters)
+
+    assert order == [Priority.high, Priority.normal, Priority.low]
+    assert admission.in_flight == 0
+    assert admission.queued == 0
+
+
+async def test_full_queue_rejects_with_503():
+    admission = controller(max_queue=0)
+    assert admission.try_admit()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.admit(Priority.high)
+
+    assert (rejected.value.status, rejected.value.reason) == (503, "queue_full")
+
+
+async def test_queue_timeout_rejects_with_503():
+    admission = controller(queue_timeout=0.01)
+    assert admission.try_admit()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.admit(Priority.normal)
+
+    assert (rejected.value.status, rejected.value.reason) == (503, "queue_timeout")
+    assert admission.queued == 0
+
+
+async def test_saturated_pool_sheds_low_priority_and_caps_in_flight():
+    pool_wait = PoolWait()
+    pool_wait.capacity = 2
+    pool_wait.average = 0.5
+    admission = controller(max_in_flight=10, pool_wait=pool_wait)
+
+    assert admission.limit() == 2
+    with pytest.raises(AdmissionRejected) as rejected:
+        await admission.admit(Priority.low)
+    assert (rejected.value.status, rejected.value.reason) == (429, "pool_saturated")
+
+    assert admission.try_admit()
+    assert admission.try_admit()
+    assert not admission.try_admit()
+
+
+def test_route_priority_reads_endpoint_declaration():
+    def scope(method: str, path: str) -> dict:
+        return {"type": "http", "app": main_app, "method": method, "path": path}
+
+    document = "/api/v1/documents/00000000-0000-0000-0000-000000000001"
+    assert route_priority(scope("POST", f"{document}/sign")) == Priority.high
+    assert route_priority(scope("GET", "/api/v1/companies/")) == Priority.low
+    assert route_priority(scope("GET", document)) == Priority.normal
+
+
+async def test_middleware_rejects_with_retry_after_and_exempts_health():
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("ok")
+
+    async def health(request):
+        return PlainTextResponse("healthy")
+
+    app = Starlette(routes=[Route("/slow", slow), Route("/health", health)])
+    wrapped = AdmissionMiddleware(app, controller=controller(max_queue=0))
+
+    async with AsyncClient(
+        transport=ASGITransport(app=wrapped), base_url="http://test"
+    ) as client:
+        first = asyncio.create_task(client.get("/slow"))
+        await asyncio.sleep(0.05)
+
+        rejected = await client.get("/slow")
+        assert rejected.status_code == 503
+        assert int(rejected.headers["Retry-After"]) >= 1
+        assert "detail" in rejected.json()
+
+        assert (await client.get("/health")).status_code == 200
+
+        release.set()
+        assert (await first).status_code == 200
@@ -0,0 +1,68 @@
+"""Microbenchmarks de los repositorios y su gate de regresión (ver perf/bench.py)."""
+
+import random
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from perf import bench
+from perf.bench import OPERATIONS, Fixtures, measure, regressions
+
+
+def results(**ops: tuple[float, float]) -> dict:
+    return {
+        "results": {
+            "1000": {
+                name: {"median_ms": median, "alloc_peak_kb": alloc}
+                for name, (median, alloc) in ops.items()
+            }
+        }
+    }
+
+
+def test_regressions_flag_time_over_threshold_and_noise():
+    baseline = results(slow=(1.0, 10.0), noisy=(0.01, 10.0), steady=(2.0, 10.0))
+    current = results(slow=(1.5, 10.0), noisy=(0.03, 10.0), steady=(2.1, 10.0))
+
+    found = regressions(baseline, current, max_regression=20, noise_ms=0.05)
+
+    assert found == ["[1000] slow: mediana 1.000 -> 1.500 ms (+50%)"]
+
+
+def test_regressions_flag_memory_and_skip_new_operations():
+    baseline = results(load=(1.0, 100.0))
+    current = results(load=(1.0, 150.0), added=(90.0, 900.0))
+
+    found = regressions(baseline, current, max_regression=20, noise_ms=0.05)
+
+    assert found == ["[1000] load: memoria 100.0 -> 150.0 KiB"]
+
+
+def test_fixtures_keep_a_bounded_sample(monkeypatch):
+    monkeypatch.setattr(bench, "SAMPLE_SIZE", 3)
+    fx = Fixtures(random.Random(7))
+
+    fx._sample("application_ids", range(100))
+
+    assert len(fx.application_ids) == 3
+    assert set(fx.application_ids) <= set(range(100))
+    assert fx._seen["application_ids"] == 100
+
+
+async def test_every_operation_runs_on_seeded_data(engine, capsys):
+    fx = await bench.seed(engine, rows=48, seed=3)
+    sessionmaker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with sessionmaker() as session:
+        await fx.load(session)
+
+    assert fx.company_ids
+    assert len(fx.company_ids) == len(fx.user_ids)
+    assert fx.profile is not None
+    assert fx.application is not None
+    for name, operation in OPERATIONS.items():
+        timing = await measure(sessionmaker, operation, fx, repeat=2, warmup=0)
+        assert timing["runs"] == 2, name
+        assert 0 < timing["min_ms"] <= timing["median_ms"] <= timing["p95_ms"], name
+        assert timing["alloc_peak_kb"] > 0, name
+    assert "[48] sembrado en" in capsys.readouterr().err
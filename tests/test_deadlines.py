@@ -0,0 +1,189 @@
+"""Deadline por request y su propagación a la BD y a las llamadas salientes
+(ver app/core/deadlines.py)."""
+
+import asyncio
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core import deadlines
+from app.core.deadlines import (
+    Deadline,
+    DeadlineMiddleware,
+    apply_to_transaction,
+    deadline,
+    remaining,
+    translate_db_error,
+)
+from app.core.errors import DeadlineExceededError
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitState,
+    OutboundPolicy,
+    RetryBudget,
+)
+from app.exception_handlers import register_exception_handlers
+
+
+@pytest.fixture
+def request_deadline() -> Iterator[Deadline]:
+    """Deadline de 0,2 s, como si el request estuviera en curso."""
+    current = Deadline({}, default=0.2, statement_timeout=5, lock_timeout=0.05)
+    token = deadlines._current.set(current)
+    yield current
+    deadlines._current.reset(token)
+
+
+class FakeConnection:
+    def __init__(self, dialect: str) -> None:
+        self.dialect = SimpleNamespace(name=dialect)
+        self.executed: list[dict[str, str]] = []
+
+    def execute(self, statement, parameters) -> None:
+        self.executed.append(parameters)
+
+
+def db_error(sqlstate: str | None) -> SimpleNamespace:
+    return SimpleNamespace(original_exception=SimpleNamespace(sqlstate=sqlstate))
+
+
+def test_route_deadline_overrides_default():
+    @deadline(30)
+    async def sign() -> None: ...
+
+    scope = {"route": SimpleNamespace(endpoint=sign)}
+    current = Deadline(scope, default=1, statement_timeout=5, lock_timeout=1)
+
+    assert 29 < current.remaining() <= 30
+    without_route = Deadline({}, default=1, statement_timeout=5, lock_timeout=1)
+    assert 0 < without_route.remaining() <= 1
+
+
+def test_no_deadline_outside_a_request():
+    assert remaining() is None
+    connection = FakeConnection("postgresql")
+
+    apply_to_transaction(None, None, connection)
+
+    assert connection.executed == []
+
+
+def test_transaction_is_clamped_to_the_remaining_time(request_deadline):
+    connection = FakeConnection("postgresql")
+
+    apply_to_transaction(None, None, connection)
+
+    [parameters] = connection.executed
+    # El restante (< 200 ms) le gana al statement_timeout de base (5 s); el
+    # lock_timeout (50 ms) ya es menor
+    assert 0 < int(parameters["statement_timeout"]) <= 200
+    assert parameters["lock_timeout"] == "50"
+
+
+def test_expired_deadline_does_not_begin_the_transaction(request_deadline):
+    request_deadline.started -= 1
+    connection = FakeConnection("postgresql")
+
+    with pytest.raises(DeadlineExceededError):
+        apply_to_transaction(None, None, connection)
+
+    assert connection.executed == []
+
+
+def test_other_dialects_are_not_touched(request_deadline):
+    connection = FakeConnection("sqlite")
+
+    apply_to_transaction(None, None, connection)
+
+    assert connection.executed == []
+
+
+async def test_postgres_timeouts_become_504_and_503():
+    app = FastAPI()
+    register_exception_handlers(app)
+
+    @app.get("/{sqlstate}")
+    async def fail(sqlstate: str) -> None:
+        raise translate_db_error(db_error(sqlstate))
+
+    assert translate_db_error(db_error("23505")) is None
+    assert translate_db_error(db_error(None)) is None
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        canceled = await client.get("/57014")
+        locked = await client.get("/55P03")
+
+    assert canceled.status_code == 504
+    assert locked.status_code == 503
+    assert locked.headers["Retry-After"] == "1"
+
+
+async def test_middleware_scopes_the_deadline_to_the_request():
+    app = FastAPI()
+
+    @app.get("/default")
+    async def default_deadline() -> float:
+        return remaining()
+
+    @app.get("/slow")
+    @deadline(20)
+    async def slow() -> float:
+        return remaining()
+
+    wrapped = DeadlineMiddleware(app, default=2, statement_timeout=5, lock_timeout=1)
+    async with AsyncClient(
+        transport=ASGITransport(app=wrapped), base_url="http://test"
+    ) as client:
+        default_left = (await client.get("/default")).json()
+        slow_left = (await client.get("/slow")).json()
+
+    assert 0 < default_left <= 2
+    assert 2 < slow_left <= 20
+    assert remaining() is None
+
+
+async def test_deadline_cut_probe_releases_the_breaker(request_deadline):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    upstream = OutboundPolicy(
+        "test", timeout=5, max_concurrency=1, breaker=breaker, budget=RetryBudget()
+    )
+
+    async def hang() -> None:
+        await asyncio.sleep(5)
+
+    with pytest.raises(DeadlineExceededError):
+        await upstream.call(hang)
+    # Ni éxito ni fallo: la próxima llamada vuelve a ser la prueba
+    assert breaker.state == CircuitState.half_open
+
+    async def ok() -> str:
+        return "ok"
+
+    request_deadline.default = 5
+    assert await upstream.call(ok) == "ok"
+    assert breaker.state == CircuitState.closed
+
+
+async def test_expired_deadline_fails_fast_on_outbound_calls(request_deadline):
+    request_deadline.started -= 1
+    calls = 0
+
+    async def never() -> None:
+        nonlocal calls
+        calls += 1
+
+    upstream = OutboundPolicy(
+        "test",
+        timeout=5,
+        max_concurrency=1,
+        breaker=CircuitBreaker(),
+        budget=RetryBudget(),
+    )
+    with pytest.raises(DeadlineExceededError):
+        await upstream.call(never)
+    assert calls == 0
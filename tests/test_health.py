@@ -0,0 +1,66 @@
+"""Chequeos de readiness en segundo plano (ver app/core/health.py)."""
+
+import asyncio
+
+import pytest
+
+from app.core.health import DATABASE, JWKS, POOL, STORAGE, HealthMonitor
+
+
+@pytest.fixture
+def monitor(engine, settings) -> HealthMonitor:
+    settings.health_check_timeout = 0.05
+    monitor = HealthMonitor(engine, jwks_client=None, settings=settings)
+
+    async def reachable() -> tuple[bool, str]:
+        return True, "HTTP 200"
+
+    async def cached() -> tuple[bool, str]:
+        return True, "en caché"
+
+    monitor._check_storage = reachable
+    monitor._check_jwks = cached
+    return monitor
+
+
+async def test_all_checks_pass(monitor):
+    checks = await monitor.run_once()
+
+    assert list(checks) == [DATABASE, POOL, JWKS, STORAGE]
+    assert all(result.ok for result in checks.values())
+    assert monitor.status() == "ready"
+
+
+async def test_unexpected_error_fails_only_its_check(monitor):
+    async def broken() -> tuple[bool, str]:
+        raise KeyError("keys")
+
+    monitor._check_jwks = broken
+
+    checks = await monitor.run_once()
+
+    assert not checks[JWKS].ok
+    assert checks[JWKS].detail == "KeyError: 'keys'"
+    assert checks[DATABASE].ok
+    assert checks[POOL].ok
+    assert checks[STORAGE].ok
+    assert monitor.status() == "not_ready"
+
+
+async def test_expected_failures_and_timeouts_are_reported(monitor):
+    async def refused() -> tuple[bool, str]:
+        raise ConnectionRefusedError("storage")
+
+    async def hangs() -> tuple[bool, str]:
+        await asyncio.sleep(1)
+        return True, "tarde"
+
+    monitor._check_storage = refused
+    monitor._check_jwks = hangs
+
+    checks = await monitor.run_once()
+
+    assert checks[STORAGE].detail == "ConnectionRefusedError: storage"
+    assert checks[JWKS].detail == "sin respuesta en 0.05s"
+    # Storage no es crítico por defecto; el JWKS sí
+    assert monitor.status() == "not_ready"
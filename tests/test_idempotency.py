@@ -0,0 +1,88 @@
+"""Idempotency-Key en los POST que crean recursos (ver app/core/idempotency.py)."""
+
+from sqlalchemy import func, select, text
+
+from app.core.query_tracking import assert_max_queries
+from app.models import CreditApplication
+
+URL = "/api/v1/credit-applications/"
+BODY = {"requested_amount": "2500000", "term_months": 36, "purpose": "inventory"}
+
+
+async def _applications(session_maker) -> int:
+    async with session_maker() as session:
+        return await session.scalar(select(func.count()).select_from(CreditApplication))
+
+
+async def _stored_keys(session_maker) -> list[tuple]:
+    async with session_maker() as session:
+        result = await session.execute(
+            text("SELECT key, status_code FROM public.idempotency_keys")
+        )
+        return [tuple(row) for row in result]
+
+
+async def test_retry_replays_stored_response(client, seed, session_maker):
+    headers = {**seed.as_applicant, "Idempotency-Key": "retry-1"}
+
+    first = await client.post(URL, json=BODY, headers=headers)
+    retry = await client.post(URL, json=BODY, headers=headers)
+
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    # La solicitud sembrada y una sola nueva
+    assert await _applications(session_maker) == 2
+    assert await _stored_keys(session_maker) == [("retry-1", 200)]
+
+
+async def test_same_key_with_other_body_is_rejected(client, seed, session_maker):
+    headers = {**seed.as_applicant, "Idempotency-Key": "reused"}
+
+    await client.post(URL, json=BODY, headers=headers)
+    other = await client.post(URL, json={**BODY, "term_months": 12}, headers=headers)
+
+    assert other.status_code == 400
+    assert await _applications(session_maker) == 2
+
+
+async def test_failed_request_releases_key(client, seed, session_maker):
+    headers = {**seed.as_applicant, "Idempotency-Key": "fails-first"}
+
+    # Un solicitante no puede crear una solicitud ya aprobada
+    failed = await client.post(
+        URL, json={**BODY, "status": "approved"}, headers=headers
+    )
+    assert failed.status_code >= 400
+    assert await _stored_keys(session_maker) == []
+
+    # Liberada: la misma clave sirve para el request corregido
+    retried = await client.post(URL, json=BODY, headers=headers)
+    assert retried.status_code == 200
+    assert "Idempotent-Replayed" not in retried.headers
+    assert await _stored_keys(session_maker) == [("fails-first", 200)]
+
+
+async def test_requests_without_key_are_not_deduplicated(client, seed, session_maker):
+    for _ in range(2):
+        response = await client.post(URL, json=BODY, headers=seed.as_applicant)
+        assert response.status_code == 200
+
+    assert await _applications(session_maker) == 3
+    assert await _stored_keys(session_maker) == []
+
+
+async def test_key_handling_is_not_charged_to_the_query_budget(client, seed):
+    async with assert_max_queries(50) as plain:
+        await client.post(URL, json=BODY, headers=seed.as_applicant)
+    headers = {**seed.as_applicant, "Idempotency-Key": "budget"}
+    async with assert_max_queries(50) as keyed:
+        await client.post(URL, json=BODY, headers=headers)
+    async with assert_max_queries(50) as replayed:
+        replay = await client.post(URL, json=BODY, headers=headers)
+
+    assert keyed.queries == plain.queries
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replayed.queries == 0
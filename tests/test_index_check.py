@@ -0,0 +1,223 @@
+"""Índices por forma de consulta y la suite de planes (ver perf/index_check.py).
+
+Los EXPLAIN necesitan Postgres; aquí se verifica lo que no depende de él: que
+migraciones, `init_db.sql` y modelos declaren los mismos índices, el SQL que
+captura cada caso, la lectura de planes y que los snapshots cubran los casos.
+"""
+
+import json
+import re
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import SQLModel
+
+from app.routers.credit_applications import ALLOWED_SORT_FIELDS
+from perf import bench
+from perf.index_check import (
+    CASES,
+    DEFAULT_SNAPSHOTS,
+    FULL_COUNTS,
+    access_paths,
+    capture,
+    compare,
+    describe,
+    is_count,
+    plan_shape,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+_CREATED = re.compile(
+    r"CREATE INDEX (?:CONCURRENTLY )?IF NOT EXISTS (\w+)\s+ON public\.(\w+)"
+)
+_DROPPED = re.compile(r"DROP INDEX CONCURRENTLY IF EXISTS public\.(\w+)")
+
+
+def model_indexes() -> dict[str, str]:
+    """Índice -> tabla de los declarados en los modelos."""
+    return {
+        index.name: table.name
+        for table in SQLModel.metadata.tables.values()
+        for index in table.indexes
+    }
+
+
+def test_migrations_and_init_db_match_model_indexes():
+    declared = model_indexes()
+    init_db = (ROOT / "init_db.sql").read_text()
+
+    for path in ("0001_query_shape_indexes.sql", "0002_sort_field_indexes.sql"):
+        migration = (ROOT / "db/migrations" / path).read_text()
+        created = dict(_CREATED.findall(migration))
+        assert created, path
+        assert {name: declared.get(name) for name in created} == created
+        assert not set(_DROPPED.findall(migration)) & declared.keys()
+    assert {
+        name: table
+        for name, table in _CREATED.findall(init_db)
+        if table in declared.values()
+    } == {name: table for name, table in declared.items() if name.startswith("idx_")}
+
+
+def test_access_paths_and_describe():
+    plan = {
+        "Node Type": "Limit",
+        "Plans": [
+            {
+                "Node Type": "Nested Loop",
+                "Plans": [
+                    {
+                        "Node Type": "Index Scan",
+                        "Relation Name": "credit_applications",
+                        "Index Name": "idx_credit_applications_company_created",
+                    },
+                    {
+                        "Node Type": "Bitmap Heap Scan",
+                        "Relation Name": "documents",
+                        "Plans": [
+                            {
+                                "Node Type": "Bitmap Index Scan",
+                                "Index Name": "idx_documents_application_created",
+                            }
+                        ],
+                    },
+                    {"Node Type": "Seq Scan", "Relation Name": "profiles"},
+                ],
+            }
+        ],
+    }
+
+    assert access_paths(plan) == [
+        (
+            "Index Scan",
+            "credit_applications",
+            "idx_credit_applications_company_created",
+        ),
+        ("Bitmap Heap Scan", "documents", None),
+        ("Bitmap Index Scan", "", "idx_documents_application_created"),
+        ("Seq Scan", "profiles", None),
+    ]
+    assert describe(plan) == (
+        "Index Scan idx_credit_applications_company_created, "
+        "Bitmap Heap Scan documents, "
+        "Bitmap Index Scan idx_documents_application_created, "
+        "Seq Scan profiles"
+    )
+    assert describe({"Node Type": "Result"}) == "(sin tablas)"
+
+
+async def test_cases_capture_statements_with_inline_enum_filters(engine):
+    fx = await bench.seed(engine, rows=48, seed=3)
+    sessionmaker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with sessionmaker() as session:
+        await fx.load(session)
+
+    captured = {
+        name: await capture(engine, sessionmaker, operation, fx)
+        for name, operation in CASES.items()
+    }
+
+    assert all(captured.values())
+    # Los filtros de enum van como literales para que calcen con los
+    # predicados de los índices parciales
+    pending = " ".join(s for s, _ in captured["documents.list_pending_signatures"])
+    assert "signature_status = 'pending'" in pending
+    staff = captured["credit_applications.list_applications[staff]"]
+    assert [is_count(s) for s, _ in staff] == [True, False]
+    assert all("NOT IN ('draft')" in s for s, _ in staff)
+
+
+def test_plan_shape_drops_costs_and_conditions():
+    plan = {
+        "Node Type": "Limit",
+        "Total Cost": 12.5,
+        "Plan Rows": 20,
+        "Plans": [
+            {
+                "Node Type": "Index Scan",
+                "Parent Relationship": "Outer",
+                "Relation Name": "credit_applications",
+                "Index Name": "idx_credit_applications_created_not_draft",
+                "Scan Direction": "Backward",
+                "Index Cond": "(company_id = '5f0c…'::uuid)",
+                "Total Cost": 11.0,
+            }
+        ],
+    }
+
+    assert plan_shape(plan) == {
+        "Node Type": "Limit",
+        "Plans": [
+            {
+                "Node Type": "Index Scan",
+                "Parent Relationship": "Outer",
+                "Relation Name": "credit_applications",
+                "Index Name": "idx_credit_applications_created_not_draft",
+                "Scan Direction": "Backward",
+            }
+        ],
+    }
+
+
+def test_compare_flags_plan_and_cost_regressions(capsys):
+    def step(cost: float, index: str = "ix_profiles_id", sql: str = "SELECT 1"):
+        plan = {"Node Type": "Index Scan", "Index Name": index}
+        return [{"sql": sql, "cost": cost, "plan": plan}]
+
+    def check(current, expected):
+        return compare(
+            "case", current, expected, max_cost_increase=25, min_cost_slack=10
+        )
+
+    assert check(step(8.3), None) == [
+        "case: sin snapshot (correr con --update-snapshots)"
+    ]
+    assert check(step(8.3) * 2, step(8.3)) == [
+        "case: emite 2 sentencias, el snapshot tiene 1"
+    ]
+    # Planes baratos: la holgura absoluta absorbe el ruido de ANALYZE
+    assert check(step(18.0), step(8.3)) == []
+    assert check(step(1250.0), step(1000.0)) == []
+    assert check(step(1300.0), step(1000.0)) == [
+        "case #1: costo estimado 1300.0 (snapshot 1000.0, máximo 1250.0)"
+    ]
+    [changed] = check(step(8.3, index="ix_profiles_email"), step(8.3))
+    assert changed.startswith("case #1: cambió el plan")
+    assert "Index Scan ix_profiles_email" in changed
+
+    assert check(step(8.3, sql="SELECT 2"), step(8.3)) == []
+    assert "case #1 cambió el SQL" in capsys.readouterr().err
+
+
+def test_cases_cover_sorts_and_snapshots():
+    base = "credit_applications.list_applications"
+    for sort in ALLOWED_SORT_FIELDS:
+        for scope in ("applicant", "staff"):
+            assert f"{base}[{scope} sort={sort} asc]" in CASES
+    assert {name for name, _ in FULL_COUNTS} <= CASES.keys()
+
+    snapshots = json.loads((ROOT / DEFAULT_SNAPSHOTS).read_text())
+    assert snapshots["cases"].keys() == CASES.keys()
+    for name, statements in snapshots["cases"].items():
+        for statement in statements:
+            assert statement["plan"] == plan_shape(statement["plan"]), name
+            # Lo mismo que exige `run` sobre las tablas grandes del snapshot
+            for node_type, table, _ in access_paths(statement["plan"]):
+                if node_type == "Seq Scan" and table in (
+                    "documents",
+                    "credit_applications",
+                ):
+                    assert is_count(statement["sql"]), name
+                    assert (name, table) in FULL_COUNTS, name
+
+
+def test_staff_sorts_page_through_their_own_index():
+    snapshots = json.loads((ROOT / DEFAULT_SNAPSHOTS).read_text())
+    for sort in ALLOWED_SORT_FIELDS - {"id", "status", "created_at"}:
+        for order in ("asc", "desc"):
+            name = f"credit_applications.list_applications[staff sort={sort} {order}]"
+            *_, page = snapshots["cases"][name]
+            indexes = {index for _, _, index in access_paths(page["plan"])}
+            assert f"idx_credit_applications_{sort}_not_draft" in indexes, name
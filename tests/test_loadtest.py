@@ -0,0 +1,122 @@
+"""Escenarios y reporte de la prueba de carga (ver perf/loadtest.py)."""
+
+import random
+
+import pytest
+
+from perf.loadtest import (
+    DEFAULT_MIX,
+    SCENARIOS,
+    Recorder,
+    VirtualUser,
+    applicant_dashboard,
+    build_report,
+    compare,
+    operator_review,
+    parse_mix,
+    percentile,
+    summarize,
+)
+
+
+def test_parse_mix_weights_known_scenarios():
+    assert parse_mix(DEFAULT_MIX) == {
+        "applicant_dashboard": 6.0,
+        "operator_review": 3.0,
+        "document_signing": 1.0,
+    }
+    assert parse_mix("operator_review") == {"operator_review": 1.0}
+    assert set(parse_mix(DEFAULT_MIX)) == set(SCENARIOS)
+
+    with pytest.raises(SystemExit):
+        parse_mix("applicant_dashboard=1,checkout=2")
+
+
+def test_percentile_is_nearest_rank():
+    ordered = [float(n) for n in range(1, 11)]
+
+    assert percentile(ordered, 50) == 5.0
+    assert percentile(ordered, 95) == 10.0
+    assert percentile(ordered, 0) == 1.0
+    assert percentile([], 99) == 0.0
+
+
+def test_summarize_reports_milliseconds_and_rps():
+    summary = summarize([0.010, 0.030, 0.020, 0.040], errors=1, seconds=2)
+
+    assert summary == {
+        "count": 4,
+        "errors": 1,
+        "rps": 2.0,
+        "mean_ms": 25.0,
+        "p50_ms": 20.0,
+        "p95_ms": 40.0,
+        "p99_ms": 40.0,
+        "max_ms": 40.0,
+    }
+    assert summarize([], errors=0, seconds=0)["rps"] == 0.0
+
+
+def test_recorder_discards_warmup():
+    warming = Recorder(measure_from=float("inf"))
+    warming.endpoint("GET /api/v1/profiles/me", 0.01, ok=False)
+    warming.scenario("applicant_dashboard", 0.05, ok=True)
+    assert warming.endpoints == warming.endpoint_errors == warming.scenarios == {}
+
+    measuring = Recorder(measure_from=0)
+    measuring.endpoint("GET /api/v1/profiles/me", 0.01, ok=True)
+    measuring.endpoint("GET /api/v1/profiles/me", 0.02, ok=False)
+    assert measuring.endpoints == {"GET /api/v1/profiles/me": [0.01, 0.02]}
+    assert measuring.endpoint_errors == {"GET /api/v1/profiles/me": 1}
+
+
+async def test_scenarios_record_route_templates(client, seed):
+    recorder = Recorder(measure_from=0)
+    rng = random.Random(1)
+    applicant = VirtualUser(
+        client,
+        recorder,
+        str(seed.applicant),
+        {"application_ids": [str(seed.application)], "document_ids": []},
+        rng,
+    )
+    operator = VirtualUser(client, recorder, str(seed.operator), {}, rng)
+
+    await applicant_dashboard(applicant)
+    await operator_review(operator, [str(seed.application)])
+
+    assert sorted(recorder.endpoints) == [
+        "GET /api/v1/companies/me",
+        "GET /api/v1/companies/{company_id}",
+        "GET /api/v1/credit-applications/",
+        "GET /api/v1/credit-applications/{application_id}",
+        "GET /api/v1/documents/",
+        "GET /api/v1/profiles/me",
+    ]
+    assert recorder.endpoint_errors == {}
+
+    report = build_report(recorder, seconds=1.0, meta={"mix": "test"})
+    assert report["meta"]["mix"] == "test"
+    assert report["meta"]["measured_seconds"] == 1.0
+    assert report["overall"]["count"] == 9
+    assert report["endpoints"]["GET /api/v1/credit-applications/"]["count"] == 2
+    assert report["scenarios"] == {}
+
+
+def test_compare_shows_delta_per_endpoint():
+    def report(p50: float, endpoints: list[str]) -> dict:
+        summary = {"p50_ms": p50, "p95_ms": p50, "p99_ms": p50, "rps": 100.0}
+        return {"overall": summary, "endpoints": dict.fromkeys(endpoints, summary)}
+
+    table = compare(
+        report(10.0, ["GET /api/v1/profiles/me", "GET /api/v1/documents/"]),
+        report(15.0, ["GET /api/v1/profiles/me"]),
+    ).splitlines()
+
+    assert table[0].startswith("endpoint")
+    assert table[1].startswith("overall")
+    assert "15.0   +50%" in table[1]
+    assert "+0%" in table[1]
+    documents, profiles = table[2:]
+    assert "(solo en uno de los reportes)" in documents
+    assert profiles.startswith("GET /api/v1/profiles/me")
@@ -0,0 +1,116 @@
+"""Concurrencia optimista: ETag/If-Match sobre la columna `version` y
+`compare_and_set` (ver app/repositories/sql.py)."""
+
+from app.core.query_tracking import assert_max_queries
+from app.models import Company
+from app.repositories.sql import compare_and_set
+
+
+def _updates(stats) -> list[str]:
+    return [s for s in stats.statements if s.lstrip().upper().startswith("UPDATE")]
+
+
+async def test_matching_if_match_updates_and_bumps_etag(client, seed):
+    read = await client.get("/api/v1/companies/me", headers=seed.as_applicant)
+    assert read.headers["ETag"] == '"1"'
+
+    response = await client.patch(
+        "/api/v1/companies/me",
+        json={"contact_phone": "+56987654321"},
+        headers={**seed.as_applicant, "If-Match": read.headers["ETag"]},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert response.json()["contact_phone"] == "+56987654321"
+
+
+async def test_stale_if_match_fails_before_writing(client, seed, commits):
+    async with assert_max_queries(10) as stats:
+        response = await client.patch(
+            "/api/v1/companies/me",
+            json={"contact_phone": "+56987654321"},
+            headers={**seed.as_applicant, "If-Match": '"7"'},
+        )
+
+    assert response.status_code == 412
+    assert _updates(stats) == []
+    assert commits == []
+    unchanged = await client.get("/api/v1/companies/me", headers=seed.as_applicant)
+    assert unchanged.headers["ETag"] == '"1"'
+
+
+async def test_second_edit_with_same_etag_gets_412(client, seed):
+    # Un solicitante solo edita sus solicitudes en borrador
+    draft = await client.post(
+        "/api/v1/credit-applications/",
+        json={
+            "requested_amount": "800000",
+            "term_months": 12,
+            "purpose": "equipment",
+            "status": "draft",
+        },
+        headers=seed.as_applicant,
+    )
+    url = f"/api/v1/credit-applications/{draft.json()['id']}"
+    headers = {**seed.as_applicant, "If-Match": '"1"'}
+
+    first = await client.patch(
+        url, json={"status": "draft", "term_months": 18}, headers=headers
+    )
+    second = await client.patch(
+        url, json={"status": "draft", "term_months": 48}, headers=headers
+    )
+
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"2"'
+    assert second.status_code == 412
+    current = await client.get(url, headers=seed.as_applicant)
+    assert current.json()["term_months"] == 18
+
+
+async def test_stale_document_review_gets_412(client, seed):
+    response = await client.patch(
+        f"/api/v1/documents/{seed.document}",
+        json={"status": "approved"},
+        headers={**seed.as_operator, "If-Match": 'W/"3"'},
+    )
+
+    assert response.status_code == 412
+
+
+async def test_without_if_match_the_edit_applies(client, seed):
+    response = await client.patch(
+        f"/api/v1/documents/{seed.document}",
+        json={"status": "approved"},
+        headers=seed.as_operator,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+
+async def test_malformed_if_match_is_rejected(client, seed):
+    response = await client.patch(
+        "/api/v1/companies/me",
+        json={"contact_phone": "+56987654321"},
+        headers={**seed.as_applicant, "If-Match": "not-a-version"},
+    )
+
+    assert response.status_code == 400
+
+
+async def test_compare_and_set_skips_stale_version(session_maker, seed):
+    async with session_maker() as session:
+        stale = await compare_and_set(
+            session, Company, seed.company, {"contact_phone": "+56900000000"}, 2
+        )
+        updated = await compare_and_set(
+            session, Company, seed.company, {"contact_phone": "+56911111111"}, 1
+        )
+        await session.commit()
+
+    assert stale is None
+    assert updated is not None
+    assert updated.version == 2
+    assert updated.contact_phone == "+56911111111"
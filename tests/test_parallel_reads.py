@@ -0,0 +1,135 @@
+"""Lecturas independientes repartidas en conexiones del pool (ver
+app/core/parallel_reads.py)."""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.core import parallel_reads
+from app.core.parallel_reads import gather_reads
+from app.models import Profile
+
+
+async def warm(engine, connections: int) -> None:
+    """Deja `connections` conexiones libres en el pool."""
+    opened = [await engine.connect() for _ in range(connections)]
+    for connection in opened:
+        await connection.close()
+    assert engine.sync_engine.pool.checkedin() == connections
+
+
+class Reads:
+    """Lecturas que anotan en qué sesión corrieron."""
+
+    def __init__(self) -> None:
+        self.sessions: dict[int, object] = {}
+        self.finished: list[int] = []
+
+    def read(self, index: int, delay: float = 0.01, error: Exception | None = None):
+        async def run(session):
+            self.sessions[index] = session
+            await session.execute(text("SELECT 1"))
+            await asyncio.sleep(delay)
+            self.finished.append(index)
+            if error is not None:
+                raise error
+            return index
+
+        return run
+
+    def lanes(self, request_session) -> list[list[int]]:
+        by_session: dict[int, list[int]] = {}
+        for index, session in sorted(self.sessions.items()):
+            by_session.setdefault(id(session), []).append(index)
+        lanes = sorted(by_session.values())
+        assert by_session[id(request_session)] == lanes[0]
+        return lanes
+
+
+async def test_reads_are_dealt_round_robin_across_lanes(engine, session_maker):
+    await warm(engine, 3)
+    reads = Reads()
+    async with session_maker() as session:
+        parallel_reads.enable(session, 2)
+
+        results = await gather_reads(session, *(reads.read(i) for i in range(5)))
+
+        assert results == [0, 1, 2, 3, 4]
+        assert reads.lanes(session) == [[0, 3], [1, 4], [2]]
+    assert not parallel_reads._reserved
+
+
+async def test_extra_connections_are_capped_per_request(engine, session_maker):
+    await warm(engine, 3)
+    reads = Reads()
+    async with session_maker() as session:
+        parallel_reads.enable(session, 1)
+
+        await gather_reads(session, *(reads.read(i) for i in range(4)))
+
+        assert reads.lanes(session) == [[0, 2], [1, 3]]
+
+
+async def test_without_idle_connections_reads_run_in_sequence(engine, session_maker):
+    await engine.dispose()
+    reads = Reads()
+    async with session_maker() as session:
+        parallel_reads.enable(session, 2)
+
+        assert await gather_reads(session, reads.read(0), reads.read(1)) == [0, 1]
+
+        assert reads.lanes(session) == [[0, 1]]
+
+
+async def test_concurrent_requests_do_not_share_idle_connections(engine, session_maker):
+    await warm(engine, 2)
+    first, second = Reads(), Reads()
+    async with session_maker() as a, session_maker() as b:
+        parallel_reads.enable(a, 2)
+        parallel_reads.enable(b, 2)
+
+        await asyncio.gather(
+            gather_reads(a, *(first.read(i) for i in range(3))),
+            gather_reads(b, *(second.read(i) for i in range(3))),
+        )
+
+        # El primero reservó las dos conexiones libres; el segundo no espera
+        # al pool y lee en secuencia
+        assert len(first.lanes(a)) == 3
+        assert second.lanes(b) == [[0, 1, 2]]
+    assert not parallel_reads._reserved
+
+
+async def test_reads_after_a_write_stay_on_the_request_session(engine, session_maker):
+    await warm(engine, 3)
+    reads = Reads()
+    async with session_maker() as session:
+        parallel_reads.enable(session, 2)
+        session.add(Profile(id=uuid4(), email="nuevo@example.com"))
+
+        await gather_reads(session, *(reads.read(i) for i in range(3)))
+
+        assert reads.lanes(session) == [[0, 1, 2]]
+
+
+async def test_first_failing_lane_is_raised_after_all_lanes_finish(
+    engine, session_maker
+):
+    await warm(engine, 2)
+    reads = Reads()
+    async with session_maker() as session:
+        parallel_reads.enable(session, 2)
+
+        with pytest.raises(LookupError):
+            await gather_reads(
+                session,
+                reads.read(0, delay=0.05),
+                reads.read(1, error=LookupError("carril 1")),
+                reads.read(2, error=ValueError("carril 2"), delay=0.02),
+            )
+
+        # El carril de la sesión del request (el más lento) terminó antes
+        assert reads.finished == [1, 2, 0]
+    assert not parallel_reads._reserved
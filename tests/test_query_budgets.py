@@ -0,0 +1,287 @@
+"""Cada endpoint de `app/routers/` dentro de su `@query_budget` y sin N+1.
+
+Los endpoints que llaman a Storage o HelloSign usan los dobles de
+`perf.fake_providers`, levantados con uvicorn en un hilo.
+"""
+
+import threading
+import time
+from collections.abc import Callable, Iterator
+from decimal import Decimal
+from typing import Any
+from uuid import uuid4
+
+import pytest
+import uvicorn
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import Settings
+from app.core.enums import CreditApplicationPurpose, CreditApplicationStatus, UserRole
+from app.core.profiling import AllocationTracker, SamplingProfiler
+from app.core.query_tracking import BUDGET_ATTR, assert_max_queries
+from app.core.slow_queries import SlowQueryLog
+from app.models import CreditApplication, Profile
+from app.routers import (
+    admin,
+    companies,
+    credit_applications,
+    documents,
+    metadata,
+    profiles,
+    webhooks,
+)
+from perf import fake_providers
+from perf import query_budgets as query_budgets_cli
+
+
+@pytest.fixture(scope="module")
+def providers() -> Iterator[str]:
+    fake = fake_providers.settings
+    latency = fake.latency_ms, fake.jitter_ms
+    fake.latency_ms = fake.jitter_ms = 0
+    server = uvicorn.Server(
+        uvicorn.Config(
+            fake_providers.app, host="127.0.0.1", port=0, log_level="warning"
+        )
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+    fake.latency_ms, fake.jitter_ms = latency
+
+
+@pytest.fixture
+def settings(providers: str) -> Settings:
+    return Settings(
+        _env_file=None,
+        SUPABASE_URL=providers,
+        SUPABASE_SECRET_KEY="service-key",
+        HELLOSIGN_API_HOST=f"{providers}/v3",
+        HELLOSIGN_API_KEY="test-key",
+        HELLOSIGN_CLIENT_ID="test-client",
+        SLOW_QUERY_THRESHOLD_MS=0,
+        RATE_LIMIT_ENABLED=False,
+    )
+
+
+@pytest.fixture
+async def admin_user(
+    app, session_maker: async_sessionmaker[AsyncSession]
+) -> dict[str, str]:
+    app.state.slow_query_log = SlowQueryLog(
+        threshold_ms=100, explain_sample_rate=0, capacity=10
+    )
+    app.state.profiler = SamplingProfiler(interval=0.005, max_seconds=1)
+    app.state.allocation_tracker = AllocationTracker(app.routes, frames=1)
+    user = Profile(id=uuid4(), email="admin@example.com", role=UserRole.admin)
+    async with session_maker() as session:
+        session.add(user)
+        await session.commit()
+    return {"Authorization": f"Bearer {user.id}"}
+
+
+@pytest.fixture
+async def more_applications(seed, session_maker) -> None:
+    """Varias filas por listado, para que un N+1 se note."""
+    async with session_maker() as session:
+        session.add_all(
+            CreditApplication(
+                company_id=seed.company,
+                requested_amount=Decimal(100000 * (i + 1)),
+                purpose=CreditApplicationPurpose.equipment,
+                term_months=12,
+                status=CreditApplicationStatus.pending,
+                interest_rate=Decimal(10),
+            )
+            for i in range(5)
+        )
+        await session.commit()
+
+
+def budget(endpoint: Callable[..., Any]) -> int:
+    return getattr(endpoint, BUDGET_ATTR)
+
+
+async def within_budget(
+    endpoint: Callable[..., Any], request: Any, expected_status: int = 200
+) -> Any:
+    """Ejecuta el request vigilando el presupuesto declarado por `endpoint`."""
+    async with assert_max_queries(budget(endpoint), allow_repeats=False):
+        response = await request
+    assert response.status_code == expected_status, response.text
+    return response
+
+
+def test_every_api_route_declares_a_budget(capsys):
+    assert query_budgets_cli.main() == 0
+    assert "sin @query_budget" not in capsys.readouterr().err
+
+
+async def test_profiles(client, seed):
+    await within_budget(
+        profiles.read_my_profile,
+        client.get("/api/v1/profiles/me", headers=seed.as_applicant),
+    )
+    await within_budget(
+        profiles.read_profile_by_id,
+        client.get(f"/api/v1/profiles/{seed.applicant}", headers=seed.as_operator),
+    )
+
+
+async def test_companies(client, seed):
+    await within_budget(
+        companies.read_my_company,
+        client.get("/api/v1/companies/me", headers=seed.as_applicant),
+    )
+    await within_budget(
+        companies.update_my_company,
+        client.patch(
+            "/api/v1/companies/me",
+            json={"contact_phone": "+56987654321"},
+            headers={**seed.as_applicant, "If-Match": '"1"'},
+        ),
+    )
+    await within_budget(
+        companies.read_company,
+        client.get(f"/api/v1/companies/{seed.company}", headers=seed.as_operator),
+    )
+    await within_budget(
+        companies.list_companies,
+        client.get("/api/v1/companies/", headers=seed.as_operator),
+    )
+
+
+async def test_credit_applications(client, seed, more_applications):
+    url = "/api/v1/credit-applications/"
+    listed = await within_budget(
+        credit_applications.list_credit_applications,
+        client.get(url, headers=seed.as_applicant),
+    )
+    assert len(listed.json()["items"]) == 6
+    await within_budget(
+        credit_applications.list_credit_applications,
+        client.get(url, params={"sort": "requested_amount"}, headers=seed.as_operator),
+    )
+    created = await within_budget(
+        credit_applications.create_credit_application,
+        client.post(
+            url,
+            json={
+                "requested_amount": "900000",
+                "term_months": 6,
+                "purpose": "inventory",
+                "status": "draft",
+            },
+            headers={**seed.as_applicant, "Idempotency-Key": "budget-create"},
+        ),
+    )
+    draft = f"{url}{created.json()['id']}"
+    await within_budget(
+        credit_applications.get_credit_application,
+        client.get(draft, headers=seed.as_applicant),
+    )
+    await within_budget(
+        credit_applications.update_credit_application,
+        client.patch(
+            draft,
+            json={"status": "draft", "term_months": 9},
+            headers={**seed.as_applicant, "If-Match": '"1"'},
+        ),
+    )
+    await within_budget(
+        credit_applications.delete_credit_application,
+        client.delete(draft, headers=seed.as_applicant),
+        expected_status=204,
+    )
+
+
+async def test_documents(client, seed):
+    url = "/api/v1/documents"
+    document = f"{url}/{seed.document}"
+    await within_budget(
+        documents.list_documents,
+        client.get(f"{url}/", headers=seed.as_applicant),
+    )
+    await within_budget(
+        documents.get_document, client.get(document, headers=seed.as_applicant)
+    )
+    await within_budget(
+        documents.request_document,
+        client.post(
+            f"{url}/request",
+            json={
+                "application_id": str(seed.application),
+                "document_type": "bank_statement",
+                "notes": "Últimos tres meses",
+            },
+            headers={**seed.as_operator, "Idempotency-Key": "budget-request"},
+        ),
+    )
+    await within_budget(
+        documents.create_upload_url,
+        client.post(
+            f"{document}/upload-url",
+            json={
+                "file_name": "balance 2024.pdf",
+                "file_size": 120_000,
+                "mime_type": "application/pdf",
+            },
+            headers=seed.as_applicant,
+        ),
+    )
+    # Con la ruta de Storage ya reservada, el documento se puede firmar
+    await within_budget(
+        documents.sign_document,
+        client.post(
+            f"{document}/sign",
+            json={"signer_email": "firma@eltornillo.cl", "signer_name": "Ana Pérez"},
+            headers={**seed.as_applicant, "Idempotency-Key": "budget-sign"},
+        ),
+    )
+    await within_budget(
+        documents.update_document_status,
+        client.patch(document, json={"status": "approved"}, headers=seed.as_operator),
+    )
+
+
+async def test_public_routes(client):
+    await within_budget(
+        metadata.list_credit_purposes, client.get("/api/v1/metadata/credit-purposes")
+    )
+    # El payload inválido se rechaza sin tocar la BD
+    await within_budget(
+        webhooks.hellosign_callback,
+        client.post("/api/v1/webhooks/hellosign", data={"json": "{}"}),
+        expected_status=400,
+    )
+
+
+async def test_admin(client, admin_user):
+    await within_budget(
+        admin.list_slow_queries,
+        client.get("/api/v1/admin/slow-queries", headers=admin_user),
+    )
+    await within_budget(
+        admin.profile,
+        client.post(
+            "/api/v1/admin/profile", params={"seconds": 0.05}, headers=admin_user
+        ),
+    )
+    await within_budget(
+        admin.memory_snapshot,
+        client.post("/api/v1/admin/memory/snapshot", headers=admin_user),
+    )
+    await within_budget(
+        admin.memory_diff,
+        client.post("/api/v1/admin/memory/diff", headers=admin_user),
+    )
+    await within_budget(
+        admin.memory_stop,
+        client.delete("/api/v1/admin/memory", headers=admin_user),
+        expected_status=204,
+    )
@@ -0,0 +1,143 @@
+"""Rate limiting con token buckets (ver app/core/rate_limit.py)."""
+
+import hashlib
+import hmac
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import Settings
+from app.core import rate_limit
+from app.core.query_tracking import UNTRACKED
+from app.core.rate_limit import (
+    _CONSUME,
+    _PURGE,
+    MemoryBackend,
+    RateLimiter,
+    build_rate_limiter,
+)
+from app.main import app as main_app
+
+
+@pytest.fixture
+def settings() -> Settings:
+    return Settings(
+        _env_file=None,
+        HELLOSIGN_API_KEY="test-key",
+        SLOW_QUERY_THRESHOLD_MS=0,
+        RATE_LIMIT_BURST=2,
+        RATE_LIMIT_RATE=0.5,
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list[float]:
+    now = [1000.0]
+    # Solo el reloj del módulo: el del event loop sigue corriendo
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+async def test_bucket_allows_burst_then_refills_at_rate(clock):
+    backend = MemoryBackend()
+
+    results = [await backend.consume("user:a", 1, rate=2, burst=3) for _ in range(4)]
+    assert [state.allowed for state in results] == [True, True, True, False]
+
+    clock[0] += 0.5  # +1 token
+    refilled = await backend.consume("user:a", 1, rate=2, burst=3)
+    assert refilled.allowed
+    assert refilled.tokens == pytest.approx(0)
+
+    clock[0] += 60  # nunca más de `burst`
+    full = await backend.consume("user:a", 0, rate=2, burst=3)
+    assert full.tokens == pytest.approx(3)
+
+
+async def test_buckets_are_per_key_and_evict_least_recently_used(clock):
+    backend = MemoryBackend(max_keys=2)
+
+    await backend.consume("user:a", 3, rate=1, burst=3)
+    assert not (await backend.consume("user:a", 1, rate=1, burst=3)).allowed
+    assert (await backend.consume("user:b", 1, rate=1, burst=3)).allowed
+
+    await backend.consume("user:c", 1, rate=1, burst=3)  # descarta user:a
+    assert (await backend.consume("user:a", 3, rate=1, burst=3)).allowed
+
+
+async def test_user_over_budget_gets_429_with_headers(client, seed):
+    for remaining in ("1", "0"):
+        ok = await client.get("/api/v1/profiles/me", headers=seed.as_applicant)
+        assert ok.status_code == 200
+        assert ok.headers["RateLimit-Limit"] == "2"
+        assert ok.headers["RateLimit-Remaining"] == remaining
+
+    limited = await client.get("/api/v1/profiles/me", headers=seed.as_applicant)
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert limited.headers["RateLimit-Remaining"] == "0"
+
+    # Otro usuario tiene su propio balde
+    other = await client.get("/api/v1/profiles/me", headers=seed.as_operator)
+    assert other.status_code == 200
+
+
+async def test_route_cost_is_charged(app, client, seed):
+    app.state.rate_limiter = RateLimiter(MemoryBackend(), rate=0.5, burst=6)
+
+    # `@rate_cost(5)`: el segundo listado no cabe en el token restante
+    first = await client.get("/api/v1/companies/", headers=seed.as_operator)
+    second = await client.get("/api/v1/companies/", headers=seed.as_operator)
+
+    assert first.status_code == 200
+    assert first.headers["RateLimit-Remaining"] == "1"
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) == 8
+
+
+def test_route_costing_more_than_burst_is_rejected_at_startup(settings, engine):
+    # Con RATE_LIMIT_BURST=2, los listados de `@rate_cost(5)` no pasarían nunca
+    with pytest.raises(ValueError, match="/api/v1/companies/ \\(5\\)"):
+        build_rate_limiter(settings, engine, main_app.routes)
+
+    settings.rate_limit_burst = 5
+    assert build_rate_limiter(settings, engine, main_app.routes) is not None
+
+
+def test_postgres_statements_stay_out_of_query_budgets():
+    assert _CONSUME.get_execution_options()[UNTRACKED]
+    assert _PURGE.get_execution_options()[UNTRACKED]
+
+
+async def test_public_metadata_is_limited_by_ip(client):
+    statuses = [
+        (await client.get("/api/v1/metadata/credit-purposes")).status_code
+        for _ in range(3)
+    ]
+
+    assert statuses == [200, 200, 429]
+
+
+async def test_hellosign_callback_is_not_limited(client):
+    event_time, event_type = "1700000000", "callback_test"
+    event_hash = hmac.new(
+        b"test-key", f"{event_time}{event_type}".encode(), hashlib.sha256
+    ).hexdigest()
+    payload = json.dumps(
+        {
+            "event": {
+                "event_time": event_time,
+                "event_type": event_type,
+                "event_hash": event_hash,
+                "event_metadata": {},
+            }
+        }
+    )
+
+    for _ in range(5):
+        response = await client.post(
+            "/api/v1/webhooks/hellosign", data={"json": payload}
+        )
+        assert response.status_code == 200
+        assert "RateLimit-Limit" not in response.headers
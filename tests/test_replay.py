@@ -0,0 +1,262 @@
+"""Captura anonimizada del tráfico y su replay (ver app/core/traffic.py y
+perf/replay.py)."""
+
+import json
+import random
+from collections.abc import Iterator
+from uuid import uuid4
+
+import jwt
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.traffic import TrafficCaptureMiddleware, TrafficRecorder
+from perf.replay import DEFAULT_EXCLUDE, Resolver, _Request, load_capture
+
+MANIFEST = {
+    "applicants": [
+        {
+            "id": f"user-{n}",
+            "email": f"user-{n}@perf.example.com",
+            "company_id": f"company-{n}",
+            "application_ids": [f"application-{n}a", f"application-{n}b"],
+            "document_ids": [f"document-{n}a", f"document-{n}b"],
+        }
+        for n in range(3)
+    ],
+    "operators": [{"id": "operator-0", "email": "operator-0@perf.example.com"}],
+    "admins": [],
+    "review_queue": ["application-0a", "application-1a"],
+}
+
+
+@pytest.fixture
+def recorder(tmp_path) -> Iterator[TrafficRecorder]:
+    recorder = TrafficRecorder(
+        str(tmp_path / "traffic.jsonl"), salt="sal-de-prueba", sample_ratio=1
+    )
+    yield recorder
+    recorder.writer.close()
+
+
+def token(sub: str, role: str) -> str:
+    # La firma no se verifica al capturar
+    return jwt.encode({"sub": sub, "user_role": role}, "x" * 32)
+
+
+def captured(recorder: TrafficRecorder) -> list[dict]:
+    recorder.writer.flush()
+    with open(recorder.path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_anonymize_keeps_only_labels(recorder):
+    uuid = str(uuid4())
+    shape = recorder.anonymize(
+        {
+            "id": uuid,
+            "email": "Ana@Example.com",
+            "created_at": "2024-05-01T10:00:00Z",
+            "status": "approved",
+            "sort": "created_at",
+            "page": "17",
+            "rut": "765432101",
+            "notes": "Balance firmado",
+            "amount": 1234567,
+            "rate": 0.1234,
+            "urgent": True,
+            "items": list(range(30)),
+        }
+    )
+
+    assert shape == {
+        "id": f"<uuid:{recorder.pseudonym(uuid)}>",
+        "email": f"<email:{recorder.pseudonym('ana@example.com')}>",
+        "created_at": "<datetime>",
+        "status": "approved",
+        "sort": "created_at",
+        "page": "17",
+        "rut": "<digits:9>",
+        "notes": "<str:15>",
+        "amount": 1200000,
+        "rate": 0.12,
+        "urgent": True,
+        "items": [recorder.anonymize(n) for n in range(20)],
+    }
+    assert recorder.anonymize(uuid.upper()) == shape["id"]
+
+
+def test_pseudonyms_depend_only_on_the_salt(recorder, tmp_path):
+    # Otro worker escribiendo la misma captura
+    worker = TrafficRecorder(recorder.path, salt="sal-de-prueba", sample_ratio=1)
+    other = TrafficRecorder(
+        str(tmp_path / "other.jsonl"), salt="otra-sal", sample_ratio=1
+    )
+
+    assert recorder.pseudonym("x") == worker.pseudonym("x")
+    assert recorder.pseudonym("x") != other.pseudonym("x")
+    with pytest.raises(ValueError, match="TRAFFIC_CAPTURE_SALT"):
+        TrafficRecorder(recorder.path, salt="", sample_ratio=1)
+
+
+def test_principal_reads_unverified_role_and_subject(recorder):
+    role, actor = recorder.principal(f"Bearer {token('user-123', 'operator')}")
+
+    assert role == "operator"
+    assert actor == recorder.pseudonym("user-123")
+    assert recorder.principal(None) == (None, None)
+    assert recorder.principal("Bearer no-es-un-jwt") == (None, None)
+
+
+async def test_middleware_captures_api_requests(recorder):
+    api = FastAPI()
+
+    @api.get("/api/v1/documents/{document_id}")
+    async def get_document(document_id: str) -> dict:
+        return {"id": document_id}
+
+    @api.post("/api/v1/credit-applications/")
+    async def create_application(body: dict) -> dict:
+        return body
+
+    @api.get("/health")
+    async def health() -> dict:
+        return {}
+
+    document_id = str(uuid4())
+    headers = {"Authorization": f"Bearer {token('user-1', 'applicant')}"}
+    async with AsyncClient(
+        transport=ASGITransport(app=TrafficCaptureMiddleware(api, recorder=recorder)),
+        base_url="http://test",
+    ) as client:
+        await client.get(
+            f"/api/v1/documents/{document_id}",
+            params={"status": "pending", "q": "Ana"},
+            headers=headers,
+        )
+        await client.post(
+            "/api/v1/credit-applications/",
+            json={"purpose": "inventory", "requested_amount": 2_450_000},
+            headers=headers,
+        )
+        await client.get("/health")
+        await client.get("/api/v1/missing")
+
+    read, created = captured(recorder)
+    assert read["method"] == "GET"
+    assert read["route"] == "/api/v1/documents/{document_id}"
+    assert read["path_params"] == {
+        "document_id": f"<uuid:{recorder.pseudonym(document_id)}>"
+    }
+    assert read["query"] == {"status": ["pending"], "q": ["<str:3>"]}
+    assert read["body"] is None
+    assert (read["role"], read["actor"]) == (
+        "applicant",
+        recorder.pseudonym("user-1"),
+    )
+    assert read["status"] == 200
+    assert created["content_type"] == "application/json"
+    assert created["body"] == {"purpose": "inventory", "requested_amount": 2_400_000}
+    assert document_id not in json.dumps([read, created])
+
+
+def test_resolver_maps_actors_and_ids_stably():
+    resolver = Resolver(MANIFEST, random.Random(5))
+
+    owner = resolver.user("applicant", "actor-a")
+    assert owner is not None
+    assert resolver.user("applicant", "actor-a") == owner
+    assert resolver.user(None, None) is None
+    # Sin admins en el manifiesto se reproduce como solicitante
+    assert resolver.user("admin", "actor-b")[0] == "applicants"
+
+    _, user = owner
+    document = resolver.materialize("<uuid:abc>", "document_id", owner)
+    assert document in user["document_ids"]
+    assert resolver.materialize("<uuid:abc>", "document_id", owner) == document
+    company = resolver.materialize("<uuid:def>", "company_id", owner)
+    assert company == user["company_id"]
+    reviewer = resolver.user("operator", "actor-c")
+    reviewed = resolver.materialize("<uuid:abc>", "application_id", reviewer)
+    assert reviewed in MANIFEST["review_queue"]
+
+    body = resolver.materialize(
+        {
+            "signer_email": "<email:abc>",
+            "notes": "<str:4>",
+            "phone": "<digits:9>",
+            "status": "approved",
+        },
+        "",
+        owner,
+    )
+    assert body["signer_email"] == "replay-abc@perf.example.com"
+    assert body["notes"] == "xxxx"
+    assert len(body["phone"]) == 9
+    assert body["phone"].isdigit()
+    assert body["status"] == "approved"
+
+
+def test_load_capture_filters_and_orders(tmp_path):
+    def entry(ts: float, method: str, route: str) -> dict:
+        return {"ts": ts, "method": method, "route": route}
+
+    path = tmp_path / "traffic.jsonl"
+    path.write_text(
+        "\n".join(
+            json.dumps(e)
+            for e in (
+                entry(3, "GET", "/api/v1/documents/{document_id}"),
+                entry(1, "GET", "/api/v1/profiles/me"),
+                entry(2, "POST", "/api/v1/credit-applications/"),
+                entry(0, "POST", "/api/v1/webhooks/hellosign"),
+                entry(4, "GET", "/api/v1/admin/slow-queries"),
+            )
+        )
+        + "\n\n"
+    )
+
+    def routes(**options) -> list[str]:
+        return [
+            e["route"]
+            for e in load_capture(str(path), exclude=DEFAULT_EXCLUDE, **options)
+        ]
+
+    assert routes(read_only=False, limit=None) == [
+        "/api/v1/profiles/me",
+        "/api/v1/credit-applications/",
+        "/api/v1/documents/{document_id}",
+    ]
+    assert routes(read_only=True, limit=None) == [
+        "/api/v1/profiles/me",
+        "/api/v1/documents/{document_id}",
+    ]
+    assert routes(read_only=False, limit=1) == ["/api/v1/profiles/me"]
+
+
+def test_captured_request_becomes_replayable():
+    resolver = Resolver(MANIFEST, random.Random(2))
+    request = _Request(
+        {
+            "ts": 105.5,
+            "method": "GET",
+            "route": "/api/v1/documents/{document_id}",
+            "path_params": {"document_id": "<uuid:d1>"},
+            "query": {"status": ["pending"], "limit": ["20"]},
+            "body": None,
+            "role": "applicant",
+            "actor": "a1",
+            "status": 200,
+        },
+        t0=100.0,
+        resolver=resolver,
+    )
+
+    _, user = request.user
+    assert request.offset == 5.5
+    assert request.name == "GET /api/v1/documents/{document_id}"
+    assert request.url.removeprefix("/api/v1/documents/") in user["document_ids"]
+    assert request.params == [("status", "pending"), ("limit", "20")]
+    assert request.json is None
+    assert request.captured_status == 200
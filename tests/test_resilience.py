@@ -0,0 +1,235 @@
+"""Circuit breaker, presupuesto de reintentos y bulkhead de las llamadas
+salientes (ver app/core/resilience.py)."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.core.errors import ServiceUnavailableError, UpstreamTimeoutError
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitState,
+    OutboundPolicy,
+    RetryBudget,
+)
+
+
+def policy(**overrides) -> OutboundPolicy:
+    options = {
+        "timeout": 1.0,
+        "max_concurrency": 4,
+        "breaker": CircuitBreaker(failure_threshold=2, reset_timeout=0),
+        "budget": RetryBudget(),
+        "backoff_base": 0,
+    }
+    return OutboundPolicy("test", **{**options, **overrides})
+
+
+def upstream_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://upstream.test")
+    return httpx.HTTPStatusError(
+        "upstream", request=request, response=httpx.Response(status, request=request)
+    )
+
+
+async def ok() -> str:
+    return "ok"
+
+
+async def fail() -> str:
+    raise upstream_error(503)
+
+
+def half_open(breaker: CircuitBreaker) -> CircuitBreaker:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.closed
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.open
+    assert not breaker.allow()
+    assert 0 < breaker.retry_after() <= 60
+
+
+def test_half_open_allows_one_probe_then_decides():
+    breaker = half_open(CircuitBreaker(failure_threshold=1, reset_timeout=0))
+
+    assert breaker.allow()
+    assert breaker.state == CircuitState.half_open
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.open
+
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitState.closed
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_released_probe_can_be_retaken():
+    breaker = half_open(CircuitBreaker(failure_threshold=1, reset_timeout=0))
+    assert breaker.allow()
+
+    breaker.release()
+
+    assert breaker.state == CircuitState.half_open
+    assert breaker.allow()
+
+
+async def test_cancelled_probe_does_not_wedge_the_breaker():
+    upstream = policy(breaker=half_open(CircuitBreaker(failure_threshold=1)))
+    upstream.breaker.reset_timeout = 0
+    started = asyncio.Event()
+
+    async def hang() -> str:
+        started.set()
+        await asyncio.sleep(60)
+        return "late"
+
+    probe = asyncio.create_task(upstream.call(hang))
+    await started.wait()
+    assert upstream.breaker.state == CircuitState.half_open
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert await upstream.call(ok) == "ok"
+    assert upstream.breaker.state == CircuitState.closed
+
+
+async def test_cancelled_sync_probe_does_not_wedge_the_breaker():
+    upstream = policy(breaker=half_open(CircuitBreaker(failure_threshold=1)))
+    upstream.breaker.reset_timeout = 0
+    release = threading.Event()
+
+    probe = asyncio.create_task(upstream.call_sync(release.wait))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    release.set()
+
+    assert await upstream.call_sync(lambda: "ok") == "ok"
+
+
+def test_retry_budget_is_a_fraction_of_calls():
+    budget = RetryBudget(ratio=0.5, min_tokens=1)
+
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+    for _ in range(100):
+        budget.deposit()
+    assert budget.tokens == budget.max_tokens == 10
+
+
+async def test_transient_errors_retry_within_budget():
+    attempts = 0
+
+    async def flaky() -> str:
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise upstream_error(503)
+        return "ok"
+
+    upstream = policy(breaker=CircuitBreaker(failure_threshold=5), max_retries=2)
+
+    assert await upstream.call(flaky) == "ok"
+    assert attempts == 3
+    assert upstream.breaker.state == CircuitState.closed
+
+
+async def test_empty_budget_and_non_idempotent_calls_do_not_retry():
+    attempts = 0
+
+    async def counted() -> str:
+        nonlocal attempts
+        attempts += 1
+        raise upstream_error(502)
+
+    breaker = CircuitBreaker(failure_threshold=10)
+    broke = policy(breaker=breaker, budget=RetryBudget(ratio=0, min_tokens=0))
+    with pytest.raises(ServiceUnavailableError):
+        await broke.call(counted)
+    assert attempts == 1
+
+    with pytest.raises(ServiceUnavailableError):
+        await policy(breaker=breaker).call(counted, retry=False)
+    assert attempts == 2
+
+
+async def test_client_errors_are_not_retried_and_keep_the_circuit_closed():
+    attempts = 0
+
+    async def not_found() -> str:
+        nonlocal attempts
+        attempts += 1
+        raise upstream_error(404)
+
+    upstream = policy()
+    for _ in range(3):
+        with pytest.raises(httpx.HTTPStatusError):
+            await upstream.call(not_found)
+
+    assert attempts == 3
+    assert upstream.breaker.state == CircuitState.closed
+
+
+async def test_open_circuit_rejects_without_calling():
+    upstream = policy(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    with pytest.raises(ServiceUnavailableError):
+        await upstream.call(fail, retry=False)
+
+    with pytest.raises(ServiceUnavailableError) as rejected:
+        await upstream.call(ok)
+
+    assert "no disponible temporalmente" in str(rejected.value)
+    assert rejected.value.retry_after > 0
+
+
+async def test_slow_upstream_times_out():
+    async def slow() -> str:
+        await asyncio.sleep(1)
+        return "late"
+
+    with pytest.raises(UpstreamTimeoutError):
+        await policy(timeout=0.01).call(slow, retry=False)
+
+
+async def test_bulkhead_rejects_beyond_max_concurrency():
+    upstream = policy(max_concurrency=1, acquire_timeout=0.01)
+    release = asyncio.Event()
+
+    async def held() -> str:
+        await release.wait()
+        return "ok"
+
+    first = asyncio.create_task(upstream.call(held))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ServiceUnavailableError) as rejected:
+        await upstream.call(ok)
+    assert rejected.value.retry_after == 1.0
+
+    release.set()
+    assert await first == "ok"
+    assert await upstream.call(ok) == "ok"
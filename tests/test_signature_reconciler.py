@@ -0,0 +1,144 @@
+"""Reconciliación de firmas pendientes contra HelloSign (ver
+app/services/signature_reconciler.py).
+
+SQLite no tiene advisory locks: aquí son funciones que recuerdan qué conexión
+tiene cada clave, con la semántica de los de sesión de Postgres.
+"""
+
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from sqlalchemy import event, update
+
+from app.core.enums import SignatureStatus
+from app.core.resilience import build_outbound_policies
+from app.models.document import Document
+from app.services.signature_reconciler import (
+    RECONCILER_LOCK_KEY,
+    SignatureReconciler,
+    provider_status_update,
+)
+
+
+class AdvisoryLocks:
+    def __init__(self, engine) -> None:
+        self.held: dict[int, int] = {}
+        self.open_transactions = 0
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "connect", self._connect)
+        event.listen(sync_engine, "begin", self._begin)
+        event.listen(sync_engine, "commit", self._end)
+        event.listen(sync_engine, "rollback", self._end)
+
+    def _connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        owner = id(dbapi_connection)
+
+        def try_lock(key: int) -> bool:
+            return self.held.setdefault(key, owner) == owner
+
+        def unlock(key: int) -> bool:
+            return self.held.pop(key, None) == owner
+
+        dbapi_connection.create_function("pg_try_advisory_lock", 1, try_lock)
+        dbapi_connection.create_function("pg_advisory_unlock", 1, unlock)
+
+    def _begin(self, connection: Any) -> None:
+        self.open_transactions += 1
+
+    def _end(self, connection: Any) -> None:
+        self.open_transactions -= 1
+
+
+@pytest.fixture
+async def locks(engine) -> AdvisoryLocks:
+    # Las conexiones ya abiertas no tendrían las funciones
+    await engine.dispose()
+    return AdvisoryLocks(engine)
+
+
+@pytest.fixture
+async def pending(session_maker, seed) -> str:
+    async with session_maker() as session:
+        await session.execute(
+            update(Document)
+            .where(Document.id == seed.document)
+            .values(
+                signature_status=SignatureStatus.pending, signature_request_id="sr-1"
+            )
+        )
+        await session.commit()
+    return "sr-1"
+
+
+@pytest.fixture
+def reconciler(session_maker, settings) -> SignatureReconciler:
+    return SignatureReconciler(
+        session_maker, settings, build_outbound_policies(settings)
+    )
+
+
+def declined(request_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        signature_request_id=request_id, is_declined=True, is_complete=False
+    )
+
+
+async def test_provider_is_queried_outside_any_transaction(
+    reconciler, locks, pending, session_maker, seed
+):
+    async def fetch(pending_ids: set[str]) -> dict[str, Any]:
+        assert pending_ids == {pending}
+        assert locks.open_transactions == 0
+        assert RECONCILER_LOCK_KEY in locks.held
+        return {pending: declined(pending)}
+
+    reconciler._fetch_provider_statuses = fetch
+
+    assert await reconciler.run_once() == 1
+
+    assert locks.held == {}
+    assert locks.open_transactions == 0
+    async with session_maker() as session:
+        document = await session.get(Document, seed.document)
+    assert document.signature_status == SignatureStatus.declined
+
+
+async def test_lock_is_released_when_the_provider_fails(reconciler, locks, pending):
+    async def fetch(pending_ids: set[str]) -> dict[str, Any]:
+        raise TimeoutError("HelloSign")
+
+    reconciler._fetch_provider_statuses = fetch
+
+    with pytest.raises(TimeoutError):
+        await reconciler.run_once()
+
+    assert locks.held == {}
+
+
+async def test_only_the_lock_holder_reconciles(reconciler, locks, pending, engine):
+    async def fetch(pending_ids: set[str]) -> dict[str, Any]:
+        raise AssertionError("sin el lock no se consulta a HelloSign")
+
+    reconciler._fetch_provider_statuses = fetch
+    async with engine.connect() as other_worker:
+        await other_worker.exec_driver_sql(
+            f"SELECT pg_try_advisory_lock({RECONCILER_LOCK_KEY})"
+        )
+
+        assert await reconciler.run_once() == 0
+
+
+def test_completed_request_does_not_copy_the_provider_file_url():
+    complete = SimpleNamespace(
+        is_declined=False,
+        is_complete=True,
+        signatures=[SimpleNamespace(signed_at=1_717_000_000)],
+        files_url="https://api.hellosign.com/v3/signature_request/files/sr-1",
+    )
+
+    update = provider_status_update("document", complete)
+
+    assert update["signature_status"] == SignatureStatus.signed
+    assert update["signed_at"].timestamp() == 1_717_000_000
+    assert "signed_file_path" not in update
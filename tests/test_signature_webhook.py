@@ -0,0 +1,175 @@
+"""Callbacks de HelloSign: validación, deduplicación y aplicación en lotes (ver
+app/services/signature_webhook_service.py)."""
+
+import hashlib
+import hmac
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.core.enums import SignatureStatus
+from app.core.errors import UnauthorizedError, ValidationDomainError
+from app.models.document import Document
+from app.schemas.webhook import SignatureStatusEvent
+from app.services.signature_webhook_service import (
+    HELLOSIGN_ACK,
+    SignatureEventQueue,
+    parse_hellosign_callback,
+)
+
+API_KEY = "test-key"
+EVENT_TIME = 1_717_000_000
+
+
+def event_hash(event_type: str, api_key: str = API_KEY) -> str:
+    return hmac.new(
+        api_key.encode(), f"{EVENT_TIME}{event_type}".encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def callback(
+    event_type: str, *, request_id: str = "sr-1", api_key: str = API_KEY
+) -> str:
+    return json.dumps(
+        {
+            "event": {
+                "event_time": str(EVENT_TIME),
+                "event_type": event_type,
+                "event_hash": event_hash(event_type, api_key),
+                "event_metadata": {},
+            },
+            "signature_request": {
+                "signature_request_id": request_id,
+                "files_url": f"https://api.hellosign.com/v3/signature_request/files/{request_id}",
+            },
+        }
+    )
+
+
+def event(
+    status: SignatureStatus, *, event_id: str, seconds: int = 0, request_id="sr-1"
+) -> SignatureStatusEvent:
+    event_time = datetime(2024, 6, 1, tzinfo=UTC) + timedelta(seconds=seconds)
+    return SignatureStatusEvent(
+        event_id=event_id,
+        signature_request_id=request_id,
+        signature_status=status,
+        event_time=event_time,
+        signed_at=event_time if status == SignatureStatus.signed else None,
+    )
+
+
+@pytest.fixture
+async def pending(session_maker, seed) -> None:
+    async with session_maker() as session:
+        await session.execute(
+            update(Document)
+            .where(Document.id == seed.document)
+            .values(
+                signature_status=SignatureStatus.pending, signature_request_id="sr-1"
+            )
+        )
+        await session.commit()
+
+
+async def signature_of(session_maker, document_id) -> Document:
+    async with session_maker() as session:
+        return await session.get(Document, document_id)
+
+
+def test_signed_callback_becomes_a_transition_without_file_path():
+    parsed = parse_hellosign_callback(callback("signature_request_all_signed"), API_KEY)
+
+    assert parsed.signature_request_id == "sr-1"
+    assert parsed.signature_status == SignatureStatus.signed
+    assert parsed.signed_at == datetime.fromtimestamp(EVENT_TIME, tz=UTC)
+    # `files_url` es una URL temporal de HelloSign, no una ruta de Storage
+    assert "signed_file_path" not in parsed.model_dump()
+
+
+def test_callback_with_a_forged_hash_is_rejected():
+    forged = callback("signature_request_all_signed", api_key="otra-key")
+
+    with pytest.raises(UnauthorizedError):
+        parse_hellosign_callback(forged, API_KEY)
+    with pytest.raises(ValidationDomainError):
+        parse_hellosign_callback("no es json", API_KEY)
+
+
+def test_events_that_do_not_change_the_signature_are_ignored():
+    assert (
+        parse_hellosign_callback(callback("signature_request_viewed"), API_KEY) is None
+    )
+    assert parse_hellosign_callback(callback("callback_test"), API_KEY) is None
+
+
+def test_retried_events_are_deduplicated(session_maker):
+    queue = SignatureEventQueue(session_maker, dedup_size=2)
+    first = event(SignatureStatus.signed, event_id="a")
+
+    assert queue.submit(first)
+    assert not queue.submit(first)
+    assert queue.submit(event(SignatureStatus.signed, event_id="b"))
+    assert queue.submit(event(SignatureStatus.signed, event_id="c"))
+    # Solo se recuerdan los últimos `dedup_size`
+    assert queue.submit(first)
+
+
+async def test_batch_applies_the_latest_event_in_one_transaction(
+    session_maker, seed, pending, commits
+):
+    queue = SignatureEventQueue(session_maker, batch_size=10, flush_interval=0.05)
+    queue.start()
+    queue.submit(event(SignatureStatus.signed, event_id="signed", seconds=10))
+    # Llega después pero ocurrió antes: no pisa la firma
+    queue.submit(event(SignatureStatus.declined, event_id="declined", seconds=5))
+    queue.submit(event(SignatureStatus.signed, event_id="other", request_id="sr-9"))
+    await queue.stop()
+
+    document = await signature_of(session_maker, seed.document)
+    assert document.signature_status == SignatureStatus.signed
+    assert document.signed_at is not None
+    assert document.signed_file_path is None
+    assert len(commits) == 1
+
+
+async def test_failed_batch_forgets_its_events(session_maker, pending, monkeypatch):
+    queue = SignatureEventQueue(session_maker, flush_interval=0)
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("BD caída")
+
+    monkeypatch.setattr(
+        "app.repositories.documents_repository.DocumentRepository"
+        ".get_by_signature_request_ids",
+        broken,
+    )
+    lost = event(SignatureStatus.signed, event_id="lost")
+    queue.start()
+    queue.submit(lost)
+    await queue.stop()
+
+    # El reintento de HelloSign (o la reconciliación) ya no se descarta
+    assert queue.submit(lost)
+
+
+async def test_endpoint_acks_and_enqueues(client, app):
+    response = await client.post(
+        "/api/v1/webhooks/hellosign",
+        data={"json": callback("signature_request_declined")},
+    )
+    rejected = await client.post(
+        "/api/v1/webhooks/hellosign",
+        data={"json": callback("signature_request_declined", api_key="otra-key")},
+    )
+
+    assert response.status_code == 200
+    assert response.text == HELLOSIGN_ACK
+    assert rejected.status_code == 401
+    # Encolado: el mismo evento ya no se vuelve a aceptar
+    delivered = f"{event_hash('signature_request_declined')}:sr-1"
+    assert not app.state.signature_event_queue.submit(
+        event(SignatureStatus.declined, event_id=delivered)
+    )
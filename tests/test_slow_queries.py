@@ -0,0 +1,47 @@
+"""Registro de consultas lentas y EXPLAIN por muestreo (ver
+app/core/slow_queries.py)."""
+
+from app.core import deadlines, tracing
+from app.core.query_tracking import assert_max_queries, current_request_stats
+from app.core.slow_queries import SlowQueryLog, normalize_sql, parameters_shape
+
+
+def test_statements_are_normalized_without_values():
+    statement = (
+        "SELECT *\n  FROM documents WHERE status = 'pending' "
+        "AND id IN ($1::UUID, $2::UUID, $3::UUID) LIMIT 20"
+    )
+
+    assert normalize_sql(statement) == (
+        "SELECT * FROM documents WHERE status = ? AND id IN (...) LIMIT ?"
+    )
+    assert parameters_shape({"id": 1, "email": "a@b.cl"}) == "{id: int, email: str}"
+    assert parameters_shape([(1, "x"), (2, "y")], executemany=True) == "2 x (int, str)"
+
+
+async def test_sampled_explain_runs_outside_the_request_context(monkeypatch):
+    log = SlowQueryLog(threshold_ms=0, explain_sample_rate=1)
+    log.bind(object())
+    seen = {}
+
+    async def explain(entry, statement, parameters):
+        seen["stats"] = current_request_stats()
+        seen["deadline"] = deadlines.current_deadline()
+        seen["span"] = tracing._current.get()
+
+    monkeypatch.setattr(log, "_explain", explain)
+
+    token = deadlines._current.set(
+        deadlines.Deadline({}, default=1, statement_timeout=1, lock_timeout=1)
+    )
+    try:
+        async with assert_max_queries(0):
+            log.observe("SELECT 1", {}, executemany=False, elapsed=0.5)
+            await log._explaining
+    finally:
+        deadlines._current.reset(token)
+
+    assert seen == {"stats": None, "deadline": None, "span": None}
+    [entry] = log.recent()
+    assert entry.statement == "SELECT ?"
+    assert entry.duration_ms == 500
@@ -0,0 +1,90 @@
+"""Exportador de trazas a archivo y su escritura fuera del event loop (ver
+app/core/tracing.py y app/core/line_writer.py)."""
+
+import json
+import threading
+from collections.abc import Iterator
+
+import pytest
+
+from app.core import line_writer
+from app.core.line_writer import LineWriter
+from app.core.tracing import (
+    CLIENT,
+    FileSpanExporter,
+    Tracer,
+    configure_tracing,
+    span,
+)
+
+
+@pytest.fixture
+def exporter(tmp_path) -> Iterator[FileSpanExporter]:
+    exporter = FileSpanExporter(str(tmp_path / "traces.jsonl"))
+    configure_tracing(Tracer(exporter))
+    yield exporter
+    configure_tracing(None)
+    exporter.writer.close()
+
+
+def test_file_exporter_writes_otlp_lines(exporter):
+    with span("request") as root, span("hellosign", kind=CLIENT) as child:
+        child.set_attribute("http.status_code", 200)
+    exporter.writer.flush()
+
+    with open(exporter.path, encoding="utf-8") as fh:
+        written = [json.loads(line) for line in fh]
+    assert [s["name"] for s in written] == ["hellosign", "request"]
+    outbound, request = written
+    assert outbound["traceId"] == request["traceId"] == root.trace_id
+    assert outbound["parentSpanId"] == request["spanId"]
+    assert outbound["kind"] == "SPAN_KIND_CLIENT"
+    assert outbound["attributes"] == [
+        {"key": "http.status_code", "value": {"intValue": "200"}}
+    ]
+
+
+def test_export_does_not_touch_the_file_on_the_calling_thread(exporter, monkeypatch):
+    opened_on: list[str] = []
+    disk = threading.Event()
+    real_open = open
+
+    def slow_open(*args, **kwargs):
+        opened_on.append(threading.current_thread().name)
+        disk.wait(5)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(line_writer, "open", slow_open, raising=False)
+    for n in range(20):
+        with span(f"request-{n}"):
+            pass
+    # Con el disco trabado los requests no esperan
+    disk.set()
+    exporter.writer.flush()
+
+    assert threading.current_thread().name not in opened_on
+    # Las trazas encoladas mientras se escribía salen en un solo lote
+    assert 1 <= len(opened_on) <= 2
+    with open(exporter.path, encoding="utf-8") as fh:
+        assert len(fh.readlines()) == 20
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    writer = LineWriter(str(tmp_path / "out.jsonl"), max_pending=2)
+    gate = threading.Event()
+    real_open = open
+
+    def slow_open(*args, **kwargs):
+        gate.wait(5)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(line_writer, "open", slow_open, raising=False)
+    for n in range(6):
+        writer.write(f"{n}\n")
+    assert writer.dropped >= 3
+    gate.set()
+    writer.close()
+
+    lines = (tmp_path / "out.jsonl").read_text().splitlines()
+    assert lines[0] == "0"
+    assert len(lines) == 6 - writer.dropped
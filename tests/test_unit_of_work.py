@@ -0,0 +1,139 @@
+"""Unidad de trabajo: un COMMIT por request que escribe, ninguno si solo lee o
+si la respuesta es un error (ver app/core/unit_of_work.py)."""
+
+from typing import Annotated
+from uuid import uuid4
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.core.unit_of_work import UnitOfWorkMiddleware, manual_commit
+from app.dependencies.db import get_session
+from app.models import Profile
+
+Session = Annotated[AsyncSession, Depends(get_session)]
+
+
+async def test_writing_request_commits_once(client, seed, commits):
+    response = await client.post(
+        "/api/v1/credit-applications/",
+        json={
+            "requested_amount": "1500000",
+            "term_months": 12,
+            "purpose": "equipment",
+        },
+        headers=seed.as_applicant,
+    )
+
+    assert response.status_code == 200
+    assert len(commits) == 1
+
+
+async def test_read_only_request_does_not_commit(client, seed, commits):
+    response = await client.get(
+        f"/api/v1/credit-applications/{seed.application}",
+        headers=seed.as_applicant,
+    )
+
+    assert response.status_code == 200
+    assert commits == []
+
+
+async def test_rejected_write_does_not_commit(client, seed, commits):
+    # Un solicitante no puede aprobar su propia solicitud
+    response = await client.patch(
+        f"/api/v1/credit-applications/{seed.application}",
+        json={"status": "approved"},
+        headers=seed.as_applicant,
+    )
+
+    assert response.status_code == 403
+    assert commits == []
+
+
+@pytest.fixture
+def uow_app(settings, session_maker) -> FastAPI:
+    """App mínima con la unidad de trabajo, para escrituras seguidas de error."""
+    uow_app = FastAPI()
+    uow_app.state.settings = settings
+    uow_app.state.async_session = session_maker
+    uow_app.add_middleware(UnitOfWorkMiddleware)
+
+    @uow_app.post("/profiles/{email}")
+    async def create(email: str, session: Session, fail: int | None = None):
+        session.add(Profile(id=uuid4(), email=email))
+        await session.flush()
+        if fail is not None:
+            raise HTTPException(status_code=fail, detail="falla después de escribir")
+        return {"ok": True}
+
+    @uow_app.post("/crash/{email}")
+    async def crash(email: str, session: Session):
+        session.add(Profile(id=uuid4(), email=email))
+        await session.flush()
+        raise RuntimeError("error no controlado")
+
+    @uow_app.post("/manual/{email}")
+    async def manual(email: str, session: Session):
+        manual_commit(session)
+        session.add(Profile(id=uuid4(), email=email))
+        await session.commit()
+        # Sin commit propio: se descarta al terminar el request
+        session.add(Profile(id=uuid4(), email=f"late.{email}"))
+        await session.flush()
+        return {"ok": True}
+
+    return uow_app
+
+
+@pytest.fixture
+async def uow_client(uow_app):
+    async with AsyncClient(
+        transport=ASGITransport(app=uow_app, raise_app_exceptions=False),
+        base_url="http://test",
+    ) as client:
+        yield client
+
+
+async def _emails(session_maker) -> set[str]:
+    async with session_maker() as session:
+        return set((await session.execute(select(Profile.email))).scalars())
+
+
+async def test_error_response_rolls_back_flushed_writes(
+    uow_client, session_maker, commits
+):
+    response = await uow_client.post("/profiles/a@example.com", params={"fail": 409})
+
+    assert response.status_code == 409
+    assert commits == []
+    assert await _emails(session_maker) == set()
+
+
+async def test_unhandled_error_rolls_back(uow_client, session_maker, commits):
+    response = await uow_client.post("/crash/b@example.com")
+
+    assert response.status_code == 500
+    assert commits == []
+    assert await _emails(session_maker) == set()
+
+
+async def test_success_commits_flushed_writes(uow_client, session_maker, commits):
+    response = await uow_client.post("/profiles/c@example.com")
+
+    assert response.status_code == 200
+    assert len(commits) == 1
+    assert await _emails(session_maker) == {"c@example.com"}
+
+
+async def test_manual_mode_keeps_only_explicit_commits(
+    uow_client, session_maker, commits
+):
+    response = await uow_client.post("/manual/d@example.com")
+
+    assert response.status_code == 200
+    assert len(commits) == 1
+    assert await _emails(session_maker) == {"d@example.com"}